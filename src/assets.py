@@ -0,0 +1,151 @@
+from os import stat, utime, chmod
+from shutil import copyfileobj
+from concurrent.futures import ThreadPoolExecutor
+from manifest import hash_file
+import tracing
+import errno
+import stat as stat_module
+
+try:
+    from fcntl import ioctl
+except ImportError:
+    ioctl = None
+try:
+    from os import copy_file_range
+except ImportError:
+    copy_file_range = None
+
+# ioctl request that makes the destination a copy-on-write clone of the source (Btrfs, XFS, ...)
+FICLONE = 0x40049409
+COPY_THREADS = 8
+
+# Errors meaning "this file system (or kernel) can't do that", after which a slower way is tried
+_UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EBADF, errno.EPERM}
+_clone_supported = ioctl is not None
+_copy_file_range_supported = copy_file_range is not None
+
+class CopyStats():
+    '''CopyStats Class
+    Counts what the asset stage copied and what it skipped because the destination was up to date.
+    ### Attributes:
+        copied_files: The number of files copied.
+        copied_bytes: The size of the copied files.
+        skipped_files: The number of files skipped.
+        skipped_bytes: The size of the skipped files.
+    '''
+    __slots__ = ('copied_files', 'copied_bytes', 'skipped_files', 'skipped_bytes')
+
+    def __init__(self) -> None:
+        self.copied_files = 0
+        self.copied_bytes = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+
+    def add(self, copied: bool, size: int) -> None:
+        '''Counts one file, copied or skipped.'''
+        if copied:
+            self.copied_files += 1
+            self.copied_bytes += size
+        else:
+            self.skipped_files += 1
+            self.skipped_bytes += size
+
+    def __repr__(self) -> str:
+        return (f'Copied {self.copied_files} files ({self.copied_bytes} bytes), '
+                f'skipped {self.skipped_files} unchanged files ({self.skipped_bytes} bytes)')
+
+def is_up_to_date(src_path: str, dst_path: str, check_hash: bool = False) -> bool:
+    '''
+    Checks whether a destination file already holds the source file's contents.
+    ### Args:
+        src_path: The source file.
+        dst_path: The destination file.
+        check_hash: Compare the files' hashes instead of their modification times.
+    ### Returns:
+        True if the sizes match and either the mtimes or, with check_hash, the hashes match.
+    '''
+    try:
+        dst_stat = stat(dst_path)
+    except FileNotFoundError:
+        return False
+    src_stat = stat(src_path)
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if check_hash:
+        return hash_file(src_path) == hash_file(dst_path)
+    return src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+def copy_file(src_path: str, dst_path: str) -> None:
+    '''
+    Copies a file, as a copy-on-write clone where the file system supports it, else with
+    copy_file_range (an in-kernel copy), else through a userspace buffer.
+    The destination gets the source's permission bits and modification time, which is what
+    is_up_to_date compares on the next build.
+    '''
+    global _clone_supported, _copy_file_range_supported
+    src_stat = stat(src_path)
+    with open(src_path, 'rb') as rf, open(dst_path, 'wb') as wf:
+        copied = False
+        if _clone_supported:
+            try:
+                ioctl(wf.fileno(), FICLONE, rf.fileno())
+                copied = True
+            except OSError as err:
+                if err.errno not in _UNSUPPORTED:
+                    raise
+                _clone_supported = False
+        if not copied and _copy_file_range_supported:
+            try:
+                remaining = src_stat.st_size
+                while remaining > 0:
+                    sent = copy_file_range(rf.fileno(), wf.fileno(), remaining)
+                    if sent == 0:
+                        break
+                    remaining -= sent
+                copied = True
+            except OSError as err:
+                if err.errno not in _UNSUPPORTED:
+                    raise
+                _copy_file_range_supported = False
+                rf.seek(0)
+                wf.seek(0)
+                wf.truncate()
+        if not copied:
+            copyfileobj(rf, wf)
+    chmod(dst_path, stat_module.S_IMODE(src_stat.st_mode))
+    utime(dst_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+
+def copy_if_changed(src_path: str, dst_path: str, check_hash: bool = False) -> tuple[bool, int]:
+    '''
+    Copies a file unless its destination is up to date.
+    ### Returns:
+        A (copied, size) tuple, size being the size of the source in bytes.
+    '''
+    with tracing.span('copy', path=src_path):
+        size = stat(src_path).st_size
+        if is_up_to_date(src_path, dst_path, check_hash):
+            return False, size
+        copy_file(src_path, dst_path)
+        return True, size
+
+def copy_files(pairs: list[tuple[str, str]], threads: int = COPY_THREADS, check_hash: bool = False) -> CopyStats:
+    '''
+    Copies every (source, destination) pair whose destination is not up to date.
+    The copies run on a thread pool, so the I/O of several files overlaps.
+    ### Args:
+        pairs: The (source path, destination path) tuples, the destination directories must exist.
+        threads: The number of copying threads.
+        check_hash: Decide whether a file changed by its hash instead of its modification time.
+    ### Returns:
+        The CopyStats of the run.
+    '''
+    copy_pair = lambda pair: copy_if_changed(pair[0], pair[1], check_hash)
+    if threads > 1 and len(pairs) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(copy_pair, pairs))
+    else:
+        results = [copy_pair(pair) for pair in pairs]
+    stats = CopyStats()
+    for copied, size in results:
+        stats.add(copied, size)
+    return stats
@@ -0,0 +1,222 @@
+from os import path, makedirs, scandir, replace, remove
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from assets import CopyStats, copy_if_changed
+from compress import compress_data
+from fingerprint import fingerprint_assets
+from page_index import PageIndex
+from block_cache import block_cache
+from parse_cache import parse_cache
+from manifest import BuildManifest
+from template import Template, load_template
+from htmlnode import escape_text
+from errors import PageGenerationError
+from main import generate_page, is_page_source, page_destination, use_asset_urls, STREAMING_THRESHOLD
+from mapped_source import use_mmap
+import asyncio
+import tracing
+
+# Threads the blocking file system calls are offloaded to.
+IO_THREADS = 16
+# Files open at once, a copy counts as two (its source and its destination).
+MAX_OPEN_FILES = 64
+
+class FileLimiter():
+    '''FileLimiter Class
+    Caps the number of files open at once across every task of an asyncio build.
+    Unlike a semaphore, it hands out several slots at once, so a copy that needs two
+    files never holds one while waiting for the other.
+    ### Attributes:
+        limit: The number of files that may be open at once.
+        open_files: The number of files open right now.
+    '''
+    def __init__(self, limit: int = MAX_OPEN_FILES) -> None:
+        self.limit = max(limit, 2)
+        self.open_files = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slots(self, count: int = 1):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.open_files + count <= self.limit)
+            self.open_files += count
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.open_files -= count
+                self._condition.notify_all()
+
+class BuildResult():
+    '''BuildResult Class
+    What an asyncio build did.
+    ### Attributes:
+        copy_stats: The CopyStats of the static files.
+        copy_pairs: The (source path, destination path) tuples of every file copied or skipped.
+        rendered: The (markdown path, html path) tuples of the pages rendered, in the order they finished.
+        skipped: The (markdown path, html path) tuples of the pages the manifest reported as unchanged.
+        cache_stats: The [hits, misses] of the block cache ('block') and the parse cache ('parse').
+        titles: The title of every page rendered, keyed by its html path.
+    '''
+    __slots__ = ('copy_stats', 'copy_pairs', 'rendered', 'skipped', 'cache_stats', 'titles')
+
+    def __init__(self) -> None:
+        self.copy_stats = CopyStats()
+        self.copy_pairs = []
+        self.rendered = []
+        self.skipped = []
+        self.cache_stats = {}
+        self.titles = {}
+
+    def __repr__(self) -> str:
+        return f'BuildResult(Rendered: {len(self.rendered)}, Skipped: {len(self.skipped)}, {self.copy_stats})'
+
+def _list_dir(dir_path: str, dest_dir_path: str) -> tuple[list[str], list[str]]:
+    makedirs(dest_dir_path, exist_ok=True)
+    file_names, dir_names = [], []
+    with scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_file():
+                file_names.append(entry.name)
+            elif entry.is_dir():
+                dir_names.append(entry.name)
+    return file_names, dir_names
+
+async def _walk(run, dir_path: str, dest_dir_path: str) -> list[tuple[str, str]]:
+    '''The (source, destination) of every file below dir_path, in collect_pages' sorted walk order.'''
+    file_names, dir_names = await run(_list_dir, dir_path, dest_dir_path)
+    sub_dirs = {name: asyncio.ensure_future(_walk(run, path.join(dir_path, name), path.join(dest_dir_path, name)))
+                for name in dir_names}
+    files = []
+    for name in sorted(file_names + dir_names):
+        if name in sub_dirs:
+            files.extend(await sub_dirs[name])
+        else:
+            files.append((path.join(dir_path, name), path.join(dest_dir_path, name)))
+    return files
+
+def _read_text(file_path: str) -> str:
+    with tracing.span('read', path=file_path), open(file_path, 'r') as rf:
+        return rf.read()
+
+def _write_text(file_path: str, text: str, gzip_level: int | None = None) -> None:
+    tmp_path = f'{file_path}.tmp'
+    data = text.encode()
+    try:
+        with tracing.span('write', path=file_path), open(tmp_path, 'wb') as wf:
+            wf.write(data)
+        replace(tmp_path, file_path)
+    except BaseException:
+        if path.exists(tmp_path):
+            remove(tmp_path)
+        raise
+    if gzip_level is not None:
+        compress_data(data, file_path, gzip_level)
+
+def _render(from_path: str, markdown: str, template: Template, basepath: str,
+            collectors: tuple = ()) -> tuple[str, str, list]:
+    '''Renders a page read into memory, returning its HTML, its title and the record of every collector.'''
+    with tracing.span('page', path=from_path):
+        with tracing.span('parse'):
+            page = parse_cache.parse(markdown)
+        with tracing.span('markdown_to_html_node'):
+            page.build_tree(basepath=basepath)
+        sink = StringIO()
+        template.write(sink, {'Title': escape_text(page.title), 'Content': page.tree.write_html}, basepath)
+        return sink.getvalue(), page.title, [collect(from_path, page) for collect in collectors]
+
+async def build_site(source_dirs: list[str], template_path: str, dest_dir: str, basepath: str = '/',
+                     manifest: BuildManifest | None = None, io_threads: int = IO_THREADS,
+                     max_open_files: int = MAX_OPEN_FILES, check_hash: bool = False, log = print,
+                     gzip_level: int | None = None, fingerprint: bool = False,
+                     indexes: tuple[PageIndex, ...] = ()) -> BuildResult:
+    '''
+    Builds the site as an asyncio pipeline: the blocking file system calls (listing, reading,
+    writing, copying) run on a bounded thread pool, so the reads and writes of many pages overlap.
+    Pages are rendered on the same threads, so no render blocks the caller's event loop.
+    ### Args:
+        source_dirs: The source directories, each mirrored into dest_dir.
+        template_path: The HTML template every page is rendered into.
+        dest_dir: The output directory.
+        basepath: The root path the site is served from.
+        manifest: The build manifest deciding which pages to skip and recording the outputs, if any.
+        io_threads: The number of threads running file system calls.
+        max_open_files: The number of files open at once.
+        check_hash: Decide whether a static file changed by its hash instead of its size and mtime.
+        log: Called with a line for every rendered page.
+        gzip_level: Write every rendered page's .gz from memory along with it at this level, None writes none.
+        fingerprint: Name assets after their content hash and point the pages at the new names.
+        indexes: The PageIndexes (search, links) and the manifest's PageImages the records of the rendered pages are merged into.
+    ### Returns:
+        The BuildResult of the build.
+    ### Raises:
+        PageGenerationError: If a page fails to render, the pages still in flight are cancelled.
+    '''
+    loop = asyncio.get_running_loop()
+    files = FileLimiter(max_open_files)
+    # Pages read but not yet written, which bounds the memory held by the pipeline
+    in_flight = asyncio.Semaphore(max(io_threads, 1) * 2)
+    result = BuildResult()
+    block_cache.take_stats()
+    parse_cache.take_stats()
+    with ThreadPoolExecutor(max_workers=io_threads) as executor:
+        run = partial(loop.run_in_executor, executor)
+        template = await run(load_template, template_path)
+        pairs = []
+        for source_dir in source_dirs:
+            pairs.extend(await _walk(run, source_dir, dest_dir))
+        pages = [(src_path, page_destination(dst_path)) for src_path, dst_path in pairs if is_page_source(src_path)]
+        if fingerprint:
+            # Every page links to the fingerprinted names, so they are known before any page is rendered
+            pairs, asset_urls = await run(fingerprint_assets, pairs, dest_dir, None if check_hash else manifest)
+            await run(use_asset_urls, asset_urls, dest_dir, manifest)
+        result.copy_pairs = pairs
+        collectors = tuple(index.collect for index in indexes)
+
+        async def copy(src_path: str, dst_path: str) -> None:
+            if manifest is not None:
+                manifest.record_asset(dst_path)
+            async with files.slots(2):
+                result.copy_stats.add(*await run(copy_if_changed, src_path, dst_path, check_hash))
+
+        async def build_page(from_path: str, dst_path: str) -> None:
+            async with in_flight:
+                try:
+                    if manifest is not None and not (await run(manifest.check_page, from_path, dst_path))[0]:
+                        result.skipped.append((from_path, dst_path))
+                        return
+                    log(f'Generating page from {from_path} to {dst_path} using {template_path}')
+                    size = await run(path.getsize, from_path)
+                    if size >= STREAMING_THRESHOLD or use_mmap(size):
+                        records = [{} for _ in indexes]
+                        async with files.slots(2):
+                            title = await run(generate_page, from_path, template_path, dst_path, basepath, lambda line: None,
+                                              gzip_level, collectors, records)
+                        for index, index_records in zip(indexes, records):
+                            index.update(index_records)
+                    else:
+                        async with files.slots():
+                            markdown = await run(_read_text, from_path)
+                        html, title, records = await run(_render, from_path, markdown, template, basepath, collectors)
+                        for index, record in zip(indexes, records):
+                            index.update({dst_path: record})
+                        async with files.slots(2 if gzip_level is not None else 1):
+                            await run(_write_text, dst_path, html, gzip_level)
+                except Exception as err:
+                    raise PageGenerationError(from_path, f'{type(err).__name__}: {err}') from err
+                result.rendered.append((from_path, dst_path))
+                result.titles[dst_path] = title
+
+        try:
+            async with asyncio.TaskGroup() as tasks:
+                for src_path, dst_path in pairs:
+                    tasks.create_task(copy(src_path, dst_path))
+                for from_path, dst_path in pages:
+                    tasks.create_task(build_page(from_path, dst_path))
+        except ExceptionGroup as group:
+            # Report the first failure, as the synchronous build does
+            raise group.exceptions[0] from None
+    result.cache_stats = {'block': list(block_cache.take_stats()), 'parse': list(parse_cache.take_stats())}
+    return result
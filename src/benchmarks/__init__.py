@@ -0,0 +1 @@
+'''Benchmarks for the site generator, run from src/, e.g. python -m benchmarks.block_type'''
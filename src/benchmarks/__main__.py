@@ -0,0 +1,77 @@
+from tempfile import TemporaryDirectory
+from datetime import datetime, timezone
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.stages import bench_stages
+from benchmarks.site import bench_site
+import argparse
+import json
+import platform
+import subprocess
+import sys
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args: argparse.Namespace) -> dict:
+    generator = CorpusGenerator(args.pages, (args.min_blocks, args.max_blocks), inline_density=args.inline_density, seed=args.seed)
+    with TemporaryDirectory() as site_dir:
+        page_paths = generator.write(site_dir)
+        pages = []
+        for page_path in page_paths:
+            with open(page_path, 'r') as rf:
+                pages.append(rf.read())
+        results = {
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'corpus': generator.settings(),
+            'stages': bench_stages(pages, args.repeat),
+        }
+        if not args.skip_site:
+            results['site'] = bench_site(site_dir, page_paths, args.jobs)
+    return results
+
+def compare(old_path: str, new_path: str) -> None:
+    '''Prints every timing of two result files side by side.'''
+    with open(old_path, 'r') as rf:
+        old = json.load(rf)
+    with open(new_path, 'r') as rf:
+        new = json.load(rf)
+    rows = [(f'stage {stage}', timing['seconds'], new['stages'].get(stage, {}).get('seconds')) for stage, timing in old['stages'].items()]
+    rows += [(f'site {name}', seconds, new.get('site', {}).get(name)) for name, seconds in old.get('site', {}).items()]
+    print(f'{"":<24}{(old.get("commit") or "old")[:10]:>12}{(new.get("commit") or "new")[:10]:>12}{"change":>9}')
+    for name, before, after in rows:
+        change = f'{(after - before) / before * 100:+.0f}%' if after is not None and before else ''
+        print(f'{name:<24}{before:>12.4f}{after if after is not None else float("nan"):>12.4f}{change:>9}')
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmarks the generator on a synthetic site.')
+    parser.add_argument('--out', help='Write the results as JSON to this file.')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two result files instead of running.')
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--min-blocks', type=int, default=20)
+    parser.add_argument('--max-blocks', type=int, default=60)
+    parser.add_argument('--inline-density', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per stage, the fastest one is kept.')
+    parser.add_argument('--jobs', type=int, default=1, help='--jobs of the full-site builds.')
+    parser.add_argument('--skip-site', action='store_true', help='Only run the per-stage benchmarks.')
+    args = parser.parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+    results = run(args)
+    for stage, timing in results['stages'].items():
+        print(f'{stage:<14}{timing["seconds"]:>10.4f} s{timing["us_per_page"]:>12.0f} us/page{timing["mb_per_second"]:>9.1f} MB/s')
+    for name, seconds in results.get('site', {}).items():
+        print(f'{name:<14}{seconds:>10.4f} s')
+    if args.out:
+        with open(args.out, 'w') as wf:
+            json.dump(results, wf, indent=1)
+        print(f'Wrote {args.out}')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
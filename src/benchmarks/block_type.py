@@ -0,0 +1,46 @@
+from timeit import Timer
+from text_to_textnodes import block_to_block_type, block_to_block_type_multipass
+import argparse
+import sys
+
+# One block of every type, plus the near misses that make the multi-pass classifier
+# walk the whole block before it falls back to PARAGRAPH.
+SAMPLE_BLOCKS = {
+    'paragraph': 'Here is a paragraph with **bold** text\nthat runs over a couple\nof lines of text.',
+    'heading': '## A second level heading',
+    'code': '```\nfunc main(){\n    fmt.Println("Aiya, Ambar!")\n}\n```',
+    'quote': '\n'.join('> a quoted line of text' for _ in range(8)),
+    'unordered_list': '\n'.join(f'- list item {i}' for i in range(20)),
+    'ordered_list': '\n'.join(f'{i}. list item {i}' for i in range(1, 21)),
+    'broken_ordered_list': '\n'.join(f'{i}. list item {i}' for i in range(1, 20)) + '\n40. out of order',
+    'almost_quote': '\n'.join('> a quoted line of text' for _ in range(8)) + '\nnot quoted',
+}
+
+def bench(number: int = 20000, repeat: int = 5) -> dict[str, dict[str, float]]:
+    '''
+    Times block_to_block_type against the original multi-pass implementation on every sample block.
+    ### Args:
+        number: Calls per timing run.
+        repeat: Timing runs, the fastest one is kept.
+    ### Returns:
+        The nanoseconds per call of both implementations, keyed by sample name.
+    '''
+    results = {}
+    for name, block in SAMPLE_BLOCKS.items():
+        assert block_to_block_type(block) is block_to_block_type_multipass(block), name
+        results[name] = {
+            label: min(Timer(lambda: classify(block)).repeat(repeat, number)) / number * 1e9
+            for label, classify in (('multipass', block_to_block_type_multipass), ('single_pass', block_to_block_type))
+        }
+    return results
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description='Micro-benchmark of the block classifier.')
+    parser.add_argument('--number', type=int, default=20000, help='Calls per timing run.')
+    args = parser.parse_args(argv)
+    print(f'{"block":<22}{"multipass ns":>14}{"single pass ns":>16}{"speedup":>9}')
+    for name, timings in bench(args.number).items():
+        print(f'{name:<22}{timings["multipass"]:>14.0f}{timings["single_pass"]:>16.0f}{timings["multipass"] / timings["single_pass"]:>8.1f}x')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,155 @@
+from os import path, makedirs
+import argparse
+import random
+import sys
+import zlib
+import struct
+
+TEMPLATE = '''<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>'''
+
+# The relative weight of every block type in a generated page.
+DEFAULT_BLOCK_MIX = {
+    'paragraph': 50,
+    'heading': 12,
+    'code': 8,
+    'quote': 8,
+    'unordered_list': 12,
+    'ordered_list': 10,
+}
+
+WORDS = ('the', 'ring', 'of', 'power', 'elf', 'dwarf', 'hobbit', 'wizard', 'mountain', 'river', 'shire', 'road',
+         'goes', 'ever', 'on', 'and', 'under', 'shadow', 'light', 'song', 'fire', 'king', 'return', 'tale', 'forest',
+         'old', 'stone', 'star', 'sea', 'west', 'journey', 'friend', 'council', 'sword', 'tower', 'gate')
+
+class CorpusGenerator():
+    '''CorpusGenerator Class
+    Generates a synthetic site (content/, static/ and template.html) that the generator can build.
+    The same seed and settings always produce the same files.
+    ### Attributes:
+        pages: The number of pages to generate.
+        blocks_per_page: The (min, max) number of blocks of a page.
+        block_mix: The relative weight of every block type, keyed by BlockType value.
+        inline_density: The chance of a word carrying inline markup (bold, italic, code, link or image).
+        seed: The random seed.
+    '''
+    def __init__(self, pages: int = 100, blocks_per_page: tuple[int, int] = (20, 60),
+                 block_mix: dict[str, int] | None = None, inline_density: float = 0.1, seed: int = 0) -> None:
+        self.pages = pages
+        self.blocks_per_page = blocks_per_page
+        self.block_mix = block_mix or DEFAULT_BLOCK_MIX
+        self.inline_density = inline_density
+        self.seed = seed
+        self.random = random.Random(seed)
+
+    def settings(self) -> dict:
+        return {
+            'pages': self.pages,
+            'blocks_per_page': list(self.blocks_per_page),
+            'block_mix': self.block_mix,
+            'inline_density': self.inline_density,
+            'seed': self.seed,
+        }
+
+    def page_urls(self) -> list[str]:
+        return ['/'] + [f'/blog/{i // 100:03d}/post-{i:05d}' for i in range(1, self.pages)]
+
+    def words(self, count: int, markup: bool = True) -> str:
+        '''A line of words, every delimiter it uses is closed on the same line.'''
+        words = []
+        for _ in range(count):
+            word = self.random.choice(WORDS)
+            if markup and self.random.random() < self.inline_density:
+                kind = self.random.randrange(5)
+                if kind == 0:
+                    word = f'**{word}**'
+                elif kind == 1:
+                    word = f'_{word}_'
+                elif kind == 2:
+                    word = f'`{word}`'
+                elif kind == 3:
+                    word = f'[{word}]({self.random.choice(self.urls)})'
+                else:
+                    word = f'![{word}](/images/pixel.png)'
+            words.append(word)
+        return ' '.join(words)
+
+    def block(self, block_type: str) -> str:
+        randrange = self.random.randrange
+        match block_type:
+            case 'heading':
+                return f'{"#" * randrange(2, 7)} {self.words(randrange(2, 7))}'
+            case 'code':
+                lines = [f'{self.random.choice(WORDS)}({self.random.choice(WORDS)}) = {randrange(1000)}' for _ in range(randrange(2, 12))]
+                return '```\n' + '\n'.join(lines) + '\n```'
+            case 'quote':
+                return '\n'.join(f'> {self.words(randrange(5, 15))}' for _ in range(randrange(1, 5)))
+            case 'unordered_list':
+                return '\n'.join(f'- {self.words(randrange(3, 12))}' for _ in range(randrange(2, 9)))
+            case 'ordered_list':
+                return '\n'.join(f'{i}. {self.words(randrange(3, 12))}' for i in range(1, randrange(3, 10)))
+        sentences = [self.words(randrange(6, 20)) + '.' for _ in range(randrange(1, 6))]
+        return '\n'.join(sentences)
+
+    def page(self) -> str:
+        block_types = list(self.block_mix)
+        weights = [self.block_mix[block_type] for block_type in block_types]
+        count = self.random.randint(*self.blocks_per_page)
+        blocks = [f'# {self.words(self.random.randrange(2, 6), markup=False).title()}']
+        blocks.extend(self.block(block_type) for block_type in self.random.choices(block_types, weights, k=count))
+        return '\n\n'.join(blocks) + '\n'
+
+    def write(self, site_dir: str) -> list[str]:
+        '''
+        Writes the site into site_dir.
+        ### Returns:
+            The paths of the generated markdown pages.
+        '''
+        self.random.seed(self.seed)
+        self.urls = self.page_urls()
+        pages = []
+        for url in self.urls:
+            page_path = path.join(site_dir, 'content', url.strip('/'), 'index.md')
+            makedirs(path.dirname(page_path), exist_ok=True)
+            with open(page_path, 'w') as wf:
+                wf.write(self.page())
+            pages.append(page_path)
+        makedirs(path.join(site_dir, 'static', 'images'), exist_ok=True)
+        with open(path.join(site_dir, 'static', 'index.css'), 'w') as wf:
+            wf.write('body { font-family: serif; max-width: 40em; margin: auto; }\n')
+        with open(path.join(site_dir, 'static', 'images', 'pixel.png'), 'wb') as wf:
+            wf.write(_png(1, 1))
+        with open(path.join(site_dir, 'template.html'), 'w') as wf:
+            wf.write(TEMPLATE)
+        return pages
+
+def _png(width: int, height: int) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    rows = b''.join(b'\x00' + b'\xff\xff\xff' * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b''))
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description='Generates a synthetic site to build and benchmark.')
+    parser.add_argument('site_dir', help='The directory to write content/, static/ and template.html into.')
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--min-blocks', type=int, default=20)
+    parser.add_argument('--max-blocks', type=int, default=60)
+    parser.add_argument('--inline-density', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    generator = CorpusGenerator(args.pages, (args.min_blocks, args.max_blocks), inline_density=args.inline_density, seed=args.seed)
+    print(f'Wrote {len(generator.write(args.site_dir))} pages to {args.site_dir}')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,63 @@
+from io import StringIO
+from time import perf_counter
+from html import escape
+from benchmarks.node_memory import largest_pages
+from markdown_to_html_node import markdown_to_html_node
+import htmlnode
+import argparse
+import sys
+
+def _no_escape(text: str) -> str:
+    return text
+
+def _html_escape_text(text: str) -> str:
+    return escape(text, quote=False)
+
+# The serializer's escaping functions, swapped in turn: none at all, html.escape on every node, and the fast path
+VARIANTS = {
+    'none': (_no_escape, _no_escape),
+    'html.escape': (_html_escape_text, escape),
+    'fast path': (htmlnode.escape_text, htmlnode.escape_attribute),
+}
+
+def bench_escaping(markdown: str, repeat: int = 20) -> dict[str, float]:
+    '''
+    Times serializing a page's tree with every escaping variant.
+    ### Args:
+        markdown: The page's markdown.
+        repeat: Timing runs per variant, the fastest one is kept.
+    ### Returns:
+        The seconds to serialize the page once, keyed by variant.
+    '''
+    tree = markdown_to_html_node(markdown, None)
+    original = (htmlnode.escape_text, htmlnode.escape_attribute)
+    timings = {}
+    try:
+        for name, (escape_text, escape_attribute) in VARIANTS.items():
+            htmlnode.escape_text, htmlnode.escape_attribute = escape_text, escape_attribute
+            best = float('inf')
+            for _ in range(repeat):
+                start = perf_counter()
+                tree.write_html(StringIO())
+                best = min(best, perf_counter() - start)
+            timings[name] = best
+    finally:
+        htmlnode.escape_text, htmlnode.escape_attribute = original
+    return timings
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description='The cost of escaping text and attributes when serializing the largest pages.')
+    parser.add_argument('pages', nargs='*', help='Markdown files to measure (default: the largest pages in --content).')
+    parser.add_argument('--content', default='content', help='The content directory to pick the largest pages from.')
+    parser.add_argument('--count', type=int, default=5, help='How many of the largest pages to measure.')
+    parser.add_argument('--repeat', type=int, default=20, help='Timing runs per variant, the fastest one is kept.')
+    args = parser.parse_args(argv)
+    print(f'{"page":<40}' + ''.join(f'{name + " us":>16}' for name in VARIANTS) + f'{"overhead":>10}')
+    for page in args.pages or largest_pages(args.content, args.count):
+        with open(page, 'r') as rf:
+            timings = bench_escaping(rf.read(), args.repeat)
+        overhead = (timings['fast path'] - timings['none']) / timings['none'] * 100
+        print(f'{page[-40:]:<40}' + ''.join(f'{seconds * 1e6:>16.0f}' for seconds in timings.values()) + f'{overhead:>+9.1f}%')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
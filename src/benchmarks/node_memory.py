@@ -0,0 +1,106 @@
+from os import path, walk
+from htmlnode import HTMLNode, freeze_props
+from markdown_to_html_node import markdown_to_html_node
+from text_to_textnodes import iter_blocks, text_to_textnodes, TextNode
+import argparse
+import gc
+import sys
+import tracemalloc
+
+class _DictNode():
+    '''The layout nodes had before __slots__: a per-instance __dict__ and a props dict of their own.'''
+    def __init__(self, tag, value, props, children) -> None:
+        self.tag = tag
+        self.value = value
+        self.props = props
+        self.children = children
+
+class _DictTextNode():
+    def __init__(self, text, text_type, url) -> None:
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+def _copy_tree(node: HTMLNode, copy_node):
+    children = None if node.children is None else [_copy_tree(child, copy_node) for child in node.children]
+    return copy_node(node, children)
+
+def _slots_copy(node: HTMLNode, children: list | None) -> HTMLNode:
+    # The props go through freeze_props as the constructor's do, so the shared ones cost nothing and the others are counted
+    copy = object.__new__(type(node))
+    copy.tag, copy.value, copy.children = node.tag, node.value, children
+    copy.props = freeze_props(None if node.props is None else dict(node.props))
+    return copy
+
+def _dict_copy(node: HTMLNode, children: list | None) -> _DictNode:
+    return _DictNode(node.tag, node.value, None if node.props is None else dict(node.props), children)
+
+def traced_bytes(build) -> int:
+    '''Bytes still allocated after build() ran, measured with tracemalloc.'''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+def measure(markdown: str) -> dict[str, float]:
+    '''
+    Bytes per node of the HTML tree and of the TextNodes of a page, with the old dict layout and the slots layout.
+    Both layouts are built as copies of the same parsed nodes, so the text they point to is shared and
+    only the memory of the nodes themselves (instances, props and children lists) is counted.
+    The links and images are also measured on their own, as their props hold a URL and are never shared whole.
+    The tree is built without the block cache, which would turn every block into a single raw HTML node.
+    '''
+    tree = markdown_to_html_node(markdown, None)
+    html_count = sum(1 for _ in _iter_nodes(tree))
+    url_nodes = [node for node in _iter_nodes(tree) if node.props is not None and ('href' in node.props or 'src' in node.props)]
+    # A page has few of them, they are copied as often as needed to measure at least 1000 nodes
+    url_samples = url_nodes * (-(-1000 // len(url_nodes)) if url_nodes else 0)
+    url_count = max(len(url_samples), 1)
+    text_nodes = [node for block in iter_blocks(markdown.split('\n')) for node in text_to_textnodes(block)]
+    text_count = max(len(text_nodes), 1)
+    return {
+        'html_nodes': html_count,
+        'html_bytes_per_node_before': traced_bytes(lambda: _copy_tree(tree, _dict_copy)) / html_count,
+        'html_bytes_per_node_after': traced_bytes(lambda: _copy_tree(tree, _slots_copy)) / html_count,
+        'url_nodes': len(url_nodes),
+        'url_bytes_per_node_before': traced_bytes(lambda: [_dict_copy(node, None) for node in url_samples]) / url_count,
+        'url_bytes_per_node_after': traced_bytes(lambda: [_slots_copy(node, None) for node in url_samples]) / url_count,
+        'text_nodes': len(text_nodes),
+        'text_bytes_per_node_before': traced_bytes(lambda: [_DictTextNode(node.text, node.text_type, node.url) for node in text_nodes]) / text_count,
+        'text_bytes_per_node_after': traced_bytes(lambda: [TextNode(node.text, node.text_type, node.url) for node in text_nodes]) / text_count,
+    }
+
+def _iter_nodes(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        if node.children:
+            stack.extend(node.children)
+
+def largest_pages(content_dir: str, count: int) -> list[str]:
+    pages = [path.join(root, name) for root, _, names in walk(content_dir) for name in names if name.endswith('.md')]
+    return sorted(pages, key=path.getsize, reverse=True)[:count]
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description='Memory per node of the page trees, before and after __slots__.')
+    parser.add_argument('pages', nargs='*', help='Markdown files to measure (default: the largest pages in --content).')
+    parser.add_argument('--content', default='content', help='The content directory to pick the largest pages from.')
+    parser.add_argument('--count', type=int, default=5, help='How many of the largest pages to measure.')
+    args = parser.parse_args(argv)
+    print(f'{"page":<40}{"html nodes":>11}{"before B":>10}{"after B":>9}{"link/img nodes":>16}{"before B":>10}{"after B":>9}'
+          f'{"text nodes":>12}{"before B":>10}{"after B":>9}')
+    for page in args.pages or largest_pages(args.content, args.count):
+        with open(page, 'r') as rf:
+            result = measure(rf.read())
+        print(f'{page[-40:]:<40}{result["html_nodes"]:>11}{result["html_bytes_per_node_before"]:>10.0f}{result["html_bytes_per_node_after"]:>9.0f}'
+              f'{result["url_nodes"]:>16}{result["url_bytes_per_node_before"]:>10.0f}{result["url_bytes_per_node_after"]:>9.0f}'
+              f'{result["text_nodes"]:>12}{result["text_bytes_per_node_before"]:>10.0f}{result["text_bytes_per_node_after"]:>9.0f}')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
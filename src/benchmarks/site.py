@@ -0,0 +1,29 @@
+from os import path
+from time import perf_counter
+import subprocess
+import sys
+
+MAIN = path.join(path.dirname(path.dirname(path.abspath(__file__))), 'main.py')
+
+def _build(site_dir: str, args: list[str]) -> float:
+    start = perf_counter()
+    subprocess.run([sys.executable, MAIN, *args], cwd=site_dir, check=True, stdout=subprocess.DEVNULL)
+    return perf_counter() - start
+
+def bench_site(site_dir: str, pages: list[str], jobs: int = 1) -> dict[str, float]:
+    '''
+    Times whole builds of a generated site, running main.py the way it is run by hand.
+    ### Args:
+        site_dir: The site directory written by CorpusGenerator.
+        pages: The markdown pages of the site.
+        jobs: The --jobs to build with.
+    ### Returns:
+        The seconds taken by a full build, a no-op incremental build, and an incremental
+        build after one page changed.
+    '''
+    results = {'full_build': _build(site_dir, ['--full', '--jobs', str(jobs)])}
+    results['noop_build'] = _build(site_dir, ['--jobs', str(jobs)])
+    with open(pages[len(pages) // 2], 'a') as wf:
+        wf.write('\nOne more paragraph.\n')
+    results['one_page_build'] = _build(site_dir, ['--jobs', str(jobs)])
+    return results
@@ -0,0 +1,76 @@
+from io import StringIO
+from tempfile import TemporaryDirectory
+from os import path
+from time import perf_counter
+from text_to_textnodes import markdown_to_blocks, block_to_block_type, text_to_textnodes, BlockType
+from markdown_to_html_node import block_to_htmlnodes, extract_title
+from htmlnode import ParentNode
+from template import Template
+from benchmarks.corpus import TEMPLATE
+
+STAGES = ('block_split', 'classify', 'inline_parse', 'tree_build', 'serialize', 'template', 'write')
+
+def _best_of(repeat: int, run) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        run()
+        best = min(best, perf_counter() - start)
+    return best
+
+def bench_stages(pages: list[str], repeat: int = 3) -> dict[str, dict[str, float]]:
+    '''
+    Times every stage of rendering a page, each stage fed with the output of the previous one,
+    so a change to one stage shows up in that stage's number only.
+    ### Args:
+        pages: The markdown of the pages to render.
+        repeat: Timing runs per stage, the fastest one is kept.
+    ### Returns:
+        The seconds for all pages, microseconds per page and MB/s of markdown of every stage, keyed by stage.
+    '''
+    markdown_bytes = sum(len(page.encode()) for page in pages)
+    blocks = [markdown_to_blocks(page) for page in pages]
+    block_types = [[block_to_block_type(block) for block in page_blocks] for page_blocks in blocks]
+    inline_blocks = [block for page_blocks, page_types in zip(blocks, block_types)
+                     for block, block_type in zip(page_blocks, page_types) if block_type is not BlockType.CODE]
+    trees = [ParentNode('div', [block_to_htmlnodes(block, block_type) for block, block_type in zip(page_blocks, page_types)])
+             for page_blocks, page_types in zip(blocks, block_types)]
+    html = [tree.to_html() for tree in trees]
+    titles = [extract_title(page) for page in pages]
+    template = Template(TEMPLATE)
+
+    def serialize():
+        for tree in trees:
+            tree.write_html(StringIO())
+
+    def render_template():
+        for title, page_html in zip(titles, html):
+            template.write(StringIO(), {'Title': title, 'Content': page_html}, '/')
+
+    with TemporaryDirectory() as tmp_dir:
+        out_path = path.join(tmp_dir, 'index.html')
+
+        def write():
+            for page_html in html:
+                with open(out_path, 'w') as wf:
+                    wf.write(page_html)
+
+        runs = {
+            'block_split': lambda: [markdown_to_blocks(page) for page in pages],
+            'classify': lambda: [block_to_block_type(block) for page_blocks in blocks for block in page_blocks],
+            'inline_parse': lambda: [text_to_textnodes(block) for block in inline_blocks],
+            'tree_build': lambda: [[block_to_htmlnodes(block, block_type) for block, block_type in zip(page_blocks, page_types)]
+                                   for page_blocks, page_types in zip(blocks, block_types)],
+            'serialize': serialize,
+            'template': render_template,
+            'write': write,
+        }
+        results = {}
+        for stage in STAGES:
+            seconds = _best_of(repeat, runs[stage])
+            results[stage] = {
+                'seconds': seconds,
+                'us_per_page': seconds / len(pages) * 1e6,
+                'mb_per_second': markdown_bytes / seconds / 1e6 if seconds else 0.0,
+            }
+    return results
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from threading import Lock
+
+# The default number of rendered blocks kept, a few MB for typical blocks.
+BLOCK_CACHE_SIZE = 4096
+
+class BlockCache():
+    '''BlockCache Class
+    A least-recently-used cache of rendered blocks, keyed by the block's type and text and
+    holding the block's serialized HTML, so a block that repeats across pages (a disclaimer,
+    a shared code snippet, a list of links) is parsed and rendered only once per process.
+    It is safe to share between threads.
+    ### Attributes:
+        maxsize: The number of blocks kept, 0 disables the cache.
+        hits: The number of lookups answered from the cache.
+        misses: The number of lookups that had to render the block.
+    '''
+    def __init__(self, maxsize: int = BLOCK_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        return f'BlockCache(Size: {len(self._entries)}/{self.maxsize}, Hits: {self.hits}, Misses: {self.misses})'
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple) -> str | None:
+        '''Returns the HTML cached for a (block type, block text) key and marks it as recently used, or None.'''
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return html
+
+    def put(self, key: tuple, html: str) -> None:
+        '''Caches a block's HTML, evicting the least recently used blocks beyond maxsize.'''
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def resize(self, maxsize: int) -> None:
+        '''Changes the size bound, evicting the least recently used blocks that no longer fit.'''
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > max(maxsize, 0):
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def take_stats(self) -> tuple[int, int]:
+        '''Returns the (hits, misses) counted so far and resets the counters, keeping the cached blocks.'''
+        with self._lock:
+            stats = (self.hits, self.misses)
+            self.hits = 0
+            self.misses = 0
+            return stats
+
+def hit_rate(hits: int, misses: int) -> float:
+    '''The share of lookups answered from the cache, 0.0 when there were none.'''
+    lookups = hits + misses
+    return hits / lookups if lookups else 0.0
+
+block_cache = BlockCache()
@@ -0,0 +1,146 @@
+from hashlib import sha256
+from os import path, replace, remove, cpu_count
+from concurrent.futures import ThreadPoolExecutor
+import struct
+import zlib
+import tracing
+
+GZIP_LEVEL = 9
+# The outputs a .gz is written next to
+COMPRESSIBLE_SUFFIXES = ('.html', '.css', '.js', '.json', '.svg', '.xml')
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_FLAG_COMMENT = 0x10
+# The unix OS byte of the gzip header, fixed so the output doesn't depend on the build machine
+_OS_UNIX = 3
+
+class CompressStats():
+    '''CompressStats Class
+    Counts what the compression stage wrote and what it skipped because the .gz was up to date.
+    ### Attributes:
+        compressed_files: The number of .gz files written.
+        input_bytes: The size of the outputs compressed.
+        output_bytes: The size of the .gz files written.
+        skipped_files: The number of outputs whose .gz was up to date.
+    '''
+    __slots__ = ('compressed_files', 'input_bytes', 'output_bytes', 'skipped_files')
+
+    def __init__(self) -> None:
+        self.compressed_files = 0
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.skipped_files = 0
+
+    def add(self, written: int | None, size: int) -> None:
+        '''Counts one output, written being the size of its new .gz or None when it was skipped.'''
+        if written is None:
+            self.skipped_files += 1
+            return
+        self.compressed_files += 1
+        self.input_bytes += size
+        self.output_bytes += written
+
+    def __repr__(self) -> str:
+        return (f'Compressed {self.compressed_files} files ({self.input_bytes} to {self.output_bytes} bytes), '
+                f'skipped {self.skipped_files} unchanged files')
+
+def is_compressible(file_path: str) -> bool:
+    return file_path.endswith(COMPRESSIBLE_SUFFIXES)
+
+def gzip_path(file_path: str) -> str:
+    return f'{file_path}.gz'
+
+def content_signature(data: bytes, level: int) -> bytes:
+    '''What a .gz was made from, stored in its header comment so an unchanged output is not compressed again.'''
+    return f'sha256={sha256(data).hexdigest()} level={level}'.encode()
+
+def gzip_bytes(data: bytes, level: int = GZIP_LEVEL, comment: bytes = b'') -> bytes:
+    '''
+    Compresses bytes into a gzip member with a zero mtime, so the same input always gives the same file.
+    ### Args:
+        data: The bytes to compress.
+        level: The zlib compression level, 1 (fastest) to 9 (smallest).
+        comment: The header comment (FCOMMENT), it must not contain a NUL byte.
+    ### Returns:
+        The gzip file's bytes.
+    '''
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    flags = _FLAG_COMMENT if comment else 0
+    extra_flags = 2 if level == 9 else 4 if level == 1 else 0
+    header = _GZIP_MAGIC + struct.pack('<BBIBB', zlib.DEFLATED, flags, 0, extra_flags, _OS_UNIX)
+    if comment:
+        header += comment + b'\0'
+    trailer = struct.pack('<II', zlib.crc32(data), len(data) & 0xffffffff)
+    return header + compressor.compress(data) + compressor.flush() + trailer
+
+def read_gzip_comment(gz_file_path: str) -> bytes | None:
+    '''Reads the header comment of a .gz written by gzip_bytes, None if the file is missing or has none.'''
+    try:
+        with open(gz_file_path, 'rb') as rf:
+            header = rf.read(512)
+    except FileNotFoundError:
+        return None
+    if header[:2] != _GZIP_MAGIC or len(header) < 10 or header[3] != _FLAG_COMMENT:
+        return None
+    end = header.find(b'\0', 10)
+    return header[10:end] if end != -1 else None
+
+def compress_data(data: bytes, file_path: str, level: int = GZIP_LEVEL) -> int | None:
+    '''
+    Writes the .gz of an output from its contents in memory, unless the existing .gz was made from the same contents.
+    ### Args:
+        data: The output's bytes.
+        file_path: The output's path, the .gz is written next to it.
+        level: The zlib compression level.
+    ### Returns:
+        The size of the .gz written, None if it was up to date.
+    '''
+    gz_file_path = gzip_path(file_path)
+    signature = content_signature(data, level)
+    if read_gzip_comment(gz_file_path) == signature:
+        return None
+    with tracing.span('gzip', path=file_path):
+        compressed = gzip_bytes(data, level, signature)
+    tmp_path = f'{gz_file_path}.tmp'
+    try:
+        with open(tmp_path, 'wb') as wf:
+            wf.write(compressed)
+        replace(tmp_path, gz_file_path)
+    except BaseException:
+        if path.exists(tmp_path):
+            remove(tmp_path)
+        raise
+    return len(compressed)
+
+def compress_file(file_path: str, level: int = GZIP_LEVEL) -> tuple[int | None, int]:
+    '''
+    Writes the .gz of an output file, see compress_data.
+    ### Returns:
+        A (written, size) tuple, written being the size of the .gz or None if it was up to date,
+        size the size of the output.
+    '''
+    with open(file_path, 'rb') as rf:
+        data = rf.read()
+    return compress_data(data, file_path, level), len(data)
+
+def compress_files(file_paths: list[str], level: int = GZIP_LEVEL, threads: int = 0) -> CompressStats:
+    '''
+    Writes the .gz of every output whose .gz is not up to date.
+    zlib releases the GIL while it compresses, so the files are compressed in parallel on a thread pool.
+    ### Args:
+        file_paths: The outputs to compress.
+        level: The zlib compression level.
+        threads: The number of compressing threads, 0 uses every core.
+    ### Returns:
+        The CompressStats of the run.
+    '''
+    threads = threads or cpu_count() or 1
+    if threads > 1 and len(file_paths) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(compress_file, file_paths, [level] * len(file_paths)))
+    else:
+        results = [compress_file(file_path, level) for file_path in file_paths]
+    stats = CompressStats()
+    for written, size in results:
+        stats.add(written, size)
+    return stats
@@ -0,0 +1,9 @@
+class PageGenerationError(Exception):
+    '''Raised when a page fails to render, carrying the path of the page that caused it.'''
+    def __init__(self, from_path: str, message: str) -> None:
+        super().__init__(from_path, message)
+        self.from_path = from_path
+        self.message = message
+
+    def __str__(self) -> str:
+        return f'{self.from_path}: {self.message}'
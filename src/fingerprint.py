@@ -0,0 +1,65 @@
+from hashlib import sha256
+from os import path, replace
+from manifest import BuildManifest, hash_file
+import json
+
+# The assets renamed after their contents. Pages, sources and files that must keep a well-known
+# name (favicon.ico, robots.txt, ...) are left alone.
+FINGERPRINT_SUFFIXES = ('.css', '.js', '.mjs', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.avif',
+                        '.woff', '.woff2', '.ttf', '.otf')
+# Hex digits of the content hash put into a fingerprinted name
+HASH_LENGTH = 10
+ASSET_MANIFEST_NAME = 'asset-manifest.json'
+
+def is_fingerprinted(file_path: str) -> bool:
+    return file_path.lower().endswith(FINGERPRINT_SUFFIXES)
+
+def fingerprinted_path(file_path: str, digest: str) -> str:
+    '''Inserts a content hash before a file's extension, e.g. images/tom.png -> images/tom.1a2b3c4d5e.png.'''
+    root, extension = path.splitext(file_path)
+    return f'{root}.{digest[:HASH_LENGTH]}{extension}'
+
+def url_path(file_path: str, dest_dir: str) -> str:
+    '''The root-relative URL an output file is served at.'''
+    return '/' + path.relpath(file_path, dest_dir).replace(path.sep, '/')
+
+def fingerprint_assets(pairs: list[tuple[str, str]], dest_dir: str,
+                       manifest: BuildManifest | None = None) -> tuple[list[tuple[str, str]], dict[str, str]]:
+    '''
+    Renames the destinations of the fingerprinted assets after the hash of their contents, so an
+    unchanged asset keeps its name across builds and a changed one gets a new name.
+    ### Args:
+        pairs: The (source path, destination path) tuples of the copy stage.
+        dest_dir: The output directory.
+        manifest: The build manifest the digests are kept in across builds, so only the assets whose
+            size or mtime changed are read again. None hashes every asset.
+    ### Returns:
+        The pairs with the fingerprinted destinations, and the fingerprinted URL of every
+        fingerprinted asset keyed by its original URL.
+    '''
+    fingerprinted_pairs = []
+    asset_urls = {}
+    for src_path, dst_path in pairs:
+        if is_fingerprinted(src_path):
+            digest = manifest.file_digest(src_path) if manifest is not None else hash_file(src_path)
+            fingerprinted_dst_path = fingerprinted_path(dst_path, digest)
+            asset_urls[url_path(dst_path, dest_dir)] = url_path(fingerprinted_dst_path, dest_dir)
+            dst_path = fingerprinted_dst_path
+        fingerprinted_pairs.append((src_path, dst_path))
+    return fingerprinted_pairs, asset_urls
+
+def asset_urls_digest(asset_urls: dict[str, str]) -> str:
+    '''A hash of the asset URLs, which changes whenever any fingerprinted asset does.'''
+    return sha256(json.dumps(asset_urls, sort_keys=True).encode()).hexdigest()
+
+def write_asset_manifest(dest_dir: str, asset_urls: dict[str, str]) -> str:
+    '''
+    Writes the asset manifest, mapping every original asset URL to its fingerprinted URL, for servers and tooling.
+    ### Returns:
+        The path of the manifest.
+    '''
+    manifest_path = path.join(dest_dir, ASSET_MANIFEST_NAME)
+    with open(f'{manifest_path}.tmp', 'w') as wf:
+        json.dump(dict(sorted(asset_urls.items())), wf, indent=1)
+    replace(f'{manifest_path}.tmp', manifest_path)
+    return manifest_path
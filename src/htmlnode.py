@@ -1,12 +1,112 @@
 from textnode import TextNode, TextType
+from io import StringIO
+from sys import intern
+from collections.abc import Mapping
+from urls import root_url
+from image_size import image_attributes
+
+_TEXT_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+_ATTRIBUTE_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})
+
+def escape_text(text: str) -> str:
+    '''
+    Escapes the characters that would be read as markup in HTML text (&, < and >).
+    Most text has none of them, so it is only searched for them and returned as it is.
+    ### Args:
+        text: The text to escape.
+    ### Returns:
+        The escaped text.
+    '''
+    if '&' in text or '<' in text or '>' in text:
+        return text.translate(_TEXT_ESCAPES)
+    return text
+
+def escape_attribute(value: str) -> str:
+    '''Escapes an attribute value for a double-quoted attribute, see escape_text, " is escaped as well.'''
+    if '&' in value or '<' in value or '>' in value or '"' in value:
+        return value.translate(_ATTRIBUTE_ESCAPES)
+    return value
+
+class FrozenProps(Mapping):
+    '''FrozenProps Class
+    The read-only attributes of a node, stored as a tuple of names and a tuple of values.
+    The names tuple is shared by every node with the same attribute names (every link has ('href',)),
+    so a node only pays for its values instead of a dict of its own.
+    ### Attributes:
+        names: The attribute names, in order, shared between nodes.
+        values: The attribute values, in the order of names.
+    '''
+    __slots__ = ('names', 'values')
+
+    def __init__(self, names: tuple, values: tuple) -> None:
+        self.names = names
+        self.values = values
+
+    def __repr__(self) -> str:
+        return f'FrozenProps({dict(zip(self.names, self.values))})'
+
+    def __getitem__(self, name: str):
+        try:
+            return self.values[self.names.index(name)]
+        except ValueError:
+            raise KeyError(name) from None
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def items(self):
+        return zip(self.names, self.values)
+
+# Nodes share the names of their props, and whole props when they hold no URL: those repeat across
+# nodes and pages, while the href or src of a link or image is almost always unique and interning it
+# would only grow the cache.
+_PROPS_CACHE_SIZE = 1 << 16
+_URL_PROPS = frozenset({'href', 'src'})
+_props_cache = {}
+_names_cache = {}
+
+def freeze_props(props: dict | None) -> FrozenProps | None:
+    '''
+    Returns a read-only copy of the props, sharing its names with every node with the same attribute
+    names, and shared whole by every node with equal props unless they hold a URL.
+    ### Args:
+        props: The attributes of a node, or None.
+    ### Returns:
+        The FrozenProps of the attributes, or None.
+    '''
+    if props is None or type(props) is FrozenProps:
+        return props
+    names, values = tuple(props), tuple(props.values())
+    shared_names = _names_cache.get(names)
+    if shared_names is None:
+        if len(_names_cache) >= _PROPS_CACHE_SIZE:
+            _names_cache.clear()
+        shared_names = _names_cache[names] = names
+    if not _URL_PROPS.isdisjoint(names):
+        return FrozenProps(shared_names, values)
+    key = (names, values)
+    try:
+        frozen = _props_cache.get(key)
+    except TypeError:
+        return FrozenProps(shared_names, values)
+    if frozen is None:
+        if len(_props_cache) >= _PROPS_CACHE_SIZE:
+            _props_cache.clear()
+        frozen = _props_cache[key] = FrozenProps(shared_names, values)
+    return frozen
 
 class HTMLNode():
+    __slots__ = ('tag', 'value', 'props', 'children')
+
     def __init__(self, tag:str | None = None, value:str | None = None,
                  props:dict | None = None, children:list | None = None ) -> None:
-        self.tag = tag
+        self.tag = intern(tag) if type(tag) is str else tag
         self.value = value
         self.children = children
-        self.props = props
+        self.props = freeze_props(props)
 
     def __repr__(self) -> str:
         if self.tag is None and self.value is None and self.props is None and self.children is None:
@@ -24,21 +124,28 @@ class HTMLNode():
 
     def to_html(self) -> str:
         raise NotImplementedError("Override with a child class!")
+
+    def write_html(self, sink) -> None:
+        '''
+        Serializes the node straight into a file-like object instead of building a string.
+        ### Args:
+            sink: Any object with a write(str) method, e.g. an open file or io.StringIO.
+        '''
+        raise NotImplementedError("Override with a child class!")
     
     def props_to_html(self) -> str:
         if self.props == None:
             return  ""
         attributes = []
         for key, value in self.props.items():
-            attributes.append(f'{key}="{value}"')
+            attributes.append(f'{key}="{escape_attribute(value) if type(value) is str else value}"')
         return str(" " + " ".join(attributes))
         
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str| None = None , value :str | int | float = "", props: dict | None = None) -> None:
-        super().__init__(tag, props)
-        
-        self.props = props
-        self.tag = tag
+        super().__init__(tag, None, props)
         
         if value == None:
             raise ValueError("All LeafNodes MUST have a value!")
@@ -65,15 +172,34 @@ class LeafNode(HTMLNode):
         else:
             self.value = self.value.lstrip('\n')
         if not self.tag:
-            return self.value
-        return f'<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>'
+            return escape_text(self.value)
+        return f'<{self.tag}{self.props_to_html()}>{escape_text(self.value)}</{self.tag}>'
+
+    def write_html(self, sink) -> None:
+        sink.write(self.to_html())
+
+class RawHTMLNode(HTMLNode):
+    '''HTML that was serialized before (e.g. a block from the block cache), written out as it is.'''
+    __slots__ = ()
+
+    def __init__(self, html: str) -> None:
+        super().__init__(None, html)
+
+    def __repr__(self) -> str:
+        return f'RawHTMLNode(Value: {self.value})'
+
+    def to_html(self) -> str:
+        return self.value
+
+    def write_html(self, sink) -> None:
+        sink.write(self.value)
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, children: list, props:dict | None = None) -> None:
         
-        super().__init__(tag, props, children)
-        
-        self.props = props
+        super().__init__(tag, None, props, children)
         
         if not tag or not isinstance(tag, str):
             raise ValueError('All Parent Nodes MUST have at least one tag in them!\nValid Types: String.')
@@ -86,50 +212,41 @@ class ParentNode(HTMLNode):
         
         if children == []:
             raise ValueError('All Children Nodes MUST have at least one (1) Child Node')
-        
-        self.tag = tag
-        self.children = children
 
     def to_html(self) -> str:
-        
-        output = f'<{self.tag}{self.props_to_html()}>'
-        
+        sink = StringIO()
+        self.write_html(sink)
+        return sink.getvalue()
+
+    def write_html(self, sink) -> None:
+        sink.write(f'<{self.tag}{self.props_to_html()}>')
         for child in self.children:
-            output += child.to_html()
-        
-        output += f'</{self.tag}>'
-        
-        return output
-        
-def text_node_to_html_node(text_node : TextNode, list: bool | None = None) -> LeafNode:
+            child.write_html(sink)
+        sink.write(f'</{self.tag}>')
+        
+# Indexed by TextType, so converting a node is one dict lookup instead of a chain of match cases.
+_TEXT_NODE_BUILDERS = {
+    TextType.TEXT: lambda text_node, basepath: LeafNode(None, text_node.text),
+    TextType.BOLD: lambda text_node, basepath: LeafNode('b', text_node.text),
+    TextType.ITALIC: lambda text_node, basepath: LeafNode('i', text_node.text),
+    TextType.CODE: lambda text_node, basepath: LeafNode('code', text_node.text),
+    TextType.LINK: lambda text_node, basepath: LeafNode('a', text_node.text, {'href' : root_url(text_node.url, basepath)}),
+    TextType.IMAGE: lambda text_node, basepath: LeafNode('img', '', {'src' : root_url(text_node.url, basepath), 'alt' : text_node.text,
+                                                                     **image_attributes(text_node.url)}),
+}
+
+def text_node_to_html_node(text_node : TextNode, list: bool | None = None, basepath: str = '/') -> LeafNode:
     """
     This function takes a Text Node and turns it into an HTML LeafNode.
     ### Args: 
         text_node: An object of type TextNode.
+        basepath: The root path the site is served from, root-relative link and image URLs are pointed at it.
     ### Returns: 
         A LeafNode type object based on the input TextNode.
     ### Raises:
         A ValueError if the input Textnode's TextType is not found in the TextType Enum
     """
-    if text_node.text_type not in TextType:
+    builder = _TEXT_NODE_BUILDERS.get(text_node.text_type)
+    if builder is None:
         raise ValueError('Text Type MUST be a valid HTML Format/Type!\nAvailable Text Types: TEXT,\nBOLD,\nITALIC,\nIMAGE,\nLINK,\nCODE')
-        
-    match (text_node.text_type):
-        
-        case (TextType.TEXT):
-            return LeafNode(None , value = text_node.text)
-        
-        case(TextType.BOLD):
-            return LeafNode('b', text_node.text)
-        
-        case(TextType.ITALIC):
-            return LeafNode('i', text_node.text)
-        
-        case(TextType.CODE):
-            return LeafNode('code', text_node.text)
-        
-        case(TextType.LINK):
-            return LeafNode('a', text_node.text, {'href' : text_node.url} )
-        
-        case(TextType.IMAGE):
-            return LeafNode('img', '', {'src' : text_node.url, 'alt' : text_node.text})    
\ No newline at end of file
+    return builder(text_node, basepath)
@@ -0,0 +1,133 @@
+from os import path, stat
+from urllib.parse import unquote
+from textnode import TextType
+import struct
+
+# The directory root-relative image URLs are resolved in, None stops sizing images.
+STATIC_DIR = 'static'
+# PNG and GIF keep their size in the first few bytes, JPEGs are walked segment by segment.
+HEADER_BYTES = 32
+
+# JPEG start-of-frame markers, the frame header holds the image's size
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers without a length field
+_JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+
+_size_cache = {}
+
+def _jpeg_size(rf) -> tuple[int, int] | None:
+    # Walks the segments from marker to marker, the file's buffer makes the small reads cheap
+    position = 2
+    while True:
+        rf.seek(position)
+        segment = rf.read(9)
+        if len(segment) < 4 or segment[0] != 0xFF:
+            return None
+        marker = segment[1]
+        if marker == 0xFF:
+            position += 1
+        elif marker in _JPEG_STANDALONE_MARKERS:
+            position += 2
+        elif marker in _JPEG_SOF_MARKERS:
+            if len(segment) < 9:
+                return None
+            height, width = struct.unpack('>HH', segment[5:9])
+            return width, height
+        elif marker in (0xD9, 0xDA):
+            # End of image or start of the compressed data, there was no frame header
+            return None
+        else:
+            position += 2 + struct.unpack('>H', segment[2:4])[0]
+
+def read_image_size(file_path: str) -> tuple[int, int] | None:
+    '''
+    Reads the dimensions of a PNG, GIF or JPEG image from its header, without decoding it.
+    ### Args:
+        file_path: The path of the image.
+    ### Returns:
+        The image's (width, height), None if it is not a PNG, GIF or JPEG or its header is broken.
+    '''
+    with open(file_path, 'rb') as rf:
+        header = rf.read(HEADER_BYTES)
+        if header.startswith(b'\x89PNG\r\n\x1a\n') and header[12:16] == b'IHDR':
+            return struct.unpack('>II', header[16:24])
+        if header[:6] in (b'GIF87a', b'GIF89a') and len(header) >= 10:
+            return struct.unpack('<HH', header[6:10])
+        if header.startswith(b'\xff\xd8'):
+            return _jpeg_size(rf)
+    return None
+
+def image_size(file_path: str) -> tuple[int, int] | None:
+    '''
+    Returns the dimensions of an image, read once per file and read again only once the file's mtime or size changes.
+    ### Args:
+        file_path: The path of the image.
+    ### Returns:
+        The image's (width, height), None if the file is missing or not a PNG, GIF or JPEG.
+    '''
+    try:
+        file_stat = stat(file_path)
+    except OSError:
+        return None
+    signature = (file_stat.st_mtime_ns, file_stat.st_size)
+    cached = _size_cache.get(file_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    try:
+        size = read_image_size(file_path)
+    except (OSError, struct.error):
+        size = None
+    _size_cache[file_path] = (signature, size)
+    return size
+
+def image_path(url: str | None) -> str | None:
+    '''
+    The file an image referenced by a root-relative URL is sized from, resolved under STATIC_DIR.
+    ### Args:
+        url: The image's URL as written in the markdown, before the basepath is applied.
+    ### Returns:
+        The normalized path of the file, which may not exist, None if the URL is not root-relative or images are not sized.
+    '''
+    if STATIC_DIR is None or not url or url[0] != '/' or url.startswith('//'):
+        return None
+    file_path = path.normpath(path.join(STATIC_DIR, unquote(url.split('?', 1)[0].split('#', 1)[0]).lstrip('/')))
+    if not file_path.startswith(path.normpath(STATIC_DIR) + path.sep):
+        return None
+    return file_path
+
+def image_attributes(url: str | None) -> dict[str, str]:
+    '''
+    The width and height attributes of an image referenced by a root-relative URL, see image_path.
+    ### Args:
+        url: The image's URL as written in the markdown, before the basepath is applied.
+    ### Returns:
+        {'width': ..., 'height': ...}, or an empty dict if the URL is not root-relative or its size is unknown.
+    '''
+    file_path = image_path(url)
+    if file_path is None:
+        return {}
+    size = image_size(file_path)
+    if size is None:
+        return {}
+    return {'width': str(size[0]), 'height': str(size[1])}
+
+def page_images(from_path: str, page) -> list[str]:
+    '''
+    Collects the files a page's images are sized from, for the manifest to re-render the page once one of them changes.
+    ### Args:
+        from_path: The page's markdown source.
+        page: The parsed page (a ParsedPage or a MappedPage).
+    ### Returns:
+        The sorted distinct image_path of every IMAGE TextNode of the page, none when images are not sized.
+    '''
+    if STATIC_DIR is None:
+        return []
+    image_paths = set()
+    for _, _, parts in page.blocks:
+        for part in parts:
+            for node in part:
+                if node.text_type is TextType.IMAGE:
+                    file_path = image_path(node.url)
+                    if file_path is not None:
+                        image_paths.add(file_path)
+    return sorted(image_paths)
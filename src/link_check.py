@@ -0,0 +1,126 @@
+from os import path
+from collections.abc import Iterable
+from urllib.parse import urlsplit, unquote
+from markdown_to_html_node import ParsedPage, TextType
+from page_index import PageIndex
+from fingerprint import url_path
+import posixpath
+
+# The links of every page, kept across builds so only re-rendered pages are collected again.
+LINK_STATE_PATH = path.join('.cache', 'link-index.json')
+
+def page_links(from_path: str, page: ParsedPage) -> tuple[str, list[tuple[str, str]]]:
+    '''
+    Collects the links and images of a page from the LINK and IMAGE TextNodes split_nodes_link and split_nodes_image produced.
+    ### Args:
+        from_path: The page's markdown source.
+        page: The parsed page.
+    ### Returns:
+        The source path and the distinct (url, 'link' or 'image') references of the page, in order of appearance.
+    '''
+    references = {}
+    for _, _, parts in page.blocks:
+        for part in parts:
+            for node in part:
+                if node.text_type is TextType.LINK:
+                    references.setdefault((node.url, 'link'), None)
+                elif node.text_type is TextType.IMAGE:
+                    references.setdefault((node.url, 'image'), None)
+    return from_path, list(references)
+
+def resolve_link(url: str | None, base_url: str) -> str | None:
+    '''
+    Resolves an internal link to the root-relative path it points at, as written in the markdown (before the basepath).
+    ### Args:
+        url: The link's URL.
+        base_url: The URL of the page holding the link, relative links are resolved against it.
+    ### Returns:
+        The normalized path, None for external links (with a scheme or a host) and fragment-only links.
+    '''
+    if not url:
+        return None
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    link_path = unquote(parts.path)
+    if not link_path.startswith('/'):
+        base_dir = base_url if base_url.endswith('/') else posixpath.dirname(base_url) + '/'
+        link_path = base_dir + link_path
+    normalized = posixpath.normpath(link_path)
+    if normalized.startswith('//'):
+        normalized = normalized[1:]
+    return normalized + '/' if link_path.endswith('/') and normalized != '/' else normalized
+
+def output_urls(output_paths: Iterable[str], dest_dir: str, asset_urls: dict[str, str] | None = None) -> set[str]:
+    '''
+    The root-relative paths a link may point at: every output file, and the directory of every index.html
+    with and without its trailing slash.
+    ### Args:
+        output_paths: The paths of the outputs of the build.
+        dest_dir: The output directory.
+        asset_urls: The fingerprinted asset URLs keyed by their original URL, the original URLs are valid targets.
+    ### Returns:
+        The set of target paths.
+    '''
+    targets = set(asset_urls or ())
+    for output_path in output_paths:
+        url = url_path(output_path, dest_dir)
+        targets.add(url)
+        if url.endswith('/index.html'):
+            directory = url[:-len('index.html')]
+            targets.add(directory)
+            targets.add(directory.rstrip('/') or '/')
+    return targets
+
+class LinkIndex(PageIndex):
+    '''LinkIndex Class
+    The links and images of every page, collected from the TextNodes of the pages as they are
+    rendered (or only parsed, for --check-links-only), see PageIndex. broken() resolves all of them
+    against the outputs of the build in a single pass.
+    '''
+    collect = staticmethod(page_links)
+    STATE_PATH = LINK_STATE_PATH
+
+    def broken(self, targets: set[str]) -> list[tuple[str, str, str]]:
+        '''
+        Finds the references that point at no output.
+        ### Args:
+            targets: The paths links may point at, see output_urls.
+        ### Returns:
+            The (source path, url, kind) of every broken reference, sorted by source.
+        '''
+        broken = []
+        for base_url, (from_path, references) in self.pages.items():
+            for url, kind in references:
+                resolved = resolve_link(url, base_url)
+                if resolved is not None and resolved not in targets:
+                    broken.append((from_path, url, kind))
+        return sorted(broken)
+
+def find_lines(from_path: str, urls: Iterable[str]) -> dict[str, int]:
+    '''Finds the line every URL is first referenced on in a markdown source, read only for the sources holding broken references.'''
+    remaining = set(urls)
+    lines = {}
+    with open(from_path, 'r') as rf:
+        for line_number, line in enumerate(rf, 1):
+            for url in [url for url in remaining if f']({url}' in line]:
+                lines[url] = line_number
+                remaining.discard(url)
+            if not remaining:
+                break
+    return lines
+
+def report_broken_links(broken: list[tuple[str, str, str]], log = print) -> None:
+    '''Logs every broken reference as source:line: broken kind url.'''
+    by_source = {}
+    for from_path, url, kind in broken:
+        by_source.setdefault(from_path, []).append((url, kind))
+    for from_path, references in by_source.items():
+        try:
+            lines = find_lines(from_path, (url for url, _ in references))
+        except OSError:
+            lines = {}
+        for url, kind in references:
+            line = lines.get(url)
+            location = f'{from_path}:{line}' if line is not None else from_path
+            log(f'{location}: broken {kind} {url}')
@@ -1,66 +1,551 @@
-from os import path, listdir, mkdir, makedirs
-from shutil import copy, rmtree
+from os import path, listdir, makedirs, cpu_count, remove, replace
+from shutil import rmtree
+from concurrent.futures import ProcessPoolExecutor
 from markdown_to_html_node import *
+from manifest import BuildManifest, PageImages
+from errors import PageGenerationError
+from assets import CopyStats, copy_files, COPY_THREADS
+from template import load_template
+from htmlnode import escape_text
+from block_cache import BLOCK_CACHE_SIZE, block_cache, hit_rate
+from parse_cache import PARSE_CACHE_DIR, PARSE_CACHE_SIZE, parse_cache
+from compress import GZIP_LEVEL, compress_data, compress_file, compress_files, is_compressible, gzip_path
+from io import StringIO
+from fingerprint import fingerprint_assets, asset_urls_digest, write_asset_manifest
+from urls import set_asset_urls, get_asset_urls
+from search_index import SearchIndex
+from link_check import LinkIndex, output_urls, report_broken_links
+from page_index import PageIndex
+from sitemap import write_sitemap, write_feed, sitemap_paths, feed_path, FEED_DIR, MAX_SITEMAP_URLS
+from urls import page_url
+from mapped_source import MMAP_SIZE, map_page, use_mmap
+from contextlib import ExitStack
+import mapped_source
+import image_size
+import tracing
+import argparse
 import sys
 
+# Sources at least this big are streamed block by block instead of being read into memory whole.
+STREAMING_THRESHOLD = 8 * 1024 * 1024
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Generates the site from content/ and static/ into docs/.')
+    parser.add_argument('basepath', nargs='?', default='/',
+                        help='The root path the site is served from (default: /).')
+    parser.add_argument('--full', action='store_true',
+                        help='Delete the output directory and rebuild every page instead of building incrementally.')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Render pages in N worker processes (0 uses every core, default: 1).')
+    parser.add_argument('--copy-threads', type=int, default=COPY_THREADS, metavar='N',
+                        help=f'Copy static files on N threads (default: {COPY_THREADS}).')
+    parser.add_argument('--hash-assets', action='store_true',
+                        help='Decide whether a static file changed by its hash instead of its size and mtime.')
+    parser.add_argument('--watch', action='store_true',
+                        help='After building, keep polling the sources and rebuild only what changed.')
+    parser.add_argument('--poll-interval', type=float, default=0.05, metavar='SECONDS',
+                        help='Seconds between two polls in --watch mode (default: 0.05).')
+    parser.add_argument('--block-cache', type=int, default=BLOCK_CACHE_SIZE, metavar='N',
+                        help=f'Keep the HTML of the N most recently rendered blocks for reuse across pages, 0 disables it (default: {BLOCK_CACHE_SIZE}).')
+    parser.add_argument('--parse-cache-size', type=int, default=PARSE_CACHE_SIZE // (1024 * 1024), metavar='MB',
+                        help=f'Keep up to MB megabytes of parsed pages in {PARSE_CACHE_DIR} across builds, 0 disables it '
+                             f'(default: {PARSE_CACHE_SIZE // (1024 * 1024)}).')
+    parser.add_argument('--async', dest='async_build', action='store_true',
+                        help='Build with the asyncio pipeline, overlapping file reads, renders and writes (for slow, e.g. network, file systems).')
+    parser.add_argument('--io-threads', type=int, default=16, metavar='N',
+                        help='Run the file system calls of --async on N threads (default: 16).')
+    parser.add_argument('--max-open-files', type=int, default=64, metavar='N',
+                        help='Keep at most N files open at once with --async (default: 64).')
+    parser.add_argument('--gzip', action='store_true',
+                        help='Write a precompressed .gz next to every HTML, CSS, JS, JSON, SVG and XML output.')
+    parser.add_argument('--gzip-level', type=int, default=GZIP_LEVEL, choices=range(1, 10), metavar='1-9',
+                        help=f'The compression level of --gzip (default: {GZIP_LEVEL}).')
+    parser.add_argument('--gzip-in-memory', action='store_true',
+                        help='Compress rendered pages from memory as they are written instead of re-reading them (implies --gzip).')
+    parser.add_argument('--gzip-threads', type=int, default=0, metavar='N',
+                        help='Compress on N threads (0 uses every core, default: 0).')
+    parser.add_argument('--mmap', action='store_true',
+                        help='Memory-map big sources and keep their blocks as offsets into the map, decoding a block only as it is written.')
+    parser.add_argument('--mmap-threshold', type=int, default=MMAP_SIZE // 1024, metavar='KB',
+                        help=f'The size from which --mmap maps a source (default: {MMAP_SIZE // 1024}).')
+    parser.add_argument('--no-image-sizes', action='store_true',
+                        help="Don't read the width and height of images under static/ into their <img> tags.")
+    parser.add_argument('--fingerprint', action='store_true',
+                        help='Name static assets (CSS, JS, images, fonts) after their content hash and point every reference at the new name.')
+    parser.add_argument('--search-index', action='store_true',
+                        help='Build a client-side search index of the pages into docs/search, with a search.js loader.')
+    parser.add_argument('--site-url', metavar='URL',
+                        help='The absolute URL the site is published at (e.g. https://example.com), needed by --sitemap and --feed.')
+    parser.add_argument('--sitemap', action='store_true',
+                        help=f'Write docs/sitemap.xml, split into parts listed by a sitemap index beyond {MAX_SITEMAP_URLS} pages.')
+    parser.add_argument('--feed', action='store_true',
+                        help=f'Write an Atom feed of the pages under content/{FEED_DIR} to docs/feed.xml.')
+    parser.add_argument('--check-links', action='store_true',
+                        help='After building, report every internal link and image that points at no output, and exit with status 1 if any.')
+    parser.add_argument('--check-links-only', action='store_true',
+                        help='Check the links as --check-links does, parsing the pages without writing anything.')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Record the time spent in every stage of every page into FILE, in the Chrome trace-event format.')
+    args = parser.parse_args(argv)
+    if (args.sitemap or args.feed) and not args.site_url:
+        parser.error('--sitemap and --feed need the --site-url the site is published at')
+    if args.fingerprint and args.watch:
+        parser.error("--fingerprint can't be combined with --watch, which updates assets under their original names")
+    return args
+
 def main():
-    basepath ='/'
+    args = parse_args(sys.argv[1:])
+    basepath = args.basepath
     dest_dir = 'docs'
+    template_path = 'template.html'
     
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
-        if not basepath.startswith('/'):
-            basepath =  '/'+ basepath
-        if not basepath.endswith('/'):
-            basepath = basepath+'/'
+    if not basepath.startswith('/'):
+        basepath =  '/'+ basepath
+    if not basepath.endswith('/'):
+        basepath = basepath+'/'
     
-    if path.exists(dest_dir):
+    if args.trace:
+        tracing.enable()
+    _configure_worker(args.block_cache, PARSE_CACHE_DIR, args.parse_cache_size * 1024 * 1024,
+                      None if args.no_image_sizes else 'static', None,
+                      args.mmap_threshold * 1024 if args.mmap else None)
+    if args.check_links_only:
+        sys.exit(1 if check_links_only(['static', 'content'], dest_dir, args.jobs, args.sitemap, args.feed, args.search_index) else 0)
+    manifest = BuildManifest.load(dest_dir, full=args.full)
+    if manifest.full and path.exists(dest_dir):
         rmtree(dest_dir)
-    makedirs(dest_dir)
+    makedirs(dest_dir, exist_ok=True)
+    manifest.set_inputs(template_path, basepath)
+    try:
+        load_template(template_path)
+    except ValueError as err:
+        sys.exit(f'Error: {template_path}: {err}')
+    gzip_level = args.gzip_level if args.gzip or args.gzip_in_memory else None
+    # The level pages are compressed with as they are written, None leaves them to the compression pass
+    write_gzip_level = gzip_level if args.gzip_in_memory else None
+    search_index = SearchIndex.load(dest_dir) if args.search_index else None
+    link_index = LinkIndex.load(dest_dir) if args.check_links else None
+    # The images of the rendered pages go into the manifest, so a page is re-rendered with the new size of its images
+    images = PageImages(manifest) if image_size.STATIC_DIR is not None else None
+    indexes = tuple(index for index in (search_index, link_index, images) if index is not None)
+    
+    try:
+        if args.async_build:
+            import asyncio
+            from async_build import build_site
+            with tracing.span('build_site'):
+                result = asyncio.run(build_site(['static', 'content'], template_path, dest_dir, basepath, manifest,
+                                                args.io_threads, args.max_open_files, args.hash_assets,
+                                                gzip_level=write_gzip_level, fingerprint=args.fingerprint,
+                                                indexes=indexes))
+            print(result.copy_stats)
+            for dst_path, title in result.titles.items():
+                manifest.record_title(dst_path, title)
+            cache_stats = result.cache_stats
+            pages = result.rendered + result.skipped
+            outputs = [dst for _, dst in result.copy_pairs + pages]
+            compressed = {dst for _, dst in result.rendered} if write_gzip_level is not None else set()
+        else:
+            assets = []
+            with tracing.span('collect_pages'):
+                pages = collect_pages('static', dest_dir, assets) + collect_pages('content', dest_dir, assets)
+            if args.fingerprint:
+                with tracing.span('fingerprint_assets'):
+                    # --hash-assets reads every asset, the manifest's digests are trusted only by size and mtime
+                    assets, asset_urls = fingerprint_assets(assets, dest_dir, None if args.hash_assets else manifest)
+                use_asset_urls(asset_urls, dest_dir, manifest)
+            for _, end_path in assets:
+                manifest.record_asset(end_path)
+            with tracing.span('copy_assets', files=len(assets)):
+                print(copy_files(assets, args.copy_threads, args.hash_assets))
+            outputs = [dst for _, dst in assets + pages]
+            with tracing.span('select_pages', pages=len(pages)):
+                selected = select_pages(pages, manifest)
+            titles = {}
+            with tracing.span('render_pages', pages=len(selected), jobs=args.jobs):
+                cache_stats = render_pages(selected, template_path, basepath, args.jobs, write_gzip_level, indexes, titles)
+            for dst_path, title in titles.items():
+                manifest.record_title(dst_path, title)
+            compressed = {dst for _, dst in selected} if write_gzip_level is not None else set()
+    except PageGenerationError as err:
+        sys.exit(f'Error: {err}')
+    
+    if search_index is not None:
+        with tracing.span('search_index', pages=len(pages)):
+            search_index.add_missing(pages)
+            search_index.retain(dst for _, dst in pages)
+            search_outputs = search_index.write(basepath)
+            search_index.save()
+        for output in search_outputs:
+            manifest.record_asset(output)
+        outputs += search_outputs
+        print(f'Indexed {len(search_index.pages)} pages for search')
+    
+    if args.sitemap or args.feed:
+        with tracing.span('sitemap_and_feed', pages=len(pages)):
+            site_outputs = write_site_maps(dest_dir, args.site_url, basepath, pages, manifest, args.sitemap, args.feed)
+        for output in site_outputs:
+            manifest.record_asset(output)
+        outputs += site_outputs
+    
+    broken = []
+    if link_index is not None:
+        with tracing.span('check_links', pages=len(pages)):
+            link_index.add_missing(pages, args.jobs)
+            link_index.retain(dst for _, dst in pages)
+            link_index.save()
+            broken = link_index.broken(output_urls(outputs, dest_dir, get_asset_urls()))
     
-    generate_pages_recursive('static','template.html' , dest_dir, basepath)
-    generate_pages_recursive('content', 'template.html', dest_dir, basepath)
+    if gzip_level is not None:
+        outputs = [output for output in outputs if is_compressible(output)]
+        for output in outputs:
+            manifest.record_asset(gzip_path(output))
+        with tracing.span('compress', files=len(outputs)):
+            print(compress_files([output for output in outputs if output not in compressed], gzip_level, args.gzip_threads))
     
+    removed = manifest.remove_orphans()
+    manifest.save()
+    if parse_cache.max_bytes > 0:
+        with tracing.span('prune_parse_cache'):
+            parse_cache.prune()
+    if args.trace:
+        tracing.write_trace(args.trace)
+        print(f'Wrote the build trace to {args.trace}')
+    counts = manifest.summary()
+    print(f'Rebuilt {counts["rebuilt"]} pages, skipped {counts["skipped"]} unchanged pages, removed {len(removed)} orphaned outputs')
+    if block_cache.maxsize > 0:
+        hits, misses = cache_stats['block']
+        print(f'Block cache: {hits} hits, {misses} misses ({hit_rate(hits, misses):.1%} hit rate)')
+    if parse_cache.max_bytes > 0:
+        hits, misses = cache_stats['parse']
+        print(f'Parse cache: {hits} pages reused, {misses} pages parsed')
+    if link_index is not None:
+        report_broken_links(broken)
+        print(f'Checked the links of {len(link_index.pages)} pages, found {len(broken)} broken')
+        if broken and not args.watch:
+            sys.exit(1)
     
-def generate_page(from_path: str, template_path: str, dst_path: str, basepath: str) -> None:
-    print(f'Generating page from {from_path} to {dst_path} using {template_path}')
-    with open(from_path, 'r') as rf, open(template_path, 'r') as tmp_f, open(dst_path,'w') as wf:
-        md = rf.read()
-        html_str = markdown_to_html_node(md).to_html()
-        title = extract_title(md)
-        
-        tmp_contents = tmp_f.read().replace(
-            r'{{ Title }}', title).replace(
-                r'{{ Content }}',html_str).replace(
-                    'href="/', f'href="{basepath}').replace(
-                        'src="/', f'src="{basepath}')
-        
-        wf.write(str(tmp_contents))
-
-def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir_path: str, basepath: str) -> None:
-    dir_to_files(dir_path_content, dest_dir_path)
-    content_items_lst = listdir(dir_path_content)
-    print(f'parsing: {dir_path_content} to: {dest_dir_path} using: {template_path}')
-    for item in content_items_lst:
+    if args.watch:
+        from watch import watch_site
+        watch_site(['static', 'content'], template_path, dest_dir, basepath, args.jobs, args.poll_interval, search_index,
+                   gzip_level)
+    
+    
+def generate_page(from_path: str, template_path: str, dst_path: str, basepath: str, log = print,
+                  gzip_level: int | None = None, collectors: tuple = (), records: list[dict] | None = None) -> str:
+    '''
+    Renders a markdown page into the template.
+    ### Args:
+        collectors: The PageIndex.collect functions to run on the parsed page.
+        records: A dict per collector the page's record is put into, keyed by dst_path.
+    ### Returns:
+        The page's title.
+    '''
+    log(f'Generating page from {from_path} to {dst_path} using {template_path}')
+    # The page is written next to its destination and moved into place once it rendered,
+    # so a page that fails to render never leaves a truncated output behind.
+    tmp_path = f'{dst_path}.tmp'
+    try:
+        template = load_template(template_path)
+        with tracing.span('page', path=from_path), open(from_path, 'r') as rf, ExitStack() as stack:
+            size = path.getsize(from_path)
+            mapped = use_mmap(size)
+            if mapped:
+                # The page's blocks are offsets into the mapped file, each one is decoded as it is written
+                with tracing.span('map'):
+                    page = stack.enter_context(map_page(rf))
+                title = page.title
+                write_content = lambda sink: page.write_html(sink, basepath=basepath)
+                streaming = True
+            elif size < STREAMING_THRESHOLD:
+                with tracing.span('read'):
+                    md = rf.read()
+                with tracing.span('parse'):
+                    page = parse_cache.parse(md)
+                with tracing.span('markdown_to_html_node'):
+                    page.build_tree(basepath=basepath)
+                title = page.title
+                write_content = page.tree.write_html
+                streaming = False
+            else:
+                # Huge sources are rendered block by block straight from the file, the blocks are
+                # only kept (parsed once, for both the render and the collectors) when there are collectors
+                with tracing.span('extract_title'):
+                    title = extract_title_from_lines(rf)
+                rf.seek(0)
+                blocks = [] if collectors else None
+                write_content = lambda sink: write_markdown_html(rf, sink, basepath=basepath, blocks=blocks)
+                streaming = True
+            if gzip_level is None or streaming:
+                # Serializing, templating and writing are one streaming pass, so they share a span
+                with tracing.span('write'), open(tmp_path,'w') as wf:
+                    template.write(wf, {'Title': escape_text(title), 'Content': write_content}, basepath)
+                replace(tmp_path, dst_path)
+                if gzip_level is not None:
+                    compress_file(dst_path, gzip_level)
+            else:
+                # The page is assembled in memory once, for both the page and its .gz
+                sink = StringIO()
+                template.write(sink, {'Title': escape_text(title), 'Content': write_content}, basepath)
+                data = sink.getvalue().encode()
+                with tracing.span('write'), open(tmp_path,'wb') as wf:
+                    wf.write(data)
+                replace(tmp_path, dst_path)
+                compress_data(data, dst_path, gzip_level)
+            if collectors:
+                if streaming and not mapped:
+                    page = ParsedPage(blocks, title)
+                for collect, page_records in zip(collectors, records):
+                    page_records[dst_path] = collect(from_path, page)
+    except BaseException:
+        if path.exists(tmp_path):
+            remove(tmp_path)
+        raise
+    return title
+
+def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir_path: str, basepath: str,
+                             manifest: BuildManifest | None = None, jobs: int = 1) -> None:
+    dir_to_files(dir_path_content, dest_dir_path, manifest)
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    render_pages(select_pages(pages, manifest), template_path, basepath, jobs)
+
+def collect_pages(dir_path_content: str, dest_dir_path: str, assets: list | None = None,
+                  make_dirs: bool = True) -> list[tuple[str, str]]:
+    '''
+    Walks a content directory, creating the matching output directories and collecting the pages to render.
+    ### Args:
+        dir_path_content: The directory to walk.
+        dest_dir_path: The matching output directory.
+        assets: A list every file is appended to as a (source path, destination path) tuple
+            for the copy stage, pages included, as they are copied next to their HTML.
+        make_dirs: Create the output directories, False only computes the outputs.
+    ### Returns:
+        A list of (markdown path, html path) tuples in a stable, sorted walk order.
+    '''
+    if make_dirs:
+        makedirs(dest_dir_path, exist_ok=True)
+        print(f'parsing: {dir_path_content} to: {dest_dir_path}')
+    pages = []
+    for item in sorted(listdir(dir_path_content)):
         candidate_path = path.join(dir_path_content, item)
         dest_candidate_path = path.join(dest_dir_path, item)
-        if path.isfile(candidate_path) and candidate_path.split('.')[1] == 'md':
-            generate_page(candidate_path, template_path, f'{dest_candidate_path.rstrip('md')}html', basepath)
+        if path.isfile(candidate_path):
+            if assets is not None:
+                assets.append((candidate_path, dest_candidate_path))
+            if is_page_source(candidate_path):
+                pages.append((candidate_path, page_destination(dest_candidate_path)))
         elif path.isdir(candidate_path):
-            generate_pages_recursive(candidate_path, template_path, dest_candidate_path, basepath)
-        continue                
-                                
-
-def dir_to_files(dir_path: str, dst_path: str) -> None:
-    dir_items = listdir(dir_path)
-    for item in dir_items:
-        source_path = path.join(dir_path, item)
-        end_path = path.join(dst_path, item)
-        if path.isfile(source_path):
-            copy(source_path, end_path)
-        elif path.isdir(source_path) and not path.isdir(end_path):
-            mkdir(end_path)
-            dir_to_files(source_path, end_path)
+            pages.extend(collect_pages(candidate_path, dest_candidate_path, assets, make_dirs))
+    return pages
+
+def is_page_source(file_path: str) -> bool:
+    '''Tells whether a source file is a markdown page to render.'''
+    return file_path.split('.')[1] == 'md'
+
+def page_destination(dest_path: str) -> str:
+    '''Maps the destination of a markdown file to the destination of its HTML page.'''
+    return f'{dest_path.rstrip('md')}html'
+
+def select_pages(pages: list[tuple[str, str]], manifest: BuildManifest | None = None) -> list[tuple[str, str]]:
+    '''Drops the pages the manifest reports as unchanged, without a manifest every page is kept.'''
+    if manifest is None:
+        return pages
+    return [(from_path, dst_path) for from_path, dst_path in pages if manifest.check_page(from_path, dst_path)[0]]
+
+def render_pages(pages: list[tuple[str, str]], template_path: str, basepath: str, jobs: int = 1,
+                 gzip_level: int | None = None, indexes: tuple[PageIndex, ...] = (),
+                 titles: dict[str, str] | None = None) -> dict[str, list[int]]:
+    '''
+    Renders pages either in this process or, for jobs > 1, in a pool of worker processes.
+    Workers render the pages in batches and hand their log lines (and, when tracing, their
+    trace events and index records) back, so the output and the log are the same no matter how many workers took part.
+    ### Args:
+        pages: The (markdown path, html path) tuples to render.
+        template_path: The HTML template every page is rendered into.
+        basepath: The root path the site is served from.
+        jobs: The number of worker processes, 0 uses every core.
+        gzip_level: Write every page's .gz from memory along with it at this level, None writes none.
+        indexes: The PageIndexes (search, links) and the manifest's PageImages the records of the rendered pages are merged into.
+        titles: A dict the title of every rendered page is put into, keyed by its html path.
+    ### Returns:
+        The [hits, misses] of the block cache ('block') and the parse cache ('parse'), summed over every worker.
+    ### Raises:
+        PageGenerationError: If a page fails to render.
+    '''
+    if jobs == 0:
+        jobs = cpu_count() or 1
+    cache_stats = {'block': [0, 0], 'parse': [0, 0]}
+    collectors = tuple(index.collect for index in indexes)
+    if jobs <= 1 or len(pages) <= 1:
+        for from_path, dst_path in pages:
+            _, _, page_stats, records, page_titles = _generate_batch([(from_path, dst_path)], template_path, basepath,
+                                                                     print, False, gzip_level, collectors)
+            _add_cache_stats(cache_stats, page_stats)
+            for index, index_records in zip(indexes, records):
+                index.update(index_records)
+            if titles is not None:
+                titles.update(page_titles)
+        return cache_stats
+    # Several batches per worker keep every core busy until the end of the build,
+    # while big enough batches keep the pickling overhead per page low.
+    batch_size = max(1, min(64, len(pages) // (jobs * 4)))
+    batches = [pages[i:i + batch_size] for i in range(0, len(pages), batch_size)]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(batches)), initializer=_configure_worker,
+                             initargs=(block_cache.maxsize, parse_cache.cache_dir, parse_cache.max_bytes,
+                                       image_size.STATIC_DIR, get_asset_urls(), mapped_source.MMAP_THRESHOLD)) as executor:
+        results = executor.map(_generate_batch, batches, [template_path] * len(batches),
+                               [basepath] * len(batches), [None] * len(batches), [tracing.enabled()] * len(batches),
+                               [gzip_level] * len(batches), [collectors] * len(batches))
+        for log_lines, events, batch_stats, records, batch_titles in results:
+            for line in log_lines:
+                print(line)
+            tracing.add_events(events)
+            _add_cache_stats(cache_stats, batch_stats)
+            for index, index_records in zip(indexes, records):
+                index.update(index_records)
+            if titles is not None:
+                titles.update(batch_titles)
+    return cache_stats
+
+def use_asset_urls(asset_urls: dict[str, str], dest_dir: str, manifest: BuildManifest | None = None) -> None:
+    '''
+    Points every page rendered from now on at the fingerprinted assets and writes the asset manifest.
+    ### Args:
+        asset_urls: The fingerprinted URL of every asset keyed by its original URL.
+        dest_dir: The output directory the asset manifest is written into.
+        manifest: The build manifest, which re-renders every page once the asset URLs change.
+    '''
+    set_asset_urls(asset_urls)
+    asset_manifest_path = write_asset_manifest(dest_dir, asset_urls)
+    if manifest is not None:
+        manifest.set_assets_hash(asset_urls_digest(asset_urls))
+        manifest.record_asset(asset_manifest_path)
+
+def check_links_only(source_dirs: list[str], dest_dir: str, jobs: int = 1, sitemap: bool = False, feed: bool = False,
+                     search_index: bool = False) -> list[tuple[str, str, str]]:
+    '''
+    Checks the internal links and images of the site without building it: the pages are only parsed
+    (through the parse cache) and their links resolved against the outputs a build would write,
+    including the files of the sitemap, feed and search index options it would run with.
+    ### Args:
+        source_dirs: The source directories, each mirrored into dest_dir.
+        dest_dir: The output directory a build would write.
+        jobs: The number of worker processes parsing the pages, 0 uses every core.
+        sitemap: The build writes the sitemap.
+        feed: The build writes the feed.
+        search_index: The build writes the search index.
+    ### Returns:
+        The (source path, url, kind) of every broken reference, which are also reported.
+    '''
+    assets = []
+    pages = [page for source_dir in source_dirs for page in collect_pages(source_dir, dest_dir, assets, make_dirs=False)]
+    outputs = [dst for _, dst in assets + pages]
+    if sitemap:
+        outputs += sitemap_paths(dest_dir, len(pages))
+    if feed:
+        outputs.append(feed_path(dest_dir))
+    if search_index:
+        # The shards depend on the terms of the pages, which are only collected, the index is not written
+        search = SearchIndex.load(dest_dir)
+        with tracing.span('search_index', pages=len(pages)):
+            search.add_missing(pages, jobs)
+            search.retain(dst for _, dst in pages)
+        outputs += search.output_paths()
+    link_index = LinkIndex(dest_dir)
+    with tracing.span('check_links', pages=len(pages)):
+        link_index.add_missing(pages, jobs)
+        broken = link_index.broken(output_urls(outputs, dest_dir))
+    report_broken_links(broken)
+    print(f'Checked the links of {len(link_index.pages)} pages, found {len(broken)} broken')
+    return broken
+
+def write_site_maps(dest_dir: str, site_url: str, basepath: str, pages: list[tuple[str, str]],
+                    manifest: BuildManifest, sitemap: bool = True, feed: bool = True) -> list[str]:
+    '''
+    Writes the sitemap and the Atom feed from the titles the manifest recorded while the pages were
+    rendered (or kept from the previous build for the pages skipped) and the mtimes of their sources.
+    ### Args:
+        dest_dir: The output directory.
+        site_url: The absolute URL of the site.
+        basepath: The root path the site is served from.
+        pages: The (markdown path, html path) tuples of every page of the build.
+        manifest: The build manifest holding the pages' titles.
+        sitemap: Write the sitemap.
+        feed: Write the feed of the pages under dest_dir/FEED_DIR.
+    ### Returns:
+        The paths of the files written.
+    '''
+    site_pages = []
+    for from_path, dst_path in sorted(pages, key=lambda page: page_url(page[1], dest_dir)):
+        record = manifest.pages.get(path.relpath(dst_path, dest_dir)) or {}
+        title = record.get('title')
+        if title is None:
+            # Pages skipped since a build that did not record titles
+            with open(from_path, 'r') as rf:
+                title = extract_title_from_lines(rf)
+            manifest.record_title(dst_path, title)
+        site_pages.append((page_url(dst_path, dest_dir), title, path.getmtime(from_path)))
+    outputs = []
+    if sitemap:
+        outputs.extend(write_sitemap(dest_dir, site_url, basepath, ((url, lastmod) for url, _, lastmod in site_pages)))
+    if feed:
+        home_title = next((title for url, title, _ in site_pages if url == '/'), site_url)
+        feed_prefix = f'/{FEED_DIR}/'
+        entries = [page for page in site_pages if page[0].startswith(feed_prefix) and page[0] != feed_prefix]
+        outputs.append(write_feed(dest_dir, site_url, basepath, home_title, entries))
+    return outputs
+
+def _configure_worker(block_cache_size: int, parse_cache_dir: str, parse_cache_bytes: int,
+                      static_dir: str | None = image_size.STATIC_DIR, asset_urls: dict[str, str] | None = None,
+                      mmap_threshold: int | None = None) -> None:
+    block_cache.resize(block_cache_size)
+    parse_cache.configure(parse_cache_dir, parse_cache_bytes)
+    image_size.STATIC_DIR = static_dir
+    mapped_source.MMAP_THRESHOLD = mmap_threshold
+    if asset_urls:
+        set_asset_urls(asset_urls)
+
+def _add_cache_stats(cache_stats: dict[str, list[int]], batch_stats: dict[str, tuple[int, int]]) -> None:
+    for name, (hits, misses) in batch_stats.items():
+        cache_stats[name][0] += hits
+        cache_stats[name][1] += misses
+
+def _generate_batch(pages: list[tuple[str, str]], template_path: str, basepath: str, log = None,
+                    trace: bool = False, gzip_level: int | None = None,
+                    collectors: tuple = ()) -> tuple[list[str], list[dict], dict[str, tuple[int, int]], list[dict], dict[str, str]]:
+    if trace:
+        tracing.enable()
+    log_lines = []
+    records = [{} for _ in collectors]
+    titles = {}
+    for from_path, dst_path in pages:
+        try:
+            titles[dst_path] = generate_page(from_path, template_path, dst_path, basepath, log or log_lines.append, gzip_level,
+                                             collectors, records)
+        except Exception as err:
+            raise PageGenerationError(from_path, f'{type(err).__name__}: {err}') from err
+    cache_stats = {'block': block_cache.take_stats(), 'parse': parse_cache.take_stats()}
+    return log_lines, tracing.take_events() if trace else [], cache_stats, records, titles
+
+def dir_to_files(dir_path: str, dst_path: str, manifest: BuildManifest | None = None,
+                 threads: int = COPY_THREADS, check_hash: bool = False) -> CopyStats:
+    '''
+    Copies a directory tree, skipping the files whose copy is already up to date.
+    ### Args:
+        dir_path: The directory to copy.
+        dst_path: The directory to copy it into.
+        manifest: The build manifest copied files are recorded in, if any.
+        threads: The number of copying threads.
+        check_hash: Decide whether a file changed by its hash instead of its size and mtime.
+    ### Returns:
+        The CopyStats of the bytes copied and skipped.
+    '''
+    assets = []
+    collect_pages(dir_path, dst_path, assets)
+    if manifest is not None:
+        for _, end_path in assets:
+            manifest.record_asset(end_path)
+    return copy_files(assets, threads, check_hash)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,226 @@
+from hashlib import sha256
+from os import path, remove, rmdir, listdir, replace, stat
+from image_size import page_images
+import image_size
+import json
+
+# Bump whenever a change to the generator alters the HTML it writes,
+# so every page is re-rendered on the next incremental build.
+GENERATOR_VERSION = '4'
+MANIFEST_NAME = '.build-manifest.json'
+
+def hash_file(file_path: str) -> str:
+    '''
+    Hashes a file's contents without reading it into memory all at once.
+    ### Args:
+        file_path: The path of the file to hash.
+    ### Returns:
+        The hex SHA-256 digest of the file's bytes.
+    '''
+    digest = sha256()
+    with open(file_path, 'rb') as rf:
+        for chunk in iter(lambda: rf.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_signature(file_path: str) -> list[int] | None:
+    '''The [mtime_ns, size] of a file, None if it is missing.'''
+    try:
+        file_stat = stat(file_path)
+    except OSError:
+        return None
+    return [file_stat.st_mtime_ns, file_stat.st_size]
+
+class BuildManifest():
+    '''BuildManifest Class
+    Keeps track of the inputs every output page was rendered from, so an incremental
+    build only re-renders the pages whose inputs changed.
+    The manifest is stored as JSON next to the output (dest_dir/.build-manifest.json).
+    ### Attributes:
+        dest_dir: The output directory the manifest belongs to.
+        full: True when every page is rebuilt regardless of the previous manifest.
+        pages: The page records of the current build, keyed by output path.
+        assets: The copied (non-page) outputs of the current build.
+        file_digests: The [mtime_ns, size, digest] of every file hashed by file_digest, keyed by its path.
+    '''
+    def __init__(self, dest_dir: str, previous: dict | None = None, full: bool = False) -> None:
+        self.dest_dir = dest_dir
+        self.full = full or previous is None
+        self.previous = previous or {}
+        self.pages = {}
+        self.assets = set()
+        self.file_digests = {}
+        self.template_hash = None
+        self.basepath = None
+        self.image_dir = None
+        self.assets_hash = None
+
+    @classmethod
+    def load(cls, dest_dir: str, full: bool = False) -> 'BuildManifest':
+        '''Loads the manifest of the previous build, a missing or unreadable one forces a full build.'''
+        previous = None
+        manifest_path = path.join(dest_dir, MANIFEST_NAME)
+        if not full and path.isfile(manifest_path):
+            try:
+                with open(manifest_path, 'r') as rf:
+                    previous = json.load(rf)
+            except (OSError, ValueError):
+                previous = None
+        return cls(dest_dir, previous, full)
+
+    def set_inputs(self, template_path: str, basepath: str) -> None:
+        '''Records the build-wide inputs shared by every page, along with the directory images are sized from (None with --no-image-sizes).'''
+        self.template_hash = hash_file(template_path)
+        self.basepath = basepath
+        self.image_dir = image_size.STATIC_DIR
+
+    def set_assets_hash(self, assets_hash: str | None) -> None:
+        '''Records the hash of the fingerprinted asset URLs the pages link to, None when assets are not fingerprinted.'''
+        self.assets_hash = assets_hash
+
+    def file_digest(self, file_path: str) -> str:
+        '''
+        Hashes a file, reusing the digest recorded by the previous build while the file's size and mtime are unchanged.
+        ### Args:
+            file_path: The path of the file to hash.
+        ### Returns:
+            The hex SHA-256 digest of the file's bytes, see hash_file.
+        '''
+        file_stat = stat(file_path)
+        signature = [file_stat.st_mtime_ns, file_stat.st_size]
+        old = self.previous.get('file_digests', {}).get(file_path)
+        digest = old[2] if old is not None and old[:2] == signature else hash_file(file_path)
+        self.file_digests[file_path] = signature + [digest]
+        return digest
+
+    def _key(self, dst_path: str) -> str:
+        return path.relpath(dst_path, self.dest_dir)
+
+    def check_page(self, from_path: str, dst_path: str) -> tuple[bool, str]:
+        '''
+        Decides whether a page has to be re-rendered and records the decision.
+        ### Args:
+            from_path: The markdown source of the page.
+            dst_path: The HTML output of the page.
+        ### Returns:
+            A (rebuild, reason) tuple, reason explains why the page was rebuilt or skipped.
+        '''
+        source_hash = hash_file(from_path)
+        old = self.previous.get('pages', {}).get(self._key(dst_path))
+        if self.full:
+            rebuild, reason = True, 'full rebuild'
+        elif old is None:
+            rebuild, reason = True, 'new page'
+        elif old.get('generator_version') != GENERATOR_VERSION:
+            rebuild, reason = True, 'generator version changed'
+        elif old.get('template_hash') != self.template_hash:
+            rebuild, reason = True, 'template changed'
+        elif old.get('basepath') != self.basepath:
+            rebuild, reason = True, 'basepath changed'
+        elif old.get('image_dir') != self.image_dir:
+            rebuild, reason = True, 'image sizes changed'
+        elif old.get('assets_hash') != self.assets_hash:
+            rebuild, reason = True, 'fingerprinted assets changed'
+        elif old.get('source') != from_path or old.get('source_hash') != source_hash:
+            rebuild, reason = True, 'source changed'
+        elif any(file_signature(image_path) != signature for image_path, signature in old.get('images', {}).items()):
+            rebuild, reason = True, 'image changed'
+        elif not path.isfile(dst_path):
+            rebuild, reason = True, 'output missing'
+        else:
+            rebuild, reason = False, 'unchanged'
+        self.pages[self._key(dst_path)] = {
+            'source': from_path,
+            'source_hash': source_hash,
+            'template_hash': self.template_hash,
+            'basepath': self.basepath,
+            'image_dir': self.image_dir,
+            'assets_hash': self.assets_hash,
+            'generator_version': GENERATOR_VERSION,
+            'status': 'rebuilt' if rebuild else 'skipped',
+            'reason': reason,
+            # A skipped page keeps the title and images it was rendered with, a rebuilt one gets them
+            # from record_title and record_images
+            'title': None if rebuild else old.get('title'),
+            'images': {} if rebuild else old.get('images', {}),
+        }
+        return rebuild, reason
+
+    def record_title(self, dst_path: str, title: str) -> None:
+        '''Records the title a page was rendered with, for the outputs built from every page's title (e.g. the feed).'''
+        record = self.pages.get(self._key(dst_path))
+        if record is not None:
+            record['title'] = title
+
+    def record_images(self, dst_path: str, image_paths: list[str]) -> None:
+        '''Records the [mtime_ns, size] of the images a page was rendered with, see check_page.'''
+        record = self.pages.get(self._key(dst_path))
+        if record is not None:
+            record['images'] = {image_path: file_signature(image_path) for image_path in image_paths}
+
+    def record_asset(self, dst_path: str) -> None:
+        '''Records a copied file as an output of the current build.'''
+        self.assets.add(self._key(dst_path))
+
+    def remove_orphans(self) -> list[str]:
+        '''
+        Removes the outputs of the previous build that the current build no longer produces,
+        along with any directories left empty by their removal.
+        ### Returns:
+            The paths of the removed files.
+        '''
+        current = set(self.pages) | self.assets
+        previous = set(self.previous.get('pages', {})) | set(self.previous.get('assets', []))
+        removed = []
+        for key in sorted(previous - current):
+            orphan_path = path.join(self.dest_dir, key)
+            if path.isfile(orphan_path):
+                remove(orphan_path)
+                removed.append(orphan_path)
+            parent = path.dirname(orphan_path)
+            while parent and path.abspath(parent) != path.abspath(self.dest_dir) and path.isdir(parent) and not listdir(parent):
+                rmdir(parent)
+                parent = path.dirname(parent)
+        return removed
+
+    def save(self) -> None:
+        '''Writes the manifest atomically, so an interrupted build never leaves a half-written one.'''
+        manifest_path = path.join(self.dest_dir, MANIFEST_NAME)
+        data = {
+            'generator_version': GENERATOR_VERSION,
+            'template_hash': self.template_hash,
+            'basepath': self.basepath,
+            'image_dir': self.image_dir,
+            'assets_hash': self.assets_hash,
+            'pages': dict(sorted(self.pages.items())),
+            'assets': sorted(self.assets),
+            'file_digests': dict(sorted(self.file_digests.items())),
+        }
+        with open(f'{manifest_path}.tmp', 'w') as wf:
+            json.dump(data, wf, indent=1)
+        replace(f'{manifest_path}.tmp', manifest_path)
+
+    def summary(self) -> dict[str, int]:
+        '''Counts the rebuilt and skipped pages of the current build.'''
+        counts = {'rebuilt': 0, 'skipped': 0}
+        for record in self.pages.values():
+            counts[record['status']] += 1
+        return counts
+
+class PageImages():
+    '''PageImages Class
+    Collects the images every rendered page shows into the manifest, so the next build re-renders
+    the page once one of them changes. It goes along with the PageIndexes given to render_pages:
+    collect runs wherever a page is rendered and the records are merged in here with update().
+    ### Attributes:
+        manifest: The BuildManifest the images are recorded in.
+    '''
+    collect = staticmethod(page_images)
+
+    def __init__(self, manifest: BuildManifest) -> None:
+        self.manifest = manifest
+
+    def update(self, records: dict) -> None:
+        '''Records the images of rendered pages, keyed by their output path.'''
+        for dst_path, image_paths in records.items():
+            self.manifest.record_images(dst_path, image_paths)
@@ -0,0 +1,134 @@
+from array import array
+from collections.abc import Iterator
+from contextlib import contextmanager
+from mmap import mmap, ACCESS_READ
+from markdown_to_html_node import BlockType, TextNode, render_block, parse_block, find_heading_num
+from text_to_textnodes import classify_block_lines
+from block_cache import BlockCache, block_cache
+import re
+
+# Sources at least this many bytes are memory-mapped by generate_page, None never maps them.
+MMAP_THRESHOLD = None
+# The default threshold of --mmap, in bytes.
+MMAP_SIZE = 1024 * 1024
+
+# An empty line ends a block, with the same newlines a text-mode read translates
+_BLOCK_BREAK = re.compile(rb'(?:\r\n|\r(?!\n)|\n){2}')
+_LINE_BREAK = re.compile(r'\r\n?|\n')
+_BLOCK_TYPES = list(BlockType)
+
+def use_mmap(size: int) -> bool:
+    '''Whether a source of size bytes is memory-mapped under the current MMAP_THRESHOLD.'''
+    return MMAP_THRESHOLD is not None and 0 < size and MMAP_THRESHOLD <= size
+
+def iter_spans(buffer) -> Iterator[tuple[int, int]]:
+    '''
+    Splits a markdown buffer into block spans without decoding it.
+    ### Args:
+        buffer: The UTF-8 encoded markdown, e.g. a mmap.
+    ### Returns:
+        The (start, end) byte offsets of every run of text between two empty lines. A span of
+        whitespace-only lines yields no block, see MappedPage.
+    '''
+    start = 0
+    for block_break in _BLOCK_BREAK.finditer(buffer):
+        if start < block_break.start():
+            yield start, block_break.start()
+        start = block_break.end()
+    if start < len(buffer):
+        yield start, len(buffer)
+
+class MappedPage():
+    '''MappedPage Class
+    A page read through a memory map of its source, for sources too big to hold as text, TextNodes
+    and tree all at once. Its blocks are kept as the byte offsets of their span in the buffer and their
+    type only: a block is decoded, inline-parsed and rendered when it is written and dropped right
+    after, so the page costs the mapped file (which the OS pages in and out) plus one block.
+    Like ParsedPage it has a title and blocks, so the PageIndex collectors read it the same way.
+    ### Attributes:
+        buffer: The UTF-8 encoded markdown.
+        starts: The byte offset every block starts at.
+        ends: The byte offset every block ends at.
+        types: The index of every block's BlockType in the enum.
+        title: The text of the page's first h1 heading.
+    ### Raises:
+        ValueError: If the markdown has no h1 heading to take the title from.
+    '''
+    __slots__ = ('buffer', 'starts', 'ends', 'types', 'title')
+
+    def __init__(self, buffer) -> None:
+        self.buffer = buffer
+        self.starts = array('q')
+        self.ends = array('q')
+        self.types = bytearray()
+        self.title = None
+        # Classifying needs the block's lines, they are decoded one block at a time and only the offsets are kept
+        for start, end in iter_spans(buffer):
+            lines = self._lines(start, end)
+            if not lines:
+                continue
+            block_type = classify_block_lines(lines)
+            if self.title is None and block_type is BlockType.HEADING:
+                block = '\n'.join(lines)
+                if find_heading_num(block) == 'h1':
+                    self.title = ' '.join(block.split()[1:])
+            self.starts.append(start)
+            self.ends.append(end)
+            self.types.append(_BLOCK_TYPES.index(block_type))
+        if self.title is None:
+            raise ValueError('The markdown has no h1 heading to take the title from')
+
+    def __repr__(self) -> str:
+        return f'MappedPage(Title: {self.title}, Blocks: {len(self.types)}, Bytes: {len(self.buffer)})'
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def _lines(self, start: int, end: int) -> list[str]:
+        # The same lines _iter_block_lines keeps: stripped, whitespace-only ones dropped
+        lines = []
+        for line in _LINE_BREAK.split(self.buffer[start:end].decode()):
+            line = line.strip()
+            if line:
+                lines.append(line)
+        return lines
+
+    def block(self, index: int) -> str:
+        '''Decodes the markdown of the index-th block, as markdown_to_blocks returns it.'''
+        return '\n'.join(self._lines(self.starts[index], self.ends[index]))
+
+    @property
+    def block_types(self) -> list[BlockType]:
+        return [_BLOCK_TYPES[block_type] for block_type in self.types]
+
+    @property
+    def blocks(self) -> Iterator[tuple[BlockType, str, list[list[TextNode]]]]:
+        '''A fresh iterator over the (block type, block, parts) of ParsedPage.blocks, parsing one block at a time.'''
+        for index, block_type in enumerate(self.block_types):
+            block = self.block(index)
+            yield block_type, block, parse_block(block, block_type)
+
+    def write_html(self, sink, cache: BlockCache | None = block_cache, basepath: str = '/') -> None:
+        '''
+        Writes the page's HTML as markdown_to_html_node(markdown).write_html(sink) does, one block at a time.
+        ### Args:
+            sink: Any object with a write(str) method.
+            cache: The BlockCache to render the blocks through.
+            basepath: The root path the site is served from.
+        '''
+        sink.write('<div>')
+        for index, block_type in enumerate(self.types):
+            render_block(self.block(index), _BLOCK_TYPES[block_type], cache, basepath).write_html(sink)
+        sink.write('</div>')
+
+@contextmanager
+def map_page(rf) -> Iterator[MappedPage]:
+    '''
+    Memory-maps an open markdown file as a MappedPage, the map is closed on leaving the context.
+    ### Args:
+        rf: The open file, in any mode.
+    ### Raises:
+        ValueError: If the markdown has no h1 heading, or the file is empty.
+    '''
+    with mmap(rf.fileno(), 0, access=ACCESS_READ) as buffer:
+        yield MappedPage(buffer)
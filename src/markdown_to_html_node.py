@@ -1,58 +1,201 @@
-from text_to_textnodes import BlockType, markdown_to_blocks, block_to_block_type, TextNode, TextType, re, text_to_textnodes
-from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node
+from text_to_textnodes import BlockType, markdown_to_blocks, iter_classified_blocks, block_to_block_type, TextNode, TextType, re, text_to_textnodes
+from collections.abc import Iterable
+from htmlnode import HTMLNode, LeafNode, ParentNode, RawHTMLNode, text_node_to_html_node
+from block_cache import BlockCache, block_cache
+import urls
+
+class ParsedPage():
+    '''ParsedPage Class
+    The result of tokenizing a page once: its blocks, their types, its title and, once built, its
+    HTML tree. Every stage of rendering a page reads this one object instead of splitting the markdown again.
+    ### Attributes:
+        blocks: A (block type, block, parts) tuple for every block, see parse_block.
+        title: The text of the page's first h1 heading.
+        tree: The page's HTML tree, None until build_tree is called.
+    '''
+    __slots__ = ('blocks', 'title', 'tree')
+
+    def __init__(self, blocks: list[tuple[BlockType, str, list[list[TextNode]]]], title: str) -> None:
+        self.blocks = blocks
+        self.title = title
+        self.tree = None
+
+    def __repr__(self) -> str:
+        return f'ParsedPage(Title: {self.title}, Blocks: {len(self.blocks)})'
+
+    @property
+    def block_types(self) -> list[BlockType]:
+        return [block_type for block_type, _, _ in self.blocks]
+
+    def build_tree(self, cache: BlockCache | None = block_cache, basepath: str = '/') -> HTMLNode:
+        '''
+        Builds the page's HTML tree from its parsed blocks, see parsed_to_html_node, and keeps it in tree.
+        ### Args:
+            cache: The BlockCache to take blocks rendered before from.
+            basepath: The root path the site is served from.
+        ### Returns:
+            The page's HTML tree.
+        '''
+        self.tree = parsed_to_html_node(self.blocks, cache, basepath)
+        return self.tree
+
+def parse_page(markdown: str) -> ParsedPage:
+    '''
+    Splits, classifies and inline-parses a page in one pass, taking its title from the first h1 heading on the way.
+    ### Args:
+        markdown: The page's markdown.
+    ### Returns:
+        The ParsedPage.
+    ### Raises:
+        ValueError: If the markdown has no h1 heading to take the title from.
+    '''
+    blocks = []
+    title = None
+    for block, block_type in iter_classified_blocks(markdown.split('\n')):
+        if title is None and block_type is BlockType.HEADING and find_heading_num(block) == 'h1':
+            title = ' '.join(block.split()[1:])
+        blocks.append((block_type, block, parse_block(block, block_type)))
+    if title is None:
+        raise ValueError('The markdown has no h1 heading to take the title from')
+    return ParsedPage(blocks, title)
 
 def extract_title(markdown: str) -> str:
-    title_as_list = [' '.join(block.split()[1:])
-                          for block in markdown_to_blocks(markdown)
-                          if block_to_block_type(block) is BlockType.HEADING
-                          if find_heading_num(block) == 'h1'
-                          ]
-    if not any(word for word in markdown.split() for word in '#'.split()):
-        raise ValueError('The Block spliter Failed')
-    return title_as_list[0]
-
-def markdown_to_html_node(markdown: str) -> HTMLNode:
-    children_nodes = [block_to_htmlnodes(block, block_to_block_type(block))
-             for block in markdown_to_blocks(markdown)]
+    return extract_title_from_lines(markdown.split('\n'))
+
+def extract_title_from_lines(lines: Iterable[str]) -> str:
+    '''
+    Streaming version of extract_title, reads blocks only until the first h1 heading.
+    ### Args:
+        lines: The lines of the markdown (e.g. an open file).
+    ### Returns:
+        The text of the first h1 heading.
+    ### Raises:
+        ValueError: If the markdown has no h1 heading.
+    '''
+    for block, block_type in iter_classified_blocks(lines):
+        if block_type is BlockType.HEADING and find_heading_num(block) == 'h1':
+            return ' '.join(block.split()[1:])
+    raise ValueError('The markdown has no h1 heading to take the title from')
+
+def markdown_to_html_node(markdown: str, cache: BlockCache | None = block_cache, basepath: str = '/') -> HTMLNode:
+    children_nodes = [render_block(block, block_type, cache, basepath)
+             for block, block_type in iter_classified_blocks(markdown.split('\n'))]
     return ParentNode('div', children_nodes)
 
-def block_to_htmlnodes (block: str, block_type: BlockType) -> HTMLNode:
-    children: list = [text_node_to_html_node(textnode) for textnode in text_to_textnodes(block) if textnode.text_type in TextType]
+def render_block(block: str, block_type: BlockType, cache: BlockCache | None = block_cache, basepath: str = '/',
+                 parts: list[list[TextNode]] | None = None) -> HTMLNode:
+    '''
+    Renders a block through the block cache, a block seen before is not parsed again.
+    ### Args:
+        block: The block's markdown.
+        block_type: The block's BlockType.
+        cache: The BlockCache to use, None (or a cache of size 0) renders the block as a tree.
+        basepath: The root path the site is served from.
+        parts: The block's parse_block result if the caller already has it, None parses the block when needed.
+    ### Returns:
+        The block's HTML as a RawHTMLNode, or its tree when the cache is disabled.
+    '''
+    if cache is None or cache.maxsize <= 0:
+        return build_block(block, block_type, parts if parts is not None else parse_block(block, block_type), basepath)
+    # The basepath and the asset URLs are part of the key, as they change the URLs of the block's links and images
+    key = (block_type, block, basepath, urls.asset_urls_generation)
+    html = cache.get(key)
+    if html is None:
+        html = build_block(block, block_type, parts if parts is not None else parse_block(block, block_type), basepath).to_html()
+        cache.put(key, html)
+    return RawHTMLNode(html)
+
+def parsed_to_html_node(blocks: list[tuple[BlockType, str, list[list[TextNode]]]],
+                        cache: BlockCache | None = block_cache, basepath: str = '/') -> HTMLNode:
+    '''
+    Builds the HTML tree of the blocks of a page parsed by parse_page, taking blocks rendered before from the block cache.
+    ### Args:
+        blocks: The (block type, block, parts) tuples of the page.
+        cache: The BlockCache to use, None (or a cache of size 0) builds every block.
+        basepath: The root path the site is served from.
+    ### Returns:
+        The page's HTML tree, the same as markdown_to_html_node's.
+    '''
+    return ParentNode('div', [render_block(block, block_type, cache, basepath, parts) for block_type, block, parts in blocks])
+
+def write_markdown_html(lines: Iterable[str], sink, cache: BlockCache | None = block_cache, basepath: str = '/',
+                        blocks: list | None = None) -> None:
+    '''
+    Streaming version of markdown_to_html_node(markdown).write_html(sink).
+    Every block is parsed, rendered and written as soon as the block splitter yields it,
+    so only one block's tree is in memory at a time.
+    ### Args:
+        lines: The lines of the markdown (e.g. an open file).
+        sink: Any object with a write(str) method.
+        cache: The BlockCache to render the blocks through.
+        basepath: The root path the site is served from.
+        blocks: A list the (block type, block, parts) of every block is appended to as it is rendered,
+            as in ParsedPage.blocks, e.g. for the PageIndex collectors. None keeps no block.
+    '''
+    sink.write('<div>')
+    for block, block_type in iter_classified_blocks(lines):
+        if blocks is None:
+            render_block(block, block_type, cache, basepath).write_html(sink)
+        else:
+            parts = parse_block(block, block_type)
+            blocks.append((block_type, block, parts))
+            render_block(block, block_type, cache, basepath, parts).write_html(sink)
+    sink.write('</div>')
+
+def block_to_htmlnodes (block: str, block_type: BlockType, basepath: str = '/') -> HTMLNode:
+    return build_block(block, block_type, parse_block(block, block_type), basepath)
+
+def parse_block(block: str, block_type: BlockType) -> list[list[TextNode]]:
+    '''
+    Parses the inline markdown of a block.
+    ### Args:
+        block: The block's markdown.
+        block_type: The block's BlockType.
+    ### Returns:
+        The TextNodes of every part of the block holding inline markdown: the paragraph,
+        the heading's text, every quote line or every list item. Code blocks have none.
+    '''
+    match block_type:
+        case BlockType.PARAGRAPH:
+            return [text_to_textnodes(block)]
+        case BlockType.HEADING:
+            return [text_to_textnodes(' '.join(block.split()[1:]))]
+        case BlockType.QUOTE:
+            return [text_to_textnodes(' '.join(line.split()[1:]))
+                    for line in block.split('\n')
+                    if line.strip()]
+        case BlockType.ORDERED_LIST | BlockType.UNORDERED_LIST:
+            return [text_to_textnodes(' '.join(line.split()[1:]))
+                    for line in block.split('\n')
+                    if line.strip() and (line.split()[0].endswith('.')
+                                         or line.split()[0] == '-')]
+    return []
+
+def build_block(block: str, block_type: BlockType, parts: list[list[TextNode]], basepath: str = '/') -> HTMLNode:
+    '''Builds the HTML tree of a block from its parse_block parts, pointing root-relative URLs at the basepath.'''
     match block_type:
         case BlockType.PARAGRAPH:
-            return ParentNode('p', children)
+            return ParentNode('p', [text_node_to_html_node(textnode, basepath=basepath) for textnode in parts[0] if textnode.text_type in TextType])
         case BlockType.CODE:
             return ParentNode('pre', [text_node_to_html_node(TextNode(''.join(block.strip('```')), TextType.CODE))])
         
         case BlockType.HEADING:              
-            return ParentNode(find_heading_num(block),[text_node_to_html_node(node) for node in text_to_textnodes(' '.join(block.split()[1:]))])
+            return ParentNode(find_heading_num(block),[text_node_to_html_node(node, basepath=basepath) for node in parts[0]])
 
         case BlockType.QUOTE: 
-            return ParentNode('blockquote', quoteblock_to_htmlnodes(block))
+            return ParentNode('blockquote', [text_node_to_html_node(node, basepath=basepath) for part in parts for node in part])
 
         case BlockType.ORDERED_LIST:
-            return ParentNode('ol',list_to_htmlnodes(block))
+            return ParentNode('ol', [ParentNode('li', [text_node_to_html_node(node, basepath=basepath) for node in part]) for part in parts])
 
         case BlockType.UNORDERED_LIST:
-            return ParentNode('ul', list_to_htmlnodes(block))
-
-   
-    return children
+            return ParentNode('ul', [ParentNode('li', [text_node_to_html_node(node, basepath=basepath) for node in part]) for part in parts])
 
 def quoteblock_to_htmlnodes(block: str) -> list[LeafNode]:
-    children = [text_node_to_html_node(node)
-                        for line in block.split('\n')
-                        for node in text_to_textnodes(' '.join(line.split()[1:]))
-                        if line.strip()] 
-    return children
+    return build_block(block, BlockType.QUOTE, parse_block(block, BlockType.QUOTE)).children
 
 def list_to_htmlnodes(block: str) -> list[ParentNode]:
-    li_nodes = [ParentNode('li',[text_node_to_html_node(node) 
-                                 for node in text_to_textnodes(' '.join(line.split()[1:]))])
-                for line in block.split('\n') 
-                if line.strip() and (line.split()[0].endswith('.') 
-                                     or line.split()[0] == '-')]
-    return li_nodes
+    return build_block(block, BlockType.UNORDERED_LIST, parse_block(block, BlockType.UNORDERED_LIST)).children
 
 def find_heading_num(heading_block_text: str) -> str:
     
@@ -0,0 +1,138 @@
+from os import path, makedirs, replace, stat, cpu_count
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from parse_cache import parse_cache
+from urls import page_url
+import json
+
+class PageIndex():
+    '''PageIndex Class
+    A site-wide record of every page, built from the pages as they are parsed.
+    collect() runs wherever a page is rendered (in worker processes too) and turns the parsed page
+    into a JSON-serializable record, the records are merged in here with update(). The records
+    are kept across builds in state_path, so an incremental build only collects the pages it re-renders.
+    Each kept record remembers the size and mtime of the source it came from: a page edited by a build
+    that did not keep this index is collected again rather than trusted by its URL.
+    Subclasses set collect, version and the default state path.
+    ### Attributes:
+        dest_dir: The output directory of the pages.
+        state_path: The file the records are kept in across builds, None keeps them in memory only.
+        pages: The record of every page, keyed by its URL.
+        sources: The [mtime_ns, size] of the source each kept record was collected from, keyed by its URL.
+        updated: The URLs whose record was merged by this build, current whatever their source signature.
+    '''
+    # The (from_path, page) -> record function, a module-level function so worker processes can run it
+    collect = None
+    # Bump in a subclass whenever its records change, so older saved records are dropped
+    version = 1
+    STATE_PATH = None
+
+    def __init__(self, dest_dir: str, state_path: str | None = None) -> None:
+        self.dest_dir = dest_dir
+        self.state_path = state_path if state_path is not None else self.STATE_PATH
+        self.pages = {}
+        self.sources = {}
+        self.updated = set()
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(Pages: {len(self.pages)}, State: {self.state_path})'
+
+    @classmethod
+    def load(cls, dest_dir: str, state_path: str | None = None) -> 'PageIndex':
+        '''Loads the records of the previous build, a missing or unreadable state starts empty.'''
+        index = cls(dest_dir, state_path)
+        try:
+            with open(index.state_path, 'r') as rf:
+                state = json.load(rf)
+            if state.get('version') == cls.version:
+                index.pages = dict(state['pages'])
+                index.sources = dict(state['sources'])
+        except (OSError, ValueError, TypeError, KeyError):
+            pass
+        return index
+
+    def update(self, records: dict) -> None:
+        '''Merges the records of rendered pages, keyed by their output path.'''
+        for dst_path, record in records.items():
+            url = page_url(dst_path, self.dest_dir)
+            self.pages[url] = record
+            self.updated.add(url)
+
+    def missing(self, dst_paths: Iterable[str]) -> list[str]:
+        '''The output paths of the pages that have no record, e.g. unchanged pages of a build whose state was lost.'''
+        return [dst_path for dst_path in dst_paths if page_url(dst_path, self.dest_dir) not in self.pages]
+
+    def stale(self, pages: Iterable[tuple[str, str]]) -> list[tuple[str, str]]:
+        '''
+        The pages that have no record, or whose kept record was collected from another version of their source.
+        ### Args:
+            pages: The (markdown path, html path) tuples of the pages.
+        ### Returns:
+            The (markdown path, html path) tuples of the pages to collect again.
+        '''
+        stale = []
+        for from_path, dst_path in pages:
+            url = page_url(dst_path, self.dest_dir)
+            if url not in self.updated and (url not in self.pages or self.sources.get(url) != source_signature(from_path)):
+                stale.append((from_path, dst_path))
+        return stale
+
+    def add_missing(self, pages: list[tuple[str, str]], jobs: int = 1) -> None:
+        '''
+        Collects the pages that have no record or a stale one, parsing them through the parse cache, then
+        records the source signature of every page whose record this build merged.
+        ### Args:
+            pages: The (markdown path, html path) tuples of every page of the build.
+            jobs: The number of worker processes, 0 uses every core.
+        '''
+        self._collect(self.stale(pages), jobs)
+        for from_path, dst_path in pages:
+            url = page_url(dst_path, self.dest_dir)
+            if url in self.updated:
+                self.sources[url] = source_signature(from_path)
+
+    def _collect(self, pages: list[tuple[str, str]], jobs: int) -> None:
+        if jobs == 0:
+            jobs = cpu_count() or 1
+        if jobs <= 1 or len(pages) <= 1:
+            self.update(_collect_batch(self.collect, pages))
+            return
+        batch_size = max(1, min(256, len(pages) // (jobs * 4)))
+        batches = [pages[i:i + batch_size] for i in range(0, len(pages), batch_size)]
+        with ProcessPoolExecutor(max_workers=min(jobs, len(batches)), initializer=parse_cache.configure,
+                                 initargs=(parse_cache.cache_dir, parse_cache.max_bytes)) as executor:
+            for records in executor.map(_collect_batch, [self.collect] * len(batches), batches):
+                self.update(records)
+
+    def retain(self, dst_paths: Iterable[str]) -> None:
+        '''Drops the records of the pages the current build no longer produces.'''
+        urls = {page_url(dst_path, self.dest_dir) for dst_path in dst_paths}
+        self.pages = {url: record for url, record in self.pages.items() if url in urls}
+        self.sources = {url: signature for url, signature in self.sources.items() if url in urls}
+
+    def remove(self, dst_path: str) -> None:
+        url = page_url(dst_path, self.dest_dir)
+        self.pages.pop(url, None)
+        self.sources.pop(url, None)
+
+    def save(self) -> None:
+        '''Writes the records atomically for the next build.'''
+        if self.state_path is None:
+            return
+        makedirs(path.dirname(self.state_path) or '.', exist_ok=True)
+        with open(f'{self.state_path}.tmp', 'w') as wf:
+            json.dump({'version': self.version, 'pages': dict(sorted(self.pages.items())),
+                       'sources': dict(sorted(self.sources.items()))}, wf, separators=(',', ':'))
+        replace(f'{self.state_path}.tmp', self.state_path)
+
+def source_signature(from_path: str) -> list[int]:
+    '''The [mtime_ns, size] of a page source, as kept in the saved state.'''
+    source_stat = stat(from_path)
+    return [source_stat.st_mtime_ns, source_stat.st_size]
+
+def _collect_batch(collect, pages: list[tuple[str, str]]) -> dict:
+    records = {}
+    for from_path, dst_path in pages:
+        with open(from_path, 'r') as rf:
+            records[dst_path] = collect(from_path, parse_cache.parse(rf.read()))
+    return records
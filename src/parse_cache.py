@@ -0,0 +1,144 @@
+from hashlib import sha256
+from os import path, makedirs, replace, remove, scandir, utime, getpid
+from threading import Lock, get_ident
+from markdown_to_html_node import ParsedPage, parse_page, BlockType, TextNode, TextType
+import marshal
+
+# Bump whenever a change to the block splitter, the classifier or the inline parser changes
+# what parse_page returns, so pages parsed by an older version are parsed again.
+PARSER_VERSION = '1'
+PARSE_CACHE_DIR = path.join('.cache', 'parsed')
+# The default size bound of the cache directory, in bytes.
+PARSE_CACHE_SIZE = 256 * 1024 * 1024
+
+_BLOCK_TYPES = {block_type.value: block_type for block_type in BlockType}
+_TEXT_TYPES = {text_type.value: text_type for text_type in TextType}
+
+def encode_blocks(blocks: list[tuple[BlockType, str, list[list[TextNode]]]]) -> tuple:
+    '''Turns the blocks of a ParsedPage into nested tuples of strings, which marshal can store.'''
+    return tuple((block_type.value, block,
+                  tuple(tuple((node.text, node.text_type.value, node.url) for node in part) for part in parts))
+                 for block_type, block, parts in blocks)
+
+def decode_blocks(encoded: tuple) -> list[tuple[BlockType, str, list[list[TextNode]]]]:
+    '''The inverse of encode_blocks.'''
+    text_types = _TEXT_TYPES
+    return [(_BLOCK_TYPES[block_type], block,
+             [[TextNode(text, text_types[text_type], url) for text, text_type, url in part] for part in parts])
+            for block_type, block, parts in encoded]
+
+class ParseCache():
+    '''ParseCache Class
+    An on-disk cache of parsed pages (the title and blocks of parse_page's ParsedPage), kept across
+    builds, so a page whose output must be re-rendered (e.g. after a template or basepath change)
+    but whose markdown did not change is not parsed again.
+    Entries are marshal files named after the hash of the markdown and the parser version.
+    A hit bumps the entry's mtime, and prune() removes the least recently used entries
+    once the directory grows beyond max_bytes. It is safe to share between threads.
+    ### Attributes:
+        cache_dir: The directory holding the entries.
+        max_bytes: The size bound of the directory, 0 disables the cache.
+        hits: The number of pages taken from the cache.
+        misses: The number of pages that had to be parsed.
+    '''
+    def __init__(self, cache_dir: str = PARSE_CACHE_DIR, max_bytes: int = PARSE_CACHE_SIZE) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        return f'ParseCache(Directory: {self.cache_dir}, Max Bytes: {self.max_bytes}, Hits: {self.hits}, Misses: {self.misses})'
+
+    def configure(self, cache_dir: str, max_bytes: int) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def entry_path(self, markdown: str) -> str:
+        digest = sha256(f'{PARSER_VERSION}\0{markdown}'.encode()).hexdigest()
+        return path.join(self.cache_dir, digest[:2], f'{digest}.marshal')
+
+    def parse(self, markdown: str) -> ParsedPage:
+        '''
+        Parses a page, or loads it from the cache if the same markdown was parsed before.
+        ### Args:
+            markdown: The page's markdown.
+        ### Returns:
+            The page's ParsedPage, see parse_page.
+        ### Raises:
+            ValueError: If the page has no title, as parse_page does.
+        '''
+        if self.max_bytes <= 0:
+            return parse_page(markdown)
+        entry_path = self.entry_path(markdown)
+        try:
+            with open(entry_path, 'rb') as rf:
+                version, title, encoded = marshal.load(rf)
+            if version == PARSER_VERSION:
+                blocks = decode_blocks(encoded)
+                utime(entry_path)
+                with self._lock:
+                    self.hits += 1
+                return ParsedPage(blocks, title)
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            # A missing, truncated or foreign entry is a miss
+            pass
+        with self._lock:
+            self.misses += 1
+        page = parse_page(markdown)
+        self._store(entry_path, page.title, page.blocks)
+        return page
+
+    def _store(self, entry_path: str, title: str, blocks: list) -> None:
+        # Written aside and moved into place, so a concurrent reader never sees half an entry
+        tmp_path = f'{entry_path}.{getpid()}.{get_ident()}.tmp'
+        try:
+            makedirs(path.dirname(entry_path), exist_ok=True)
+            with open(tmp_path, 'wb') as wf:
+                marshal.dump((PARSER_VERSION, title, encode_blocks(blocks)), wf)
+            replace(tmp_path, entry_path)
+        except OSError:
+            # The cache is an optimization, a read-only or full disk must not fail the build
+            if path.exists(tmp_path):
+                remove(tmp_path)
+
+    def take_stats(self) -> tuple[int, int]:
+        '''Returns the (hits, misses) counted so far and resets the counters.'''
+        with self._lock:
+            stats = (self.hits, self.misses)
+            self.hits = 0
+            self.misses = 0
+            return stats
+
+    def prune(self) -> int:
+        '''
+        Removes the least recently used entries until the cache fits in max_bytes.
+        ### Returns:
+            The number of entries removed.
+        '''
+        if not path.isdir(self.cache_dir):
+            return 0
+        entries = []
+        total = 0
+        with scandir(self.cache_dir) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with scandir(shard.path) as files:
+                    for entry in files:
+                        entry_stat = entry.stat()
+                        entries.append((entry_stat.st_mtime_ns, entry_stat.st_size, entry.path))
+                        total += entry_stat.st_size
+        removed = 0
+        if total <= self.max_bytes:
+            return removed
+        for _, size, entry_path in sorted(entries):
+            remove(entry_path)
+            removed += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+        return removed
+
+parse_cache = ParseCache()
@@ -0,0 +1,45 @@
+// Loader of the search index written by search_index.py.
+// Include it with <script src="/search/search.js"></script> and call
+// siteSearch('query') to get the [{url, title}] of the pages holding every word of the query.
+// meta.json is fetched on the first search, a shard only when a word starting with its letter is searched for.
+(function () {
+  const base = new URL('./', document.currentScript.src);
+  const cache = new Map();
+  const fetchJson = (name) => {
+    if (!cache.has(name)) {
+      cache.set(name, fetch(new URL(name, base)).then((response) => response.json()));
+    }
+    return cache.get(name);
+  };
+  const shardName = (term) => (/^[a-z0-9]/.test(term) ? term[0] : '_');
+  const decode = (deltas) => {
+    let id = 0;
+    return deltas.map((delta) => (id += delta));
+  };
+
+  // The ids of the pages holding a term, or a term starting with it for the last word being typed
+  async function lookup(meta, term, prefix) {
+    const name = shardName(term);
+    if (!meta.shards.includes(name)) return new Set();
+    const shard = await fetchJson(`${name}.json`);
+    const ids = new Set();
+    for (const [key, deltas] of Object.entries(shard)) {
+      if (key === term || (prefix && key.startsWith(term))) {
+        decode(deltas).forEach((id) => ids.add(id));
+      }
+    }
+    return ids;
+  }
+
+  window.siteSearch = async function (query) {
+    const terms = query.toLowerCase().match(/[\p{L}\p{N}]+/gu) || [];
+    const words = terms.filter((term) => term.length >= 2);
+    if (!words.length) return [];
+    const meta = await fetchJson('meta.json');
+    const sets = await Promise.all(words.map((term, i) => lookup(meta, term, i === words.length - 1)));
+    const [first, ...rest] = sets;
+    return [...first]
+      .filter((id) => rest.every((ids) => ids.has(id)))
+      .map((id) => ({ url: meta.pages[id][0], title: meta.pages[id][1] }));
+  };
+})();
@@ -0,0 +1,129 @@
+from os import path, makedirs, replace, remove
+from collections.abc import Iterable
+from markdown_to_html_node import ParsedPage, TextNode, BlockType
+from page_index import PageIndex
+from urls import root_url
+import json
+import re
+
+# Bump whenever the layout of the index files or of the saved state changes.
+SEARCH_INDEX_VERSION = 1
+# The directory under the output directory the index and its loader are written into.
+SEARCH_DIR = 'search'
+# The terms of every indexed page, kept across builds so only re-rendered pages are indexed again.
+SEARCH_STATE_PATH = path.join('.cache', 'search-index.json')
+SEARCH_SCRIPT_PATH = path.join(path.dirname(path.abspath(__file__)), 'search.js')
+# Shorter terms are too common to be worth a posting list
+MIN_TERM_LENGTH = 2
+
+TERM_REGEX = re.compile(r'[^\W_]+')
+
+def text_terms(text: str) -> set[str]:
+    '''The lowercased words of a text that are long enough to be indexed.'''
+    return {term for term in TERM_REGEX.findall(text.lower()) if len(term) >= MIN_TERM_LENGTH}
+
+def page_terms(title: str, blocks: Iterable[tuple[BlockType, str, list[list[TextNode]]]]) -> list[str]:
+    '''
+    Collects the terms of a page from the TextNodes its blocks were parsed into.
+    Link and image URLs are not indexed, their text and alt text are. Code blocks have no TextNodes and are not indexed.
+    ### Args:
+        title: The page's title.
+        blocks: The (block type, block, parts) tuples of the page, see parse_page.
+    ### Returns:
+        The page's distinct terms, sorted.
+    '''
+    terms = text_terms(title)
+    for _, _, parts in blocks:
+        for part in parts:
+            for node in part:
+                terms.update(text_terms(node.text))
+    return sorted(terms)
+
+def page_record(from_path: str, page: ParsedPage) -> tuple[str, list[str]]:
+    '''The (title, terms) a rendered page is indexed with.'''
+    return page.title, page_terms(page.title, page.blocks)
+
+def shard_name(term: str) -> str:
+    '''The shard a term's posting list is kept in, named after its first letter or digit so the loader can tell it from the query.'''
+    first = term[0]
+    return first if 'a' <= first <= 'z' or '0' <= first <= '9' else '_'
+
+class SearchIndex(PageIndex):
+    '''SearchIndex Class
+    A client-side search index, built from the TextNodes of the rendered pages.
+    Every page's (title, terms) record is collected as it is rendered (in whichever worker renders it)
+    and merged in here, see PageIndex.
+    write() turns the records into an inverted index: a meta.json holding the page titles and URLs,
+    and one shard per first letter mapping every term to the ids of the pages holding it,
+    so search.js only fetches the shards of the terms searched for.
+    '''
+    collect = staticmethod(page_record)
+    version = SEARCH_INDEX_VERSION
+    STATE_PATH = SEARCH_STATE_PATH
+
+    def shards(self) -> tuple[list[tuple[str, str]], dict[str, dict[str, list[int]]]]:
+        '''
+        Inverts the page records.
+        ### Returns:
+            The (url, title) of every page, its index being the page's id, and the shards,
+            mapping every term to the ascending ids of its pages, delta-encoded.
+        '''
+        urls = sorted(self.pages)
+        postings = {}
+        for page_id, url in enumerate(urls):
+            for term in self.pages[url][1]:
+                postings.setdefault(term, []).append(page_id)
+        shards = {}
+        for term in sorted(postings):
+            ids = postings[term]
+            shards.setdefault(shard_name(term), {})[term] = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+        return [(url, self.pages[url][0]) for url in urls], shards
+
+    def output_paths(self) -> list[str]:
+        '''The paths of every file write() writes from the current records, without writing them.'''
+        _, shards = self.shards()
+        file_names = ['meta.json'] + [f'{name}.json' for name in shards] + ['search.js']
+        return [path.join(self.dest_dir, SEARCH_DIR, file_name) for file_name in file_names]
+
+    def write(self, basepath: str = '/') -> list[str]:
+        '''
+        Writes the index and its loader under dest_dir/search, leaving the files whose contents did not change untouched.
+        ### Args:
+            basepath: The root path the site is served from, page URLs are written under it.
+        ### Returns:
+            The paths of every file of the index, written or unchanged.
+        '''
+        search_dir = path.join(self.dest_dir, SEARCH_DIR)
+        makedirs(search_dir, exist_ok=True)
+        pages, shards = self.shards()
+        meta = {'version': SEARCH_INDEX_VERSION,
+                'pages': [[root_url(url, basepath), title] for url, title in pages],
+                'shards': sorted(shards)}
+        files = {'meta.json': meta}
+        for name, shard in shards.items():
+            files[f'{name}.json'] = shard
+        outputs = []
+        for file_name, data in files.items():
+            outputs.append(_write_if_changed(path.join(search_dir, file_name), json.dumps(data, separators=(',', ':'), ensure_ascii=False)))
+        with open(SEARCH_SCRIPT_PATH, 'r') as rf:
+            outputs.append(_write_if_changed(path.join(search_dir, 'search.js'), rf.read()))
+        return outputs
+
+def _write_if_changed(file_path: str, text: str) -> str:
+    data = text.encode()
+    try:
+        with open(file_path, 'rb') as rf:
+            if rf.read() == data:
+                return file_path
+    except FileNotFoundError:
+        pass
+    tmp_path = f'{file_path}.tmp'
+    try:
+        with open(tmp_path, 'wb') as wf:
+            wf.write(data)
+        replace(tmp_path, file_path)
+    except BaseException:
+        if path.exists(tmp_path):
+            remove(tmp_path)
+        raise
+    return file_path
@@ -0,0 +1,178 @@
+from os import path, replace, remove
+from datetime import datetime, timezone
+from collections.abc import Iterable
+from xml.sax.saxutils import escape, quoteattr
+from urls import root_url
+
+SITEMAP_NAME = 'sitemap.xml'
+# The most URLs a single sitemap may list, beyond it the URLs are split into parts listed by a sitemap index
+MAX_SITEMAP_URLS = 50000
+FEED_NAME = 'feed.xml'
+# The pages under this output directory are the entries of the feed
+FEED_DIR = 'blog'
+# The number of most recently updated pages the feed lists
+FEED_ENTRIES = 20
+
+_SITEMAP_NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+def iso_time(timestamp: float) -> str:
+    '''Formats a timestamp as a W3C / RFC 3339 UTC time, e.g. 2024-05-01T12:00:00Z.'''
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def absolute_url(site_url: str, url: str, basepath: str) -> str:
+    '''Turns a root-relative URL into an absolute one under the site's URL and basepath.'''
+    return site_url.rstrip('/') + root_url(url, basepath)
+
+class SitemapWriter():
+    '''SitemapWriter Class
+    Writes sitemap.xml one URL at a time, so the sitemap of a large site is never held in memory.
+    Once a sitemap reaches max_urls the URLs go on into sitemap-2.xml, sitemap-3.xml, ... and
+    sitemap.xml becomes a sitemap index listing the parts (the sitemaps protocol caps a sitemap at 50,000 URLs).
+    ### Attributes:
+        dest_dir: The output directory the sitemap is written into.
+        site_url: The absolute URL of the site, e.g. https://example.com.
+        basepath: The root path the site is served from.
+        max_urls: The most URLs a single sitemap lists.
+        urls: The number of URLs written.
+        outputs: The paths of the files written, complete once the writer is closed.
+    '''
+    def __init__(self, dest_dir: str, site_url: str, basepath: str = '/', max_urls: int = MAX_SITEMAP_URLS) -> None:
+        self.dest_dir = dest_dir
+        self.site_url = site_url
+        self.basepath = basepath
+        self.max_urls = max_urls
+        self.urls = 0
+        self.outputs = []
+        self._part = 0
+        self._wf = None
+
+    def __enter__(self) -> 'SitemapWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        elif self._wf is not None:
+            self._wf.close()
+            remove(self._wf.name)
+
+    def _part_path(self, part: int) -> str:
+        return path.join(self.dest_dir, SITEMAP_NAME if part == 1 else f'sitemap-{part}.xml')
+
+    def _open_part(self) -> None:
+        self._part += 1
+        self._wf = open(f'{self._part_path(self._part)}.tmp', 'w', encoding='utf-8')
+        self._wf.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{_SITEMAP_NAMESPACE}">\n')
+
+    def _close_part(self, file_path: str) -> None:
+        self._wf.write('</urlset>\n')
+        self._wf.close()
+        replace(self._wf.name, file_path)
+        self._wf = None
+        self.outputs.append(file_path)
+
+    def add(self, url: str, lastmod: float | None = None) -> None:
+        '''
+        Writes a page's URL into the sitemap.
+        ### Args:
+            url: The root-relative URL of the page, before the basepath is applied.
+            lastmod: The timestamp the page last changed at, None leaves it out.
+        '''
+        if self._wf is None or self.urls == self._part * self.max_urls:
+            if self._wf is not None:
+                # The first part is named sitemap-1.xml once there are several, sitemap.xml is the index
+                self._close_part(self._part_path(self._part) if self._part > 1 else path.join(self.dest_dir, 'sitemap-1.xml'))
+            self._open_part()
+        self._wf.write(f'<url><loc>{escape(absolute_url(self.site_url, url, self.basepath))}</loc>')
+        if lastmod is not None:
+            self._wf.write(f'<lastmod>{iso_time(lastmod)}</lastmod>')
+        self._wf.write('</url>\n')
+        self.urls += 1
+
+    def close(self) -> list[str]:
+        '''
+        Finishes the sitemap, writing the sitemap index if the URLs were split.
+        ### Returns:
+            The paths of the files written.
+        '''
+        if self._wf is None and self._part == 0:
+            self._open_part()
+        if self._wf is not None:
+            self._close_part(self._part_path(self._part) if self._part > 1 else path.join(self.dest_dir, SITEMAP_NAME))
+        if self._part > 1:
+            index_path = path.join(self.dest_dir, SITEMAP_NAME)
+            with open(f'{index_path}.tmp', 'w', encoding='utf-8') as wf:
+                wf.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{_SITEMAP_NAMESPACE}">\n')
+                for part in range(1, self._part + 1):
+                    part_url = f'/sitemap-{part}.xml'
+                    wf.write(f'<sitemap><loc>{escape(absolute_url(self.site_url, part_url, self.basepath))}</loc></sitemap>\n')
+                wf.write('</sitemapindex>\n')
+            replace(f'{index_path}.tmp', index_path)
+            self.outputs.append(index_path)
+        return self.outputs
+
+def sitemap_paths(dest_dir: str, url_count: int, max_urls: int = MAX_SITEMAP_URLS) -> list[str]:
+    '''The paths write_sitemap writes for url_count URLs, without writing them: the parts, then the index if they were split.'''
+    parts = max(1, -(-url_count // max_urls))
+    if parts == 1:
+        return [path.join(dest_dir, SITEMAP_NAME)]
+    return [path.join(dest_dir, f'sitemap-{part}.xml') for part in range(1, parts + 1)] + [path.join(dest_dir, SITEMAP_NAME)]
+
+def feed_path(dest_dir: str) -> str:
+    '''The path write_feed writes the feed to.'''
+    return path.join(dest_dir, FEED_NAME)
+
+def write_sitemap(dest_dir: str, site_url: str, basepath: str, pages: Iterable[tuple[str, float | None]],
+                  max_urls: int = MAX_SITEMAP_URLS) -> list[str]:
+    '''
+    Writes the sitemap of the site, see SitemapWriter.
+    ### Args:
+        dest_dir: The output directory.
+        site_url: The absolute URL of the site.
+        basepath: The root path the site is served from.
+        pages: The (root-relative URL, last modification timestamp) of every page, in the order they are listed.
+        max_urls: The most URLs a single sitemap lists.
+    ### Returns:
+        The paths of the files written.
+    '''
+    with SitemapWriter(dest_dir, site_url, basepath, max_urls) as writer:
+        for url, lastmod in pages:
+            writer.add(url, lastmod)
+    return writer.outputs
+
+def write_feed(dest_dir: str, site_url: str, basepath: str, title: str,
+               entries: Iterable[tuple[str, str, float]], max_entries: int = FEED_ENTRIES) -> str:
+    '''
+    Writes an Atom feed of the most recently updated pages.
+    ### Args:
+        dest_dir: The output directory, the feed is written to dest_dir/feed.xml.
+        site_url: The absolute URL of the site.
+        basepath: The root path the site is served from.
+        title: The feed's title, also used as its author.
+        entries: The (root-relative URL, title, last modification timestamp) of every page of the feed.
+        max_entries: The number of entries kept, the most recently updated first.
+    ### Returns:
+        The path of the feed.
+    '''
+    entries = sorted(entries, key=lambda entry: (-entry[2], entry[0]))[:max_entries]
+    feed_url = absolute_url(site_url, f'/{FEED_NAME}', basepath)
+    home_url = absolute_url(site_url, '/', basepath)
+    updated = iso_time(entries[0][2]) if entries else iso_time(0)
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<feed xmlns="http://www.w3.org/2005/Atom">',
+             f'<title>{escape(title)}</title>',
+             f'<id>{escape(feed_url)}</id>',
+             f'<link rel="self" href={quoteattr(feed_url)}/>',
+             f'<link href={quoteattr(home_url)}/>',
+             f'<updated>{updated}</updated>',
+             f'<author><name>{escape(title)}</name></author>']
+    for url, entry_title, lastmod in entries:
+        entry_url = absolute_url(site_url, url, basepath)
+        lines.append(f'<entry><title>{escape(entry_title)}</title><id>{escape(entry_url)}</id>'
+                     f'<link href={quoteattr(entry_url)}/><updated>{iso_time(lastmod)}</updated></entry>')
+    lines.append('</feed>\n')
+    output_path = feed_path(dest_dir)
+    with open(f'{output_path}.tmp', 'w', encoding='utf-8') as wf:
+        wf.write('\n'.join(lines))
+    replace(f'{output_path}.tmp', output_path)
+    return output_path
@@ -0,0 +1,123 @@
+from os import stat
+from io import StringIO
+from urls import rewrite_root_urls
+import urls
+import re
+
+PLACEHOLDER_REGEX = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+TEMPLATE_SLOTS = ('Title', 'Content')
+
+class Template():
+    '''Template Class
+    A page template compiled once into the literal text between its placeholders and the
+    names of the placeholders (slots), so rendering a page is a single pass over the
+    segments instead of a chain of str.replace calls over the whole document.
+    ### Attributes:
+        literals: The literal segments, always one more than there are slots.
+        slots: The placeholder names in the order they appear in the template.
+    ### Raises:
+        ValueError: If the template uses an unknown placeholder or lacks a required one.
+    '''
+    def __init__(self, source: str, allowed_slots: tuple[str, ...] = TEMPLATE_SLOTS) -> None:
+        self.literals = []
+        self.slots = []
+        position = 0
+        for match in PLACEHOLDER_REGEX.finditer(source):
+            name = match.group(1)
+            if name not in allowed_slots:
+                raise ValueError(f'Unknown template placeholder "{match.group(0)}", valid placeholders: {", ".join(allowed_slots)}')
+            self.literals.append(source[position:match.start()])
+            self.slots.append(name)
+            position = match.end()
+        self.literals.append(source[position:])
+        missing = [name for name in allowed_slots if name not in self.slots]
+        if missing:
+            raise ValueError(f'Template is missing the placeholder(s): {", ".join("{{ " + name + " }}" for name in missing)}')
+        self._rewritten_literals = {}
+
+    def __repr__(self) -> str:
+        return f'Template(Slots: {self.slots})'
+
+    def literals_for(self, basepath: str) -> list[str]:
+        '''
+        Returns the literal segments with their root-relative URLs rewritten for the basepath and the
+        fingerprinted asset URLs, computed once per basepath and set of asset URLs.
+        '''
+        key = (basepath, urls.asset_urls_generation)
+        literals = self._rewritten_literals.get(key)
+        if literals is None:
+            literals = [rewrite_root_urls(literal, basepath) for literal in self.literals]
+            self._rewritten_literals[key] = literals
+        return literals
+
+    def _check_values(self, values: dict) -> None:
+        missing = [name for name in self.slots if name not in values]
+        if missing:
+            raise ValueError(f'No value given for the template placeholder(s): {", ".join(missing)}')
+
+    def render(self, values: dict, basepath: str = '/') -> str:
+        '''
+        Renders the template into a string.
+        ### Args:
+            values: The value of every slot, keyed by the slot's name, see write().
+            basepath: The root path the site is served from.
+        ### Returns:
+            The rendered page.
+        ### Raises:
+            ValueError: If a slot has no value.
+        '''
+        self._check_values(values)
+        literals = self.literals_for(basepath)
+        if not any(callable(value) for value in values.values()):
+            parts = [literals[0]]
+            for name, literal in zip(self.slots, literals[1:]):
+                parts.append(values[name])
+                parts.append(literal)
+            return ''.join(parts)
+        sink = StringIO()
+        self.write(sink, values, basepath)
+        return sink.getvalue()
+
+    def write(self, sink, values: dict, basepath: str = '/') -> None:
+        '''
+        Renders the template straight into a file-like object, without assembling the page in memory.
+        ### Args:
+            sink: Any object with a write(str) method, e.g. an open file or io.StringIO.
+            values: The value of every slot, keyed by the slot's name. A value is either a string,
+                or a callable that writes the slot's content into the sink it is given
+                (e.g. an HTMLNode's bound write_html method).
+            basepath: The root path the site is served from.
+        ### Raises:
+            ValueError: If a slot has no value.
+        '''
+        self._check_values(values)
+        literals = self.literals_for(basepath)
+        write = sink.write
+        write(literals[0])
+        for name, literal in zip(self.slots, literals[1:]):
+            value = values[name]
+            if callable(value):
+                value(sink)
+            else:
+                write(value)
+            write(literal)
+
+_template_cache = {}
+
+def load_template(template_path: str) -> Template:
+    '''
+    Compiles a template file, reusing the compiled template until the file changes.
+    ### Args:
+        template_path: The path of the template file.
+    ### Returns:
+        The compiled Template.
+    '''
+    file_stat = stat(template_path)
+    key = (template_path, file_stat.st_mtime_ns, file_stat.st_size)
+    template = _template_cache.get(key)
+    if template is None:
+        with open(template_path, 'r') as rf:
+            template = Template(rf.read())
+        _template_cache.clear()
+        _template_cache[key] = template
+    return template
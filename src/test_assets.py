@@ -0,0 +1,103 @@
+import unittest
+import errno
+from os import path, stat, utime, chmod, write
+from tempfile import TemporaryDirectory
+from unittest import mock
+from assets import copy_file, copy_if_changed, copy_files
+import assets
+
+class TestAssets(unittest.TestCase):
+    data = b'\x89PNG' + bytes(range(256)) * 64
+
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.src_path = path.join(self.tmp.name, 'tom.png')
+        self.dst_path = path.join(self.tmp.name, 'copy.png')
+        self.write(self.src_path, self.data)
+        chmod(self.src_path, 0o640)
+        utime(self.src_path, ns=(1_000_000_000, 1_500_000_000_123))
+        # Every test starts with both fast paths enabled, whatever an earlier copy found out about the file system
+        for name in ('_clone_supported', '_copy_file_range_supported'):
+            patcher = mock.patch.object(assets, name, True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write(self, file_path: str, data: bytes) -> None:
+        with open(file_path, 'wb') as wf:
+            wf.write(data)
+
+    def read(self, file_path: str) -> bytes:
+        with open(file_path, 'rb') as rf:
+            return rf.read()
+
+    def assertCopied(self) -> None:
+        self.assertEqual(self.read(self.dst_path), self.data)
+        src_stat, dst_stat = stat(self.src_path), stat(self.dst_path)
+        self.assertEqual(dst_stat.st_mode, src_stat.st_mode)
+        self.assertEqual(dst_stat.st_mtime_ns, src_stat.st_mtime_ns)
+
+    @unittest.skipIf(assets.copy_file_range is None, 'os.copy_file_range is not available')
+    def test_falls_back_to_copy_file_range(self):
+        unsupported = OSError(errno.EOPNOTSUPP, 'Operation not supported')
+        with mock.patch.object(assets, 'ioctl', side_effect=unsupported) as ioctl, \
+             mock.patch.object(assets, 'copy_file_range', wraps=assets.copy_file_range) as copy_file_range:
+            copy_file(self.src_path, self.dst_path)
+            self.assertEqual(ioctl.call_count, 1)
+            self.assertGreater(copy_file_range.call_count, 0)
+            self.assertFalse(assets._clone_supported)
+            self.assertTrue(assets._copy_file_range_supported)
+            copy_file(self.src_path, self.dst_path)
+            self.assertEqual(ioctl.call_count, 1)
+        self.assertCopied()
+
+    def test_falls_back_to_copyfileobj(self):
+        def partial_copy(fd_in, fd_out, count):
+            # A copy that fails half-way must not leave its bytes in front of the userspace copy
+            write(fd_out, b'partial')
+            raise OSError(errno.EXDEV, 'Invalid cross-device link')
+        with mock.patch.object(assets, 'ioctl', side_effect=OSError(errno.ENOTTY, 'Inappropriate ioctl')), \
+             mock.patch.object(assets, 'copy_file_range', side_effect=partial_copy) as copy_file_range:
+            copy_file(self.src_path, self.dst_path)
+            self.assertFalse(assets._clone_supported)
+            self.assertFalse(assets._copy_file_range_supported)
+            copy_file(self.src_path, self.dst_path)
+            self.assertEqual(copy_file_range.call_count, 1)
+        self.assertCopied()
+
+    def test_other_errors_are_raised(self):
+        with mock.patch.object(assets, 'ioctl', side_effect=OSError(errno.ENOSPC, 'No space left on device')):
+            with self.assertRaises(OSError):
+                copy_file(self.src_path, self.dst_path)
+        self.assertTrue(assets._clone_supported)
+
+    def test_skips_unchanged_files_by_size_and_mtime(self):
+        self.assertEqual(copy_if_changed(self.src_path, self.dst_path), (True, len(self.data)))
+        self.assertCopied()
+        self.assertEqual(copy_if_changed(self.src_path, self.dst_path), (False, len(self.data)))
+        # Same size and mtime: only --hash-assets looks at the contents
+        changed = self.data[::-1]
+        self.write(self.src_path, changed)
+        utime(self.src_path, ns=(1_000_000_000, 1_500_000_000_123))
+        self.assertEqual(copy_if_changed(self.src_path, self.dst_path), (False, len(self.data)))
+        self.assertEqual(copy_if_changed(self.src_path, self.dst_path, check_hash=True), (True, len(self.data)))
+        self.assertEqual(self.read(self.dst_path), changed)
+        self.assertEqual(copy_if_changed(self.src_path, self.dst_path, check_hash=True), (False, len(self.data)))
+        # A new mtime or size is enough without hashing
+        utime(self.src_path, ns=(1_000_000_000, 1_600_000_000_000))
+        self.assertEqual(copy_if_changed(self.src_path, self.dst_path), (True, len(self.data)))
+        self.write(self.src_path, b'short')
+        utime(self.src_path, ns=(1_000_000_000, 1_600_000_000_000))
+        self.assertEqual(copy_if_changed(self.src_path, self.dst_path), (True, 5))
+
+    def test_copy_files(self):
+        pairs = [(self.src_path, path.join(self.tmp.name, f'copy-{i}.png')) for i in range(5)]
+        stats = copy_files(pairs[:2], threads=4)
+        self.assertEqual((stats.copied_files, stats.copied_bytes, stats.skipped_files), (2, 2 * len(self.data), 0))
+        stats = copy_files(pairs, threads=4)
+        self.assertEqual((stats.copied_files, stats.skipped_files, stats.skipped_bytes), (3, 2, 2 * len(self.data)))
+        for _, dst_path in pairs:
+            self.assertEqual(self.read(dst_path), self.data)
+
+if __name__ == "__main__":
+    unittest.main()
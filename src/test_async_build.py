@@ -0,0 +1,128 @@
+import unittest
+import asyncio
+import threading
+import json
+from os import path, makedirs, walk
+from io import StringIO
+from contextlib import redirect_stdout
+from tempfile import TemporaryDirectory
+from unittest import mock
+from assets import copy_files
+from errors import PageGenerationError
+from manifest import BuildManifest, PageImages, MANIFEST_NAME
+from parse_cache import parse_cache
+from main import collect_pages, select_pages, render_pages
+from async_build import build_site
+import async_build
+import image_size
+
+def read_tree(root: str) -> dict[str, bytes]:
+    '''Every output under root but the manifest, keyed by its path relative to root.'''
+    files = {}
+    for dir_path, _, file_names in walk(root):
+        for file_name in file_names:
+            file_path = path.join(dir_path, file_name)
+            if file_name != MANIFEST_NAME:
+                with open(file_path, 'rb') as rf:
+                    files[path.relpath(file_path, root)] = rf.read()
+    return files
+
+class TestAsyncBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(parse_cache.configure, parse_cache.cache_dir, parse_cache.max_bytes)
+        parse_cache.configure(path.join(self.tmp.name, 'parsed'), 1024 * 1024)
+        self.static_dir = path.join(self.tmp.name, 'static')
+        patcher = mock.patch.object(image_size, 'STATIC_DIR', self.static_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.content_dir = path.join(self.tmp.name, 'content')
+        self.template_path = path.join(self.tmp.name, 'template.html')
+        self.write(self.template_path, '<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+        self.write(path.join(self.static_dir, 'index.css'), 'body {}')
+        self.write(path.join(self.static_dir, 'images', 'tom.txt'), 'not an image')
+        self.write(path.join(self.content_dir, 'index.md'), '# Home\n\n[tom](/blog/tom/) ![tom](/images/tom.txt)')
+        for page in range(8):
+            self.write(path.join(self.content_dir, 'blog', f'post-{page}', 'index.md'),
+                       f'# Post {page} & more\n\nShared paragraph\n\n```\ncode {page}\n```\n\n- a\n- b')
+
+    def write(self, file_path: str, text: str) -> None:
+        makedirs(path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as wf:
+            wf.write(text)
+
+    def build_sync(self, dest_dir: str) -> tuple[BuildManifest, set[tuple[str, str]]]:
+        '''Builds the site the way main() does without --async.'''
+        manifest = BuildManifest.load(dest_dir)
+        manifest.set_inputs(self.template_path, '/')
+        assets = []
+        with redirect_stdout(StringIO()):
+            pages = collect_pages(self.static_dir, dest_dir, assets) + collect_pages(self.content_dir, dest_dir, assets)
+            for _, dst_path in assets:
+                manifest.record_asset(dst_path)
+            copy_files(assets)
+            selected = select_pages(pages, manifest)
+            titles = {}
+            render_pages(selected, self.template_path, '/', indexes=(PageImages(manifest),), titles=titles)
+        for dst_path, title in titles.items():
+            manifest.record_title(dst_path, title)
+        manifest.save()
+        return manifest, set(pages) - set(selected)
+
+    def build_async(self, dest_dir: str) -> tuple[BuildManifest, set[tuple[str, str]]]:
+        '''Builds the site the way main() does with --async.'''
+        manifest = BuildManifest.load(dest_dir)
+        manifest.set_inputs(self.template_path, '/')
+        result = asyncio.run(build_site([self.static_dir, self.content_dir], self.template_path, dest_dir, '/',
+                                        manifest, io_threads=4, max_open_files=8, log=lambda line: None,
+                                        indexes=(PageImages(manifest),)))
+        for dst_path, title in result.titles.items():
+            manifest.record_title(dst_path, title)
+        manifest.save()
+        return manifest, set(result.skipped)
+
+    def build_both(self, sync_dir: str, async_dir: str) -> set[tuple[str, str]]:
+        '''Builds the site both ways, checking they wrote the same outputs and manifest and skipped the same pages.'''
+        sync_manifest, sync_skipped = self.build_sync(sync_dir)
+        async_manifest, async_skipped = self.build_async(async_dir)
+        self.assertEqual(read_tree(async_dir), read_tree(sync_dir))
+        self.assertEqual(async_manifest.pages, sync_manifest.pages)
+        self.assertEqual(async_manifest.assets, sync_manifest.assets)
+        relative = lambda pages, dest_dir: {(from_path, path.relpath(dst_path, dest_dir)) for from_path, dst_path in pages}
+        self.assertEqual(relative(async_skipped, async_dir), relative(sync_skipped, sync_dir))
+        return sync_skipped
+
+    def test_matches_the_sync_build(self):
+        sync_dir, async_dir = path.join(self.tmp.name, 'sync'), path.join(self.tmp.name, 'async')
+        self.assertEqual(self.build_both(sync_dir, async_dir), set())
+        with open(path.join(async_dir, MANIFEST_NAME)) as rf:
+            self.assertEqual(list(json.load(rf)['pages']['index.html']['images']), [path.join(self.static_dir, 'images', 'tom.txt')])
+        self.write(path.join(self.content_dir, 'blog', 'post-3', 'index.md'), '# Post 3, edited')
+        skipped = self.build_both(sync_dir, async_dir)
+        self.assertEqual(len(skipped), 8)
+        self.assertNotIn(path.join(self.content_dir, 'blog', 'post-3', 'index.md'), {from_path for from_path, _ in skipped})
+
+    def test_pages_render_off_the_event_loop(self):
+        render_threads = set()
+        def render(*args):
+            render_threads.add(threading.get_ident())
+            return async_render(*args)
+        async_render = async_build._render
+        with mock.patch.object(async_build, '_render', side_effect=render):
+            self.build_async(path.join(self.tmp.name, 'docs'))
+        self.assertTrue(render_threads)
+        self.assertNotIn(threading.get_ident(), render_threads)
+
+    def test_page_generation_error(self):
+        broken_path = path.join(self.content_dir, 'blog', 'post-5', 'index.md')
+        self.write(broken_path, 'No title here')
+        dest_dir = path.join(self.tmp.name, 'docs')
+        with self.assertRaises(PageGenerationError) as raised:
+            self.build_async(dest_dir)
+        self.assertEqual(raised.exception.from_path, broken_path)
+        self.assertIn('ValueError', raised.exception.message)
+        self.assertFalse(any(name.endswith('.tmp') for name in read_tree(dest_dir)))
+
+if __name__ == "__main__":
+    unittest.main()
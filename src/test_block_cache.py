@@ -0,0 +1,30 @@
+import unittest
+from markdown_to_html_node import markdown_to_html_node, BlockType
+from block_cache import BlockCache
+
+class TestBlockCache(unittest.TestCase):
+    md = "# Title\n\nSame **block**\n\n```\nx = _y\n```\n\nSame **block**\n\n- a\n- b"
+
+    def test_cached_render_matches_uncached(self):
+        cache = BlockCache(16)
+        self.assertEqual(markdown_to_html_node(self.md, cache).to_html(), markdown_to_html_node(self.md, None).to_html())
+        self.assertEqual(markdown_to_html_node(self.md, cache).to_html(), markdown_to_html_node(self.md, None).to_html())
+        self.assertEqual(cache.take_stats(), (6, 4))
+
+    def test_lru_eviction(self):
+        cache = BlockCache(2)
+        cache.put((BlockType.PARAGRAPH, "a"), "<p>a</p>")
+        cache.put((BlockType.PARAGRAPH, "b"), "<p>b</p>")
+        cache.get((BlockType.PARAGRAPH, "a"))
+        cache.put((BlockType.PARAGRAPH, "c"), "<p>c</p>")
+        self.assertIsNone(cache.get((BlockType.PARAGRAPH, "b")))
+        self.assertEqual(cache.get((BlockType.PARAGRAPH, "a")), "<p>a</p>")
+        self.assertEqual(len(cache), 2)
+
+    def test_disabled_cache_keeps_nothing(self):
+        cache = BlockCache(0)
+        markdown_to_html_node(self.md, cache)
+        self.assertEqual(len(cache), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+import gzip
+from os import path
+from tempfile import TemporaryDirectory
+from compress import gzip_bytes, compress_data, read_gzip_comment, content_signature
+
+class TestCompress(unittest.TestCase):
+    data = b'<html><body>' + b'<p>the ring goes ever on</p>' * 100 + b'</body></html>'
+
+    def test_gzip_bytes_round_trip(self):
+        for level in (1, 6, 9):
+            self.assertEqual(gzip.decompress(gzip_bytes(self.data, level, b'comment')), self.data)
+
+    def test_gzip_bytes_is_deterministic(self):
+        self.assertEqual(gzip_bytes(self.data), gzip_bytes(self.data))
+
+    def test_compress_data_skips_unchanged(self):
+        with TemporaryDirectory() as tmp_dir:
+            file_path = path.join(tmp_dir, 'index.html')
+            self.assertIsNotNone(compress_data(self.data, file_path, 9))
+            self.assertEqual(read_gzip_comment(f'{file_path}.gz'), content_signature(self.data, 9))
+            self.assertIsNone(compress_data(self.data, file_path, 9))
+            self.assertIsNotNone(compress_data(self.data, file_path, 1))
+            self.assertIsNotNone(compress_data(self.data + b'\n', file_path, 1))
+            with open(f'{file_path}.gz', 'rb') as rf:
+                self.assertEqual(gzip.decompress(rf.read()), self.data + b'\n')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import json
+from os import path
+from tempfile import TemporaryDirectory
+from fingerprint import fingerprinted_path, fingerprint_assets, write_asset_manifest, HASH_LENGTH
+from urls import set_asset_urls, root_url, rewrite_root_urls
+from manifest import BuildManifest, hash_file
+from unittest import mock
+from os import utime
+import manifest as manifest_module
+from template import Template
+from io import StringIO
+
+class TestFingerprint(unittest.TestCase):
+    def tearDown(self):
+        set_asset_urls({})
+
+    def test_fingerprinted_path(self):
+        self.assertEqual(fingerprinted_path('docs/images/tom.png', '1a2b3c4d5e6f7a8b'), 'docs/images/tom.1a2b3c4d5e.png')
+        self.assertEqual(fingerprinted_path('docs/app.min.js', 'ffffffffffffffff'), 'docs/app.min.ffffffffff.js')
+
+    def test_fingerprint_assets(self):
+        with TemporaryDirectory() as tmp_dir:
+            src_paths = [path.join(tmp_dir, name) for name in ['index.css', 'favicon.ico', 'index.md']]
+            for src_path in src_paths:
+                with open(src_path, 'w') as wf:
+                    wf.write(src_path)
+            dest_dir = path.join(tmp_dir, 'docs')
+            pairs = [(src_path, path.join(dest_dir, path.basename(src_path))) for src_path in src_paths]
+            fingerprinted_pairs, asset_urls = fingerprint_assets(pairs, dest_dir)
+            css_name = f'index.{hash_file(src_paths[0])[:HASH_LENGTH]}.css'
+            self.assertEqual(fingerprinted_pairs, [(src_paths[0], path.join(dest_dir, css_name))] + pairs[1:])
+            self.assertEqual(asset_urls, {'/index.css': f'/{css_name}'})
+            with open(write_asset_manifest(tmp_dir, asset_urls)) as rf:
+                self.assertEqual(json.load(rf), asset_urls)
+
+    def test_root_url(self):
+        set_asset_urls({'/index.css': '/index.1a2b3c4d5e.css', '/images/a.png': '/images/a.0123456789.png'})
+        self.assertEqual(root_url('/index.css', '/'), '/index.1a2b3c4d5e.css')
+        self.assertEqual(root_url('/index.css?v=2#top', '/site/'), '/site/index.1a2b3c4d5e.css?v=2#top')
+        self.assertEqual(root_url('/index.html', '/'), '/index.html')
+        self.assertEqual(root_url('index.css', '/'), 'index.css')
+        self.assertEqual(rewrite_root_urls('<img src="/images/a.png"><a href="/">', '/'),
+                         '<img src="/images/a.0123456789.png"><a href="/">')
+
+    def test_template(self):
+        template = Template('<link href="/index.css" rel="stylesheet" /><title>{{ Title }}</title>{{ Content }}')
+        values = {'Title': 'Home', 'Content': '<p>Hi</p>'}
+        self.assertIn('href="/index.css"', template.render(values))
+        set_asset_urls({'/index.css': '/index.1a2b3c4d5e.css'})
+        self.assertIn('href="/index.1a2b3c4d5e.css"', template.render(values))
+        wf = StringIO()
+        template.write(wf, values, '/site/')
+        self.assertIn('href="/site/index.1a2b3c4d5e.css"', wf.getvalue())
+
+    def test_digests_are_kept_in_the_manifest(self):
+        with TemporaryDirectory() as tmp_dir:
+            src_path = path.join(tmp_dir, 'tom.png')
+            with open(src_path, 'wb') as wf:
+                wf.write(b'png')
+            dest_dir = path.join(tmp_dir, 'docs')
+            pairs = [(src_path, path.join(dest_dir, 'tom.png'))]
+            with mock.patch.object(manifest_module, 'hash_file', wraps=hash_file) as hashed:
+                names = []
+                for _ in range(2):
+                    manifest = BuildManifest.load(tmp_dir)
+                    names.append(fingerprint_assets(pairs, dest_dir, manifest)[0][0][1])
+                    manifest.save()
+                self.assertEqual(hashed.call_count, 1)
+                self.assertEqual(names[0], names[1])
+                # A new mtime reads the file again, a new content gets a new name
+                with open(src_path, 'wb') as wf:
+                    wf.write(b'gif')
+                utime(src_path, ns=(0, manifest.file_digests[src_path][0] + 1))
+                names.append(fingerprint_assets(pairs, dest_dir, BuildManifest.load(tmp_dir))[0][0][1])
+                self.assertEqual(hashed.call_count, 2)
+                self.assertEqual(names[2], fingerprinted_path(pairs[0][1], hash_file(src_path)))
+                self.assertNotEqual(names[2], names[0])
+
+if __name__ == "__main__":
+    unittest.main()
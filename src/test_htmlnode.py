@@ -1,5 +1,7 @@
 import unittest
 from htmlnode import *
+from io import StringIO
+import htmlnode as htmlnode_module
 
 class TestHTMLNodes(unittest.TestCase):
     def test_node_repr(self):
@@ -123,3 +125,55 @@ class TestHTMLNodes(unittest.TestCase):
         self.assertEqual(actual_leaf_node.value, expected_leaf_node.value)
         self.assertEqual(actual_leaf_node.props, expected_leaf_node.props)
         self.assertEqual(actual_leaf_node.to_html(), '<img src="/images/cool.png" alt="A cool image">')
+
+    def test_convert_with_basepath(self):
+        self.assertEqual(text_node_to_html_node(TextNode("cool", TextType.IMAGE, "/cool.png"), basepath="/site/").to_html(), '<img src="/site/cool.png" alt="cool">')
+        self.assertEqual(text_node_to_html_node(TextNode("home", TextType.LINK, "/"), basepath="/site/").to_html(), '<a href="/site/">home</a>')
+        for url in ["https://boot.dev", "//cdn.example.com/a.js", "#top", "relative/page"]:
+            self.assertEqual(text_node_to_html_node(TextNode("x", TextType.LINK, url), basepath="/site/").props["href"], url)
+
+    def test_write_html_matches_to_html(self):
+        parent_node = ParentNode("div", [ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, "text")]), LeafNode("img", "", {"src": "/a.png", "alt": "a"})])
+        sink = StringIO()
+        parent_node.write_html(sink)
+        self.assertEqual(sink.getvalue(), parent_node.to_html())
+        self.assertEqual(sink.getvalue(), '<div><p><b>bold</b>text</p><img src="/a.png" alt="a"></div>')
+
+    def test_escape_text(self):
+        text = "no special characters"
+        self.assertIs(escape_text(text), text)
+        self.assertEqual(escape_text('a < b && c > "d"'), 'a &lt; b &amp;&amp; c &gt; "d"')
+        self.assertEqual(escape_attribute('say "hi" & <bye>'), 'say &quot;hi&quot; &amp; &lt;bye&gt;')
+
+    def test_leaf_text_and_attributes_are_escaped(self):
+        self.assertEqual(LeafNode(None, "Fish & <Chips>").to_html(), "Fish &amp; &lt;Chips&gt;")
+        self.assertEqual(LeafNode("code", "if a < b:").to_html(), "<code>if a &lt; b:</code>")
+        self.assertEqual(text_node_to_html_node(TextNode('The "Ring"', TextType.IMAGE, "/a.png?x=1&y=2")).to_html(),
+                         '<img src="/a.png?x=1&amp;y=2" alt="The &quot;Ring&quot;">')
+        self.assertEqual(RawHTMLNode("<b>&amp;</b>").to_html(), "<b>&amp;</b>")
+
+    def test_props_are_frozen_and_shared_without_urls(self):
+        props = {"class": "note"}
+        first, second = LeafNode("span", "a", props), LeafNode("span", "b", {"class": "note"})
+        self.assertIs(first.props, second.props)
+        props["class"] = "changed"
+        self.assertEqual(first.props, {"class": "note"})
+        with self.assertRaises(TypeError):
+            first.props["class"] = "changed"
+        link, same_link = LeafNode("a", "x", {"href": "/x"}), LeafNode("a", "x", {"href": "/x"})
+        self.assertEqual(link.props, same_link.props)
+        self.assertIsNot(link.props, same_link.props)
+        with self.assertRaises(TypeError):
+            link.props["href"] = "/y"
+        self.assertNotIn((("href",), ("/x",)), htmlnode_module._props_cache)
+        # Links and images still share the names of their props
+        other_link = LeafNode("a", "y", {"href": "/y"})
+        self.assertIs(other_link.props.names, link.props.names)
+        self.assertEqual(list(other_link.props.items()), [("href", "/y")])
+        self.assertEqual(other_link.props["href"], "/y")
+        with self.assertRaises(KeyError):
+            other_link.props["src"]
+        self.assertEqual(other_link.props_to_html(), ' href="/y"')
+
+if __name__ == "__main__":
+    unittest.main()
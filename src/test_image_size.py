@@ -0,0 +1,58 @@
+import unittest
+import struct
+import zlib
+from os import path, makedirs
+from tempfile import TemporaryDirectory
+import image_size
+from image_size import read_image_size, image_attributes, page_images
+from markdown_to_html_node import parse_page
+
+def png(width: int, height: int) -> bytes:
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr + struct.pack('>I', zlib.crc32(b'IHDR' + ihdr))
+
+def jpeg(width: int, height: int) -> bytes:
+    app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x00' * 9
+    exif = b'\xff\xe1' + struct.pack('>H', 5002) + b'\x00' * 5000
+    sof = b'\xff\xc0' + struct.pack('>HBHHB', 11, 8, height, width, 1) + b'\x01\x11\x00'
+    return b'\xff\xd8' + app0 + exif + sof + b'\xff\xda\x00\x02\xff\xd9'
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.static_dir = self.tmp_dir.name
+        makedirs(path.join(self.static_dir, 'images'))
+        images = {'a.png': png(640, 480), 'b.gif': b'GIF89a' + struct.pack('<HH', 32, 16) + b'\x00' * 20,
+                  'c.jpg': jpeg(1920, 1080), 'd.txt': b'not an image'}
+        for name, data in images.items():
+            with open(path.join(self.static_dir, 'images', name), 'wb') as wf:
+                wf.write(data)
+        self.previous_static_dir = image_size.STATIC_DIR
+        image_size.STATIC_DIR = self.static_dir
+
+    def tearDown(self):
+        image_size.STATIC_DIR = self.previous_static_dir
+        self.tmp_dir.cleanup()
+
+    def test_read_image_size(self):
+        images = path.join(self.static_dir, 'images')
+        self.assertEqual(read_image_size(path.join(images, 'a.png')), (640, 480))
+        self.assertEqual(read_image_size(path.join(images, 'b.gif')), (32, 16))
+        self.assertEqual(read_image_size(path.join(images, 'c.jpg')), (1920, 1080))
+        self.assertIsNone(read_image_size(path.join(images, 'd.txt')))
+
+    def test_image_attributes(self):
+        self.assertEqual(image_attributes('/images/a.png'), {'width': '640', 'height': '480'})
+        for url in ['/images/missing.png', '/images/d.txt', 'https://x.dev/a.png', '//x.dev/a.png', '/../a.png', 'images/a.png']:
+            self.assertEqual(image_attributes(url), {}, url)
+
+    def test_page_images(self):
+        page = parse_page('# ![a](/images/a.png)\n\n![again](/images/a.png?v=2) ![gone](/images/missing.png) '
+                          '![out](https://x.dev/b.gif)\n\n```\n![code](/images/c.jpg)\n```')
+        images = path.join(self.static_dir, 'images')
+        self.assertEqual(page_images('index.md', page), [path.join(images, 'a.png'), path.join(images, 'missing.png')])
+        image_size.STATIC_DIR = None
+        self.assertEqual(page_images('index.md', page), [])
+
+if __name__ == "__main__":
+    unittest.main()
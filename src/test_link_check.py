@@ -0,0 +1,45 @@
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+from markdown_to_html_node import parse_page
+from link_check import LinkIndex, page_links, resolve_link, output_urls, report_broken_links
+
+class TestLinkCheck(unittest.TestCase):
+    md = "# Title\n\n[home](/) and [tom](../tom/) and [ext](https://x.dev/a)\n\n- ![img](/images/a.png)\n- [gone](/gone?x=1#top) [home](/)"
+
+    def test_page_links(self):
+        self.assertEqual(page_links('a.md', parse_page(self.md)),
+                         ('a.md', [('/', 'link'), ('../tom/', 'link'), ('https://x.dev/a', 'link'),
+                                   ('/images/a.png', 'image'), ('/gone?x=1#top', 'link')]))
+
+    def test_resolve_link(self):
+        self.assertEqual(resolve_link('/blog/tom/', '/'), '/blog/tom/')
+        self.assertEqual(resolve_link('../tom/', '/blog/majesty/'), '/blog/tom/')
+        self.assertEqual(resolve_link('a%20b.png', '/blog/post.html'), '/blog/a b.png')
+        self.assertEqual(resolve_link('/gone?x=1#top', '/'), '/gone')
+        for url in ['https://x.dev/a', '//x.dev/a', 'mailto:a@x.dev', '#top', '', None]:
+            self.assertIsNone(resolve_link(url, '/'), url)
+
+    def test_output_urls(self):
+        outputs = [path.join('docs', 'index.html'), path.join('docs', 'blog', 'tom', 'index.html'), path.join('docs', 'index.4a4a4a4a4a.css')]
+        self.assertEqual(output_urls(outputs, 'docs', {'/index.css': '/index.4a4a4a4a4a.css'}),
+                         {'/', '/index.html', '/blog/tom/', '/blog/tom', '/blog/tom/index.html',
+                          '/index.4a4a4a4a4a.css', '/index.css'})
+
+    def test_broken_links_are_reported_with_their_line(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = path.join(tmp_dir, 'index.md')
+            with open(source, 'w') as wf:
+                wf.write(self.md)
+            dest_dir = path.join(tmp_dir, 'docs')
+            index = LinkIndex(dest_dir)
+            index.update({path.join(dest_dir, 'blog', 'majesty', 'index.html'): page_links(source, parse_page(self.md))})
+            targets = output_urls([path.join(dest_dir, 'index.html'), path.join(dest_dir, 'blog', 'tom', 'index.html')], dest_dir)
+            broken = index.broken(targets)
+            self.assertEqual(broken, [(source, '/gone?x=1#top', 'link'), (source, '/images/a.png', 'image')])
+            lines = []
+            report_broken_links(broken, lines.append)
+            self.assertEqual(lines, [f'{source}:6: broken link /gone?x=1#top', f'{source}:5: broken image /images/a.png'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from os import path, makedirs, walk
+from io import StringIO
+from contextlib import redirect_stdout
+from tempfile import TemporaryDirectory
+from parse_cache import parse_cache
+from errors import PageGenerationError
+from unittest import mock
+from search_index import page_record
+from link_check import page_links
+from main import collect_pages, render_pages, generate_page
+import main
+
+def read_tree(root: str) -> dict[str, bytes]:
+    '''Every file under root, keyed by its path relative to root.'''
+    files = {}
+    for dir_path, _, file_names in walk(root):
+        for file_name in file_names:
+            file_path = path.join(dir_path, file_name)
+            with open(file_path, 'rb') as rf:
+                files[path.relpath(file_path, root)] = rf.read()
+    return files
+
+class TestRenderPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        # Keep the parse cache out of the working directory, in this process and in the workers it configures
+        self.addCleanup(parse_cache.configure, parse_cache.cache_dir, parse_cache.max_bytes)
+        parse_cache.configure(path.join(self.tmp.name, 'parsed'), 0)
+        self.content_dir = path.join(self.tmp.name, 'content')
+        self.template_path = path.join(self.tmp.name, 'template.html')
+        with open(self.template_path, 'w') as wf:
+            wf.write('<title>{{ Title }}</title><a href="/">Home</a>{{ Content }}')
+        for page in range(12):
+            self.write_page(path.join('blog', f'post-{page}', 'index.md'),
+                            f'# Post {page}\n\nSome **bold** text and a [link](/blog/post-{page + 1}/)\n\n- one\n- two')
+
+    def write_page(self, relative_path: str, markdown: str) -> None:
+        from_path = path.join(self.content_dir, relative_path)
+        makedirs(path.dirname(from_path), exist_ok=True)
+        with open(from_path, 'w') as wf:
+            wf.write(markdown)
+
+    def render(self, dest_dir: str, jobs: int) -> dict[str, str]:
+        titles = {}
+        with redirect_stdout(StringIO()):
+            render_pages(collect_pages(self.content_dir, dest_dir), self.template_path, '/site/', jobs, titles=titles)
+        return {path.relpath(dst_path, dest_dir): title for dst_path, title in titles.items()}
+
+    def test_jobs_match_a_single_process(self):
+        serial_dir = path.join(self.tmp.name, 'serial')
+        parallel_dir = path.join(self.tmp.name, 'parallel')
+        serial_titles = self.render(serial_dir, 1)
+        self.assertEqual(self.render(parallel_dir, 3), serial_titles)
+        self.assertEqual(len(serial_titles), 12)
+        serial = read_tree(serial_dir)
+        self.assertEqual(read_tree(parallel_dir), serial)
+        self.assertIn(b'<a href="/site/blog/post-4/">link</a>', serial[path.join('blog', 'post-3', 'index.html')])
+
+    def test_worker_failure_names_the_page(self):
+        broken_path = path.join(self.content_dir, 'blog', 'post-5', 'index.md')
+        self.write_page(path.join('blog', 'post-5', 'index.md'), 'No title here')
+        for jobs in (1, 3):
+            with self.subTest(jobs=jobs), self.assertRaises(PageGenerationError) as raised:
+                self.render(path.join(self.tmp.name, f'docs-{jobs}'), jobs)
+            self.assertEqual(raised.exception.from_path, broken_path)
+            self.assertIn('ValueError', raised.exception.message)
+            self.assertFalse(path.exists(path.join(self.tmp.name, f'docs-{jobs}', 'blog', 'post-5', 'index.html.tmp')))
+
+    def test_check_links_only_resolves_the_outputs_of_the_options(self):
+        self.write_page('index.md', '# Home\n\n[feed](/feed.xml) [sitemap](/sitemap.xml) [search](/search/search.js) [index](/search/p.json)')
+        dest_dir = path.join(self.tmp.name, 'docs')
+        with redirect_stdout(StringIO()):
+            broken = main.check_links_only([self.content_dir], dest_dir)
+            self.assertEqual({url for _, url, _ in broken}, {'/feed.xml', '/sitemap.xml', '/search/search.js', '/search/p.json', '/blog/post-12/'})
+            # /blog/post-12/, linked from the last post, is broken in both
+            self.assertEqual(len(main.check_links_only([self.content_dir], dest_dir, sitemap=True, feed=True, search_index=True)), 1)
+        self.assertFalse(path.exists(dest_dir))
+
+    def test_streamed_pages_are_collected_from_the_render(self):
+        from_path = path.join(self.content_dir, 'blog', 'post-3', 'index.md')
+        collectors = (page_record, page_links)
+        results = []
+        for threshold in (main.STREAMING_THRESHOLD, 0):
+            records = [{} for _ in collectors]
+            dst_path = path.join(self.tmp.name, f'{threshold}.html')
+            with mock.patch.object(main, 'STREAMING_THRESHOLD', threshold), \
+                 mock.patch.object(main, 'iter_classified_blocks', wraps=main.iter_classified_blocks) as second_pass:
+                generate_page(from_path, self.template_path, dst_path, '/', lambda line: None, collectors=collectors, records=records)
+            second_pass.assert_not_called()
+            with open(dst_path, 'r') as rf:
+                results.append((rf.read(), [page_records[dst_path] for page_records in records]))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[1][1][1], (from_path, [('/blog/post-4/', 'link')]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import json
+from os import path, makedirs, listdir, remove
+from tempfile import TemporaryDirectory
+from unittest import mock
+from manifest import BuildManifest, PageImages, MANIFEST_NAME, hash_file, file_signature
+import manifest as manifest_module
+import image_size
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dest_dir = path.join(self.tmp.name, 'docs')
+        self.template_path = path.join(self.tmp.name, 'template.html')
+        self.from_path = path.join(self.tmp.name, 'index.md')
+        self.dst_path = path.join(self.dest_dir, 'index.html')
+        makedirs(self.dest_dir)
+        self.write(self.template_path, '<title>{{ Title }}</title>{{ Content }}')
+        self.write(self.from_path, '# Home')
+        self.build()
+
+    def write(self, file_path: str, text: str) -> None:
+        with open(file_path, 'w') as wf:
+            wf.write(text)
+
+    def build(self, basepath: str = '/', assets_hash: str | None = None, full: bool = False,
+              images: tuple[str, ...] = ()) -> tuple[BuildManifest, tuple[bool, str]]:
+        '''Runs the manifest side of a build of the one page, writing its output (showing the images) if it is rebuilt.'''
+        manifest = BuildManifest.load(self.dest_dir, full=full)
+        manifest.set_inputs(self.template_path, basepath)
+        manifest.set_assets_hash(assets_hash)
+        decision = manifest.check_page(self.from_path, self.dst_path)
+        if decision[0]:
+            self.write(self.dst_path, '<p>Home</p>')
+            manifest.record_title(self.dst_path, 'Home')
+            PageImages(manifest).update({self.dst_path: list(images)})
+        manifest.save()
+        return manifest, decision
+
+    def test_first_build_is_full(self):
+        with TemporaryDirectory() as dest_dir:
+            manifest = BuildManifest.load(dest_dir)
+            self.assertTrue(manifest.full)
+            manifest.set_inputs(self.template_path, '/')
+            self.assertEqual(manifest.check_page(self.from_path, path.join(dest_dir, 'index.html')), (True, 'full rebuild'))
+
+    def test_unchanged(self):
+        manifest, decision = self.build()
+        self.assertEqual(decision, (False, 'unchanged'))
+        self.assertEqual(manifest.summary(), {'rebuilt': 0, 'skipped': 1})
+        self.assertEqual(manifest.pages['index.html']['title'], 'Home')
+
+    def test_full(self):
+        self.assertEqual(self.build(full=True)[1], (True, 'full rebuild'))
+
+    def test_new_page(self):
+        manifest = BuildManifest.load(self.dest_dir)
+        manifest.set_inputs(self.template_path, '/')
+        self.assertEqual(manifest.check_page(self.from_path, path.join(self.dest_dir, 'about', 'index.html')), (True, 'new page'))
+
+    def test_generator_version_changed(self):
+        with mock.patch.object(manifest_module, 'GENERATOR_VERSION', 'next'):
+            self.assertEqual(self.build()[1], (True, 'generator version changed'))
+            self.assertEqual(self.build()[1], (False, 'unchanged'))
+
+    def test_template_changed(self):
+        self.write(self.template_path, '<h1>{{ Title }}</h1>{{ Content }}')
+        self.assertEqual(self.build()[1], (True, 'template changed'))
+
+    def test_basepath_changed(self):
+        self.assertEqual(self.build('/site/')[1], (True, 'basepath changed'))
+        self.assertEqual(self.build('/site/')[1], (False, 'unchanged'))
+
+    def test_assets_changed(self):
+        self.assertEqual(self.build(assets_hash='1a2b')[1], (True, 'fingerprinted assets changed'))
+
+    def test_image_sizes_setting_changed(self):
+        with mock.patch.object(image_size, 'STATIC_DIR', None):
+            self.assertEqual(self.build()[1], (True, 'image sizes changed'))
+            self.assertEqual(self.build()[1], (False, 'unchanged'))
+        self.assertEqual(self.build()[1], (True, 'image sizes changed'))
+
+    def test_image_changed(self):
+        image_path = path.join(self.tmp.name, 'tom.png')
+        self.write(image_path, 'an image')
+        self.build(full=True, images=(image_path,))
+        manifest, decision = self.build()
+        self.assertEqual(decision, (False, 'unchanged'))
+        self.assertEqual(manifest.pages['index.html']['images'], {image_path: file_signature(image_path)})
+        self.write(image_path, 'a bigger image')
+        self.assertEqual(self.build(images=(image_path,))[1], (True, 'image changed'))
+        self.assertEqual(self.build()[1], (False, 'unchanged'))
+        remove(image_path)
+        manifest, decision = self.build(images=(image_path,))
+        self.assertEqual(decision, (True, 'image changed'))
+        self.assertEqual(manifest.pages['index.html']['images'], {image_path: None})
+        self.assertEqual(self.build()[1], (False, 'unchanged'))
+
+    def test_source_changed(self):
+        self.write(self.from_path, '# Home, edited')
+        manifest, decision = self.build()
+        self.assertEqual(decision, (True, 'source changed'))
+        self.assertEqual(manifest.pages['index.html']['source_hash'], hash_file(self.from_path))
+
+    def test_output_missing(self):
+        remove(self.dst_path)
+        self.assertEqual(self.build()[1], (True, 'output missing'))
+
+    def test_save_and_load_round_trip(self):
+        manifest = BuildManifest.load(self.dest_dir)
+        self.assertFalse(manifest.full)
+        with open(path.join(self.dest_dir, MANIFEST_NAME)) as rf:
+            self.assertEqual(manifest.previous, json.load(rf))
+        self.assertEqual(manifest.previous['pages']['index.html']['source'], self.from_path)
+        self.assertNotIn(f'{MANIFEST_NAME}.tmp', listdir(self.dest_dir))
+
+    def test_unreadable_manifest_forces_full_build(self):
+        self.write(path.join(self.dest_dir, MANIFEST_NAME), '{not json')
+        self.assertTrue(BuildManifest.load(self.dest_dir).full)
+
+    def test_remove_orphans(self):
+        manifest = BuildManifest.load(self.dest_dir)
+        manifest.set_inputs(self.template_path, '/')
+        old_page = path.join(self.dest_dir, 'blog', 'old', 'index.html')
+        old_asset = path.join(self.dest_dir, 'images', 'old.png')
+        kept_asset = path.join(self.dest_dir, 'index.css')
+        for output_path in (old_page, old_asset, kept_asset):
+            makedirs(path.dirname(output_path), exist_ok=True)
+            self.write(output_path, output_path)
+        manifest.check_page(self.from_path, self.dst_path)
+        manifest.check_page(self.from_path, old_page)
+        for asset_path in (old_asset, kept_asset):
+            manifest.record_asset(asset_path)
+        manifest.save()
+
+        manifest = BuildManifest.load(self.dest_dir)
+        manifest.set_inputs(self.template_path, '/')
+        manifest.check_page(self.from_path, self.dst_path)
+        manifest.record_asset(kept_asset)
+        self.assertEqual(manifest.remove_orphans(), [old_page, old_asset])
+        self.assertEqual(sorted(listdir(self.dest_dir)), [MANIFEST_NAME, 'index.css', 'index.html'])
+
+if __name__ == "__main__":
+    unittest.main()
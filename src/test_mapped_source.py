@@ -0,0 +1,70 @@
+import unittest
+from os import path
+from io import StringIO
+from tempfile import TemporaryDirectory
+from markdown_to_html_node import parse_page, markdown_to_html_node, markdown_to_blocks, BlockType
+from mapped_source import MappedPage, iter_spans, map_page
+from parse_cache import parse_cache
+import mapped_source
+import main
+
+class TestMappedSource(unittest.TestCase):
+    md = "Intro **text**   \r\n  with é\n \n\n\n# The Title\r\n\r\n## Not the title\n\n```\ncode\n```\n\n- a [link](/x)\n- ![img](/i.png)\n"
+
+    def test_iter_spans(self):
+        data = b"a\n\n\nb\r\n\r\n \nc"
+        self.assertEqual([data[start:end] for start, end in iter_spans(data)], [b"a", b"\nb", b" \nc"])
+        self.assertEqual(list(iter_spans(b"a\r\nb")), [(0, 4)])
+        self.assertEqual(list(iter_spans(b"\n\n")), [])
+
+    def test_blocks_match_parse_page(self):
+        page = MappedPage(self.md.encode())
+        parsed = parse_page(self.md.replace("\r\n", "\n"))
+        self.assertEqual(page.title, "The Title")
+        self.assertEqual(list(page.blocks), parsed.blocks)
+        self.assertEqual(list(page.blocks), parsed.blocks)
+        self.assertEqual(page.block_types, parsed.block_types)
+        self.assertEqual([page.block(index) for index in range(len(page))],
+                         markdown_to_blocks(self.md.replace('\r\n', '\n')))
+        self.assertEqual(page.block_types[3], BlockType.CODE)
+
+    def test_write_html_matches_markdown_to_html_node(self):
+        sink = StringIO()
+        MappedPage(self.md.encode()).write_html(sink, None, "/site/")
+        self.assertEqual(sink.getvalue(), markdown_to_html_node(self.md.replace('\r\n', '\n'), None, "/site/").to_html())
+
+    def test_without_title(self):
+        with self.assertRaises(ValueError):
+            MappedPage(b"## Not a title\n\nText")
+
+    def test_generate_page_from_map(self):
+        with TemporaryDirectory() as tmp_dir:
+            self.addCleanup(parse_cache.configure, parse_cache.cache_dir, parse_cache.max_bytes)
+            parse_cache.configure(path.join(tmp_dir, 'parsed'), 0)
+            source = path.join(tmp_dir, 'index.md')
+            template = path.join(tmp_dir, 'template.html')
+            with open(source, 'w', newline='') as wf:
+                wf.write(self.md)
+            with open(template, 'w') as wf:
+                wf.write('<title>{{ Title }}</title>{{ Content }}')
+            with open(source, 'r') as rf, map_page(rf) as page:
+                self.assertEqual(len(page), 5)
+            outputs = []
+            original = mapped_source.MMAP_THRESHOLD
+            try:
+                for threshold in (None, 1):
+                    mapped_source.MMAP_THRESHOLD = threshold
+                    dst_path = path.join(tmp_dir, f'{threshold}.html')
+                    records = [{}]
+                    title = main.generate_page(source, template, dst_path, '/', lambda line: None,
+                                               collectors=(lambda from_path, page: page.block_types,), records=records)
+                    self.assertEqual(title, "The Title")
+                    self.assertEqual(len(records[0][dst_path]), 5)
+                    with open(dst_path, 'r') as rf:
+                        outputs.append(rf.read())
+            finally:
+                mapped_source.MMAP_THRESHOLD = original
+            self.assertEqual(outputs[0], outputs[1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import marshal
+import os
+from tempfile import TemporaryDirectory
+from markdown_to_html_node import markdown_to_html_node, parse_page
+from parse_cache import ParseCache, encode_blocks, decode_blocks
+
+class TestParseCache(unittest.TestCase):
+    md = "# The Title\n\nSome **bold** and [a link](/x)\n\n> quoted _text_\n\n1. one\n2. ![img](/i.png)\n\n```\ncode\n```"
+
+    def test_encoded_blocks_survive_marshal(self):
+        blocks = parse_page(self.md).blocks
+        self.assertEqual(decode_blocks(marshal.loads(marshal.dumps(encode_blocks(blocks)))), blocks)
+
+    def test_cached_parse_matches_parse(self):
+        with TemporaryDirectory() as cache_dir:
+            cache = ParseCache(cache_dir)
+            first = cache.parse(self.md)
+            second = cache.parse(self.md)
+            self.assertEqual(cache.take_stats(), (1, 1))
+            self.assertEqual((first.title, first.blocks), ("The Title", parse_page(self.md).blocks))
+            self.assertEqual((second.title, second.blocks), (first.title, first.blocks))
+            self.assertEqual(second.build_tree(None).to_html(), markdown_to_html_node(self.md, None).to_html())
+
+    def test_corrupt_entry_is_a_miss(self):
+        with TemporaryDirectory() as cache_dir:
+            cache = ParseCache(cache_dir)
+            cache.parse(self.md)
+            with open(cache.entry_path(self.md), 'wb') as wf:
+                wf.write(b'\x00garbage')
+            self.assertEqual(cache.parse(self.md).title, "The Title")
+            self.assertEqual(cache.take_stats(), (0, 2))
+
+    def test_prune_evicts_least_recently_used(self):
+        with TemporaryDirectory() as cache_dir:
+            cache = ParseCache(cache_dir)
+            pages = [f"# Page {i}\n\n" + "text " * 200 for i in range(3)]
+            for i, page in enumerate(pages):
+                cache.parse(page)
+                os.utime(cache.entry_path(page), ns=(i, i))
+            cache.max_bytes = os.path.getsize(cache.entry_path(pages[2])) + 1
+            self.assertEqual(cache.prune(), 2)
+            self.assertTrue(os.path.exists(cache.entry_path(pages[2])))
+            self.assertFalse(os.path.exists(cache.entry_path(pages[0])))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import json
+from os import path, stat
+from tempfile import TemporaryDirectory
+from unittest import mock
+from markdown_to_html_node import parse_page
+from parse_cache import parse_cache
+from search_index import SearchIndex, page_record, shard_name
+from urls import page_url
+import page_index
+
+class TestSearchIndex(unittest.TestCase):
+    md = "# The Hobbit\n\nA **short** tale of [Bilbo's](/bilbo) trip, see ![a map](/map.png).\n\n```\nnot_indexed()\n```\n\n- x\n- Élan vital"
+
+    def test_page_record(self):
+        title, terms = page_record('hobbit.md', parse_page(self.md))
+        self.assertEqual(title, "The Hobbit")
+        self.assertEqual(terms, ['bilbo', 'hobbit', 'map', 'of', 'see', 'short', 'tale', 'the', 'trip', 'vital', 'élan'])
+
+    def test_page_url_and_shard_name(self):
+        self.assertEqual(page_url(path.join('docs', 'index.html'), 'docs'), '/')
+        self.assertEqual(page_url(path.join('docs', 'blog', 'tom', 'index.html'), 'docs'), '/blog/tom/')
+        self.assertEqual(page_url(path.join('docs', 'about.html'), 'docs'), '/about.html')
+        self.assertEqual([shard_name(term) for term in ['tale', '42', 'élan']], ['t', '4', '_'])
+
+    def test_shards_are_delta_encoded(self):
+        index = SearchIndex('docs')
+        index.update({path.join('docs', name, 'index.html'): (name, terms)
+                      for name, terms in [('a', ['tale']), ('b', ['trip']), ('c', ['tale', 'trip']), ('d', ['tale'])]})
+        pages, shards = index.shards()
+        self.assertEqual(pages, [('/a/', 'a'), ('/b/', 'b'), ('/c/', 'c'), ('/d/', 'd')])
+        self.assertEqual(shards, {'t': {'tale': [0, 2, 1], 'trip': [1, 1]}})
+
+    def test_incremental_write(self):
+        with TemporaryDirectory() as tmp_dir:
+            dest_dir = path.join(tmp_dir, 'docs')
+            state_path = path.join(tmp_dir, 'state.json')
+            index = SearchIndex(dest_dir, state_path)
+            pages = [path.join(dest_dir, name, 'index.html') for name in ['a', 'b']]
+            index.update({pages[0]: ('A', ['apple']), pages[1]: ('B', ['banana'])})
+            outputs = index.write('/site/')
+            self.assertEqual(index.output_paths(), outputs)
+            index.save()
+            with open(path.join(dest_dir, 'search', 'meta.json')) as rf:
+                self.assertEqual(json.load(rf)['pages'], [['/site/a/', 'A'], ['/site/b/', 'B']])
+            a_shard = path.join(dest_dir, 'search', 'a.json')
+            a_mtime = stat(a_shard).st_mtime_ns
+
+            index = SearchIndex.load(dest_dir, state_path)
+            self.assertEqual(index.missing(pages), [])
+            index.update({pages[1]: ('B', ['blueberry'])})
+            index.retain(pages)
+            self.assertEqual(sorted(index.write('/site/')), sorted(outputs))
+            self.assertEqual(stat(a_shard).st_mtime_ns, a_mtime)
+            with open(path.join(dest_dir, 'search', 'b.json')) as rf:
+                self.assertEqual(json.load(rf), {'blueberry': [1]})
+
+            index.retain(pages[:1])
+            self.assertEqual(list(index.pages), ['/a/'])
+
+    def test_pages_edited_between_indexed_builds_are_collected_again(self):
+        with TemporaryDirectory() as tmp_dir:
+            self.addCleanup(parse_cache.configure, parse_cache.cache_dir, parse_cache.max_bytes)
+            parse_cache.configure(path.join(tmp_dir, 'parsed'), 0)
+            dest_dir = path.join(tmp_dir, 'docs')
+            state_path = path.join(tmp_dir, 'state.json')
+            pages = [(path.join(tmp_dir, f'{name}.md'), path.join(dest_dir, name, 'index.html')) for name in ['a', 'b']]
+            def write(from_path, markdown):
+                with open(from_path, 'w') as wf:
+                    wf.write(markdown)
+            def build():
+                '''An indexed build of unchanged pages, returning the pages it collected.'''
+                index = SearchIndex.load(dest_dir, state_path)
+                with mock.patch.object(page_index, '_collect_batch', wraps=page_index._collect_batch) as collect:
+                    index.add_missing(pages)
+                index.retain(dst_path for _, dst_path in pages)
+                index.save()
+                return index, [page for call in collect.call_args_list for page in call.args[1]]
+            write(pages[0][0], '# A\n\nApple')
+            write(pages[1][0], '# B\n\nBanana')
+            self.assertEqual(build()[1], pages)
+            self.assertEqual(build()[1], [])
+            # Edited by a build that did not keep the index: the kept record no longer matches its source
+            write(pages[1][0], '# B\n\nBlueberry pie')
+            index, collected = build()
+            self.assertEqual(collected, pages[1:])
+            self.assertEqual(index.pages['/b/'], ('B', ['blueberry', 'pie']))
+            # Records merged from the render are current and only get their source signature recorded
+            index = SearchIndex.load(dest_dir, state_path)
+            write(pages[0][0], '# A\n\nAvocado')
+            index.update({pages[0][1]: ('A', ['a', 'avocado'])})
+            index.add_missing(pages)
+            index.save()
+            self.assertEqual(build()[1], [])
+
+if __name__ == "__main__":
+    unittest.main()
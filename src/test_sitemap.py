@@ -0,0 +1,58 @@
+import unittest
+from os import path, listdir
+from tempfile import TemporaryDirectory
+from xml.etree import ElementTree
+from sitemap import write_sitemap, write_feed, sitemap_paths, feed_path, iso_time
+
+SITEMAP = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+class TestSitemap(unittest.TestCase):
+    def test_iso_time(self):
+        self.assertEqual(iso_time(0), '1970-01-01T00:00:00Z')
+
+    def test_single_sitemap(self):
+        with TemporaryDirectory() as dest_dir:
+            outputs = write_sitemap(dest_dir, 'https://x.dev/', '/site/', [('/', 0), ('/a&b/', None)])
+            self.assertEqual(outputs, [path.join(dest_dir, 'sitemap.xml')])
+            root = ElementTree.parse(outputs[0]).getroot()
+            self.assertEqual([url.findtext(f'{SITEMAP}loc') for url in root], ['https://x.dev/site/', 'https://x.dev/site/a&b/'])
+            self.assertEqual([url.findtext(f'{SITEMAP}lastmod') for url in root], ['1970-01-01T00:00:00Z', None])
+
+    def test_split_into_sitemap_index(self):
+        with TemporaryDirectory() as dest_dir:
+            outputs = write_sitemap(dest_dir, 'https://x.dev', '/', [(f'/{i}/', None) for i in range(5)], max_urls=2)
+            self.assertEqual(sorted(listdir(dest_dir)), ['sitemap-1.xml', 'sitemap-2.xml', 'sitemap-3.xml', 'sitemap.xml'])
+            self.assertEqual(len(outputs), 4)
+            index = ElementTree.parse(path.join(dest_dir, 'sitemap.xml')).getroot()
+            self.assertEqual(index.tag, f'{SITEMAP}sitemapindex')
+            self.assertEqual([entry.findtext(f'{SITEMAP}loc') for entry in index],
+                             [f'https://x.dev/sitemap-{part}.xml' for part in (1, 2, 3)])
+            part = ElementTree.parse(path.join(dest_dir, 'sitemap-3.xml')).getroot()
+            self.assertEqual([url.findtext(f'{SITEMAP}loc') for url in part], ['https://x.dev/4/'])
+
+    def test_paths_match_the_files_written(self):
+        for count in (0, 1, 2, 5, 6):
+            with self.subTest(count=count), TemporaryDirectory() as dest_dir:
+                outputs = write_sitemap(dest_dir, 'https://x.dev', '/', ((f'/{i}/', None) for i in range(count)), max_urls=2)
+                self.assertEqual(sitemap_paths(dest_dir, count, max_urls=2), outputs)
+                self.assertEqual(feed_path(dest_dir), write_feed(dest_dir, 'https://x.dev', '/', 'Blog', []))
+
+    def test_feed_lists_most_recent_first(self):
+        with TemporaryDirectory() as dest_dir:
+            entries = [('/blog/old/', 'Old', 100), ('/blog/new/', 'New <3', 200), ('/blog/oldest/', 'Oldest', 50)]
+            feed = ElementTree.parse(write_feed(dest_dir, 'https://x.dev', '/', 'Blog', entries, max_entries=2)).getroot()
+            self.assertEqual(feed.findtext(f'{ATOM}updated'), iso_time(200))
+            self.assertEqual([entry.findtext(f'{ATOM}title') for entry in feed.iter(f'{ATOM}entry')], ['New <3', 'Old'])
+            self.assertEqual(feed.find(f'{ATOM}entry/{ATOM}link').get('href'), 'https://x.dev/blog/new/')
+
+    def test_feed_links_are_quoted(self):
+        with TemporaryDirectory() as dest_dir:
+            entries = [('/blog/"quoted" & <more>/', 'Quoted', 100)]
+            feed = ElementTree.parse(write_feed(dest_dir, 'https://x.dev', '/"site"/', 'Blog', entries)).getroot()
+            links = [link.get('href') for link in feed.iter(f'{ATOM}link')]
+            self.assertEqual(links, ['https://x.dev/"site"/feed.xml', 'https://x.dev/"site"/',
+                                     'https://x.dev/"site"/blog/"quoted" & <more>/'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from io import StringIO
+from template import Template, rewrite_root_urls
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template('<title>{{ Title }}</title><article>{{ Content }}</article>')
+        self.assertEqual(template.render({'Title': 'Hi', 'Content': '<p>Yo</p>'}), '<title>Hi</title><article><p>Yo</p></article>')
+
+    def test_write_matches_render(self):
+        template = Template('<link href="/index.css"><h1>{{ Title }}</h1>{{ Content }}<img src="/a.png">')
+        values = {'Title': 'Hi', 'Content': '<p>Yo</p>'}
+        sink = StringIO()
+        template.write(sink, values, '/site/')
+        self.assertEqual(sink.getvalue(), template.render(values, '/site/'))
+
+    def test_basepath_rewrites_literals(self):
+        template = Template('<link href="/index.css">{{ Title }}{{ Content }}<img src="/a.png">')
+        self.assertEqual(template.render({'Title': '', 'Content': ''}, '/site/'), '<link href="/site/index.css"><img src="/site/a.png">')
+
+    def test_basepath_does_not_touch_values(self):
+        template = Template('{{ Title }}{{ Content }}')
+        self.assertEqual(template.render({'Title': 'T', 'Content': '<a href="/x">x</a>'}, '/site/'), 'T<a href="/x">x</a>')
+
+    def test_unknown_placeholder(self):
+        with self.assertRaises(ValueError):
+            Template('{{ Title }}{{ Content }}{{ Author }}')
+
+    def test_missing_placeholder(self):
+        with self.assertRaises(ValueError):
+            Template('<title>{{ Title }}</title>')
+
+    def test_missing_value(self):
+        template = Template('{{ Title }}{{ Content }}')
+        with self.assertRaises(ValueError):
+            template.render({'Title': 'T'})
+
+    def test_rewrite_root_urls(self):
+        self.assertEqual(rewrite_root_urls('<a href="/x"><img src="/y">', '/blog/'), '<a href="/blog/x"><img src="/blog/y">')
+        self.assertEqual(rewrite_root_urls('<script src="//cdn.example.com/a.js"></script><a href="/">', '/blog/'),
+                         '<script src="//cdn.example.com/a.js"></script><a href="/blog/">')
+
+if __name__ == "__main__":
+    unittest.main()
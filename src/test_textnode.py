@@ -1,6 +1,10 @@
 import unittest
 from markdown_to_html_node import *
-from text_to_textnodes import split_nodes_delimiter, split_nodes_link, split_nodes_image
+from text_to_textnodes import split_nodes_delimiter, split_nodes_link, split_nodes_image, iter_blocks
+import text_to_textnodes as textnodes_module
+from text_to_textnodes import block_to_block_type_multipass
+from io import StringIO
+from block_cache import BlockCache
 
 class TestTextNode(unittest.TestCase):
     def test_eq_text(self):
@@ -849,6 +853,132 @@ This is a paragraph with [a link](http://example.com) and ![an image](image.jpg)
         html = node.to_html()
         self.assertEqual(html, "<div><p>####### Too Many Hashes</p></div>")
 
+class TestTextNodePipeline(TestTextNode):
+    '''Runs every case of TestTextNode against the five-stage text_to_textnodes pipeline as well.'''
+    def setUp(self):
+        self.inline_parser = textnodes_module.INLINE_PARSER
+        textnodes_module.INLINE_PARSER = 'pipeline'
+
+    def tearDown(self):
+        textnodes_module.INLINE_PARSER = self.inline_parser
+
+class TestInlineParsersAgree(unittest.TestCase):
+    def assert_parsers_agree(self, text):
+        try:
+            expected = text_to_textnodes(text, 'pipeline')
+        except ValueError as err:
+            with self.assertRaises(ValueError) as context:
+                text_to_textnodes(text, 'scan')
+            self.assertEqual(str(context.exception), str(err))
+            return
+        self.assertEqual(text_to_textnodes(text, 'scan'), expected)
+
+    def test_nested_and_adjacent_delimiters(self):
+        for text in ["**bold with _italic_ inside**", "`code with **bold**`", "``", "****", "__", "a**b**c_d_e`f`g",
+                     "**a** **b** _c_ _d_", "_a_**b**`c`"]:
+            self.assert_parsers_agree(text)
+
+    def test_images_and_links_between_delimiters(self):
+        for text in ["![a](b)[c](d)", "[x![c](d)](e)", "!![a](b) ![](c) [](d)", "**[bold link](u)** and ![i](j)",
+                     "[a](b) `[not a link](c)` [e](f)", "[a_b_c](url) trailing", "![x](y)![x](y)"]:
+            self.assert_parsers_agree(text)
+
+    def test_unmatched_delimiters(self):
+        for text in ["`a", "**a", "_a", "a_ **b", "a_ `c` **b", "**a `b` c**", "_a **b** c_", "`a` _b"]:
+            self.assert_parsers_agree(text)
+
+class TestStreamingBlocks(unittest.TestCase):
+    md = """
+# The Title
+
+This is **bolded** paragraph   
+text in a p
+  
+tag here
+
+
+
+- a list
+-   with items
+
+```
+code_block = True
+```
+
+> a quote
+"""
+
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        for md in [self.md, "", "\n\n\n", "a\n \nb", "a\n\n\nb\n", "  a  \r\n\r\nb"]:
+            self.assertEqual(list(iter_blocks(StringIO(md))), markdown_to_blocks(md))
+
+    def test_write_markdown_html_matches_markdown_to_html_node(self):
+        sink = StringIO()
+        write_markdown_html(StringIO(self.md), sink)
+        self.assertEqual(sink.getvalue(), markdown_to_html_node(self.md).to_html())
+
+    def test_write_markdown_html_keeps_the_parsed_blocks(self):
+        for cache in (None, BlockCache()):
+            sink, blocks = StringIO(), []
+            write_markdown_html(StringIO(self.md), sink, cache, blocks=blocks)
+            self.assertEqual(sink.getvalue(), markdown_to_html_node(self.md, None).to_html())
+            self.assertEqual(blocks, parse_page(self.md).blocks)
+
+    def test_extract_title_from_lines(self):
+        self.assertEqual(extract_title_from_lines(StringIO(self.md)), "The Title")
+        with self.assertRaises(ValueError):
+            extract_title_from_lines(StringIO("## Not a title"))
+
+class TestBlockClassifiersAgree(unittest.TestCase):
+    blocks = [
+        "", "   ", "# h", "####### h", "#x", "## two\n- dash", "```\ncode\n```", "```\nno end", "``` x ```",
+        "> a\n> b", "> a\nb", ">a", "- a\n- b", "- a\n* b", "-a", "1. a\n2. b\n3. c", "1. a\n3. b", "0. a\n1. b",
+        "2. a\n3. b", "1.a", "1.. a", "1. a\n\n2. b", "². a\n1. b", "1. a\n². b\n2. c", "1²3. a", "١. a\n٢. b",
+        "1) a", "a\n1. b", "plain paragraph\nwith two lines", "> quote\n- list", "- a\n\n   \n- b",
+    ]
+
+    def test_classify_block_lines_matches_multipass(self):
+        for block in self.blocks:
+            self.assertEqual(block_to_block_type(block), block_to_block_type_multipass(block), block)
+
+    def test_iter_classified_blocks(self):
+        md = "# Title\n\n- a\n- b\n\n1. x\n2. y\n\ntext"
+        self.assertEqual([block_type for _, block_type in iter_classified_blocks(StringIO(md))],
+                         [BlockType.HEADING, BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST, BlockType.PARAGRAPH])
+
+class TestBasepath(unittest.TestCase):
+    md = "# Title\n\n[home](/) and ![img](/i.png) and [out](https://x.dev)\n\n```\n<a href=\"/raw\">\n```"
+
+    def test_urls_rewritten_where_produced(self):
+        html = markdown_to_html_node(self.md, None, "/site/").to_html()
+        self.assertIn('<a href="/site/">home</a>', html)
+        self.assertIn('<img src="/site/i.png" alt="img">', html)
+        self.assertIn('<a href="https://x.dev">out</a>', html)
+        self.assertIn('&lt;a href="/raw"&gt;', html)
+
+    def test_block_cache_keyed_by_basepath(self):
+        cache = BlockCache(16)
+        self.assertEqual(markdown_to_html_node(self.md, cache, "/site/").to_html(), markdown_to_html_node(self.md, None, "/site/").to_html())
+        self.assertEqual(markdown_to_html_node(self.md, cache, "/").to_html(), markdown_to_html_node(self.md, None, "/").to_html())
+
+class TestParsedPage(unittest.TestCase):
+    md = "Intro **text**\n\n# The Title\n\n## Not the title\n\n# Another h1\n\n- a [link](/x)"
+
+    def test_parse_page(self):
+        page = parse_page(self.md)
+        self.assertEqual(page.title, "The Title")
+        self.assertEqual(page.title, extract_title(self.md))
+        self.assertEqual(page.blocks, [(block_type, block, parse_block(block, block_type))
+                                       for block, block_type in iter_classified_blocks(self.md.split('\n'))])
+        self.assertEqual(page.block_types, [BlockType.PARAGRAPH, BlockType.HEADING, BlockType.HEADING,
+                                            BlockType.HEADING, BlockType.UNORDERED_LIST])
+        self.assertIsNone(page.tree)
+        self.assertEqual(page.build_tree(None, "/site/").to_html(), markdown_to_html_node(self.md, None, "/site/").to_html())
+        self.assertEqual(page.tree.children[0].tag, "p")
+
+    def test_parse_page_without_title(self):
+        with self.assertRaises(ValueError):
+            parse_page("## Not a title\n\nText")
 
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
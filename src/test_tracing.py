@@ -0,0 +1,55 @@
+import unittest
+import json
+from os import path, getpid
+from tempfile import TemporaryDirectory
+from unittest import mock
+import tracing
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(tracing, '_tracer', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_spans_are_no_ops_while_disabled(self):
+        self.assertFalse(tracing.enabled())
+        first, second = tracing.span('page', path='a.md'), tracing.span('write')
+        self.assertIs(first, second)
+        with first as entered:
+            self.assertIsNone(entered)
+        tracing.add_events([{'name': 'page', 'ph': 'X', 'pid': 1, 'tid': 1, 'ts': 0, 'dur': 1}])
+        self.assertEqual(tracing.take_events(), [])
+
+    def test_write_trace(self):
+        tracing.enable()
+        self.assertTrue(tracing.enabled())
+        with tracing.span('page', path='a.md'):
+            with tracing.span('parse'):
+                pass
+            with tracing.span('write'):
+                pass
+        worker_event = {'name': 'page', 'cat': 'build', 'ph': 'X', 'ts': 0.0, 'dur': 1.0, 'pid': getpid() + 1, 'tid': 7, 'args': {}}
+        tracing.add_events([worker_event])
+        with TemporaryDirectory() as tmp_dir:
+            trace_path = path.join(tmp_dir, 'trace.json')
+            tracing.write_trace(trace_path)
+            with open(trace_path, 'r') as rf:
+                trace = json.load(rf)
+        self.assertEqual(trace['displayTimeUnit'], 'ms')
+        events = trace['traceEvents']
+        names = {event['pid']: event['args']['name'] for event in events if event['ph'] == 'M'}
+        self.assertEqual(names, {getpid(): 'main', getpid() + 1: f'worker {getpid() + 1}'})
+        spans = {event['name']: event for event in events if event['ph'] == 'X' and event['pid'] == getpid()}
+        self.assertEqual(sorted(spans), ['page', 'parse', 'write'])
+        self.assertIn(worker_event, events)
+        page, parse, write = spans['page'], spans['parse'], spans['write']
+        self.assertEqual(page['args'], {'path': 'a.md'})
+        # Children lie within their parent and after each other, as the viewers nest them
+        for child in (parse, write):
+            self.assertLessEqual(page['ts'], child['ts'])
+            self.assertLessEqual(child['ts'] + child['dur'], page['ts'] + page['dur'])
+        self.assertLessEqual(parse['ts'] + parse['dur'], write['ts'])
+        self.assertEqual(tracing.take_events(), [])
+
+if __name__ == "__main__":
+    unittest.main()
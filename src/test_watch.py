@@ -0,0 +1,135 @@
+import unittest
+from os import path, makedirs, remove, listdir
+from io import StringIO
+from contextlib import redirect_stdout
+from tempfile import TemporaryDirectory
+from unittest import mock
+from parse_cache import parse_cache
+from main import collect_pages, render_pages
+from watch import StatSnapshot, apply_changes
+from test_image_size import png
+import watch
+import image_size
+import gzip
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(parse_cache.configure, parse_cache.cache_dir, parse_cache.max_bytes)
+        parse_cache.configure(path.join(self.tmp.name, 'parsed'), 0)
+        self.content_dir = path.join(self.tmp.name, 'content')
+        self.static_dir = path.join(self.tmp.name, 'static')
+        self.dest_dir = path.join(self.tmp.name, 'docs')
+        self.template_path = path.join(self.tmp.name, 'template.html')
+        self.write(self.template_path, '<title>{{ Title }}</title>{{ Content }}')
+        self.write(path.join(self.static_dir, 'index.css'), 'body {}')
+        for name in ('tom', 'majesty'):
+            self.write(path.join(self.content_dir, 'blog', name, 'index.md'), f'# {name}\n\nA post')
+
+    def write(self, file_path: str, text: str) -> None:
+        makedirs(path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as wf:
+            wf.write(text)
+
+    def read(self, file_path: str) -> str:
+        with open(file_path, 'r') as rf:
+            return rf.read()
+
+    def apply(self, changes: list[tuple[str, str]], gzip_level: int | None = None) -> mock.MagicMock:
+        '''Applies the changes, returning the mock every render_pages call went through.'''
+        with mock.patch.object(watch, 'render_pages', wraps=render_pages) as render, redirect_stdout(StringIO()):
+            apply_changes(changes, [self.static_dir, self.content_dir], self.template_path, self.dest_dir, '/',
+                          gzip_level=gzip_level)
+        return render
+
+    def build(self) -> None:
+        with redirect_stdout(StringIO()):
+            render_pages(collect_pages(self.content_dir, self.dest_dir), self.template_path, '/')
+
+    def test_poll(self):
+        snapshot = StatSnapshot([self.content_dir], [self.template_path])
+        self.assertEqual(snapshot.poll(), [])
+        tom_path = path.join(self.content_dir, 'blog', 'tom', 'index.md')
+        new_path = path.join(self.content_dir, 'blog', 'new', 'index.md')
+        self.write(new_path, '# New')
+        self.write(tom_path, '# tom\n\nA longer post')
+        self.write(self.template_path, '<h1>{{ Title }}</h1>{{ Content }}')
+        self.assertEqual(snapshot.poll(), [('created', new_path), ('modified', tom_path), ('modified', self.template_path)])
+        self.assertEqual(snapshot.poll(), [])
+        remove(tom_path)
+        self.assertEqual(snapshot.poll(), [('deleted', tom_path)])
+
+    def test_changed_page_is_rendered_alone(self):
+        self.build()
+        tom_path = path.join(self.content_dir, 'blog', 'tom', 'index.md')
+        self.write(tom_path, '# tom\n\nAn edited post')
+        render = self.apply([('modified', tom_path)])
+        tom_output = path.join(self.dest_dir, 'blog', 'tom', 'index.html')
+        render.assert_called_once()
+        self.assertEqual(render.call_args.args[0], [(tom_path, tom_output)])
+        self.assertIn('<p>An edited post</p>', self.read(tom_output))
+
+    def test_changed_asset_is_copied_alone(self):
+        css_path = path.join(self.static_dir, 'index.css')
+        self.write(css_path, 'body { color: red; }')
+        render = self.apply([('modified', css_path)])
+        render.assert_not_called()
+        self.assertEqual(self.read(path.join(self.dest_dir, 'index.css')), 'body { color: red; }')
+
+    def test_deleted_page_loses_its_outputs(self):
+        self.build()
+        tom_path = path.join(self.content_dir, 'blog', 'tom', 'index.md')
+        remove(tom_path)
+        render = self.apply([('deleted', tom_path)])
+        render.assert_not_called()
+        self.assertEqual(listdir(path.join(self.dest_dir, 'blog', 'tom')), [])
+        self.assertTrue(path.isfile(path.join(self.dest_dir, 'blog', 'majesty', 'index.html')))
+
+    def test_changed_image_renders_the_pages_showing_it(self):
+        image_path = path.join(self.static_dir, 'images', 'tom.png')
+        makedirs(path.dirname(image_path))
+        with open(image_path, 'wb') as wf:
+            wf.write(png(640, 480))
+        tom_path = path.join(self.content_dir, 'blog', 'tom', 'index.md')
+        self.write(tom_path, '# tom\n\n![Tom](/images/tom.png)')
+        tom_output = path.join(self.dest_dir, 'blog', 'tom', 'index.html')
+        with mock.patch.object(image_size, 'STATIC_DIR', self.static_dir):
+            self.build()
+            self.assertIn('width="640" height="480"', self.read(tom_output))
+            with open(image_path, 'wb') as wf:
+                wf.write(png(320, 200))
+            render = self.apply([('modified', image_path)])
+        render.assert_called_once()
+        self.assertEqual(render.call_args.args[0], [(tom_path, tom_output)])
+        self.assertIn('width="320" height="200"', self.read(tom_output))
+
+    def test_template_change_renders_every_page(self):
+        self.build()
+        self.write(self.template_path, '<h1>{{ Title }}</h1>{{ Content }}')
+        render = self.apply([('modified', self.template_path)])
+        render.assert_called_once()
+        self.assertEqual(sorted(dst_path for _, dst_path in render.call_args.args[0]),
+                         [path.join(self.dest_dir, 'blog', name, 'index.html') for name in ('majesty', 'tom')])
+        self.assertTrue(self.read(path.join(self.dest_dir, 'blog', 'tom', 'index.html')).startswith('<h1>tom</h1>'))
+
+    def test_gzip_outputs_follow_their_changes(self):
+        tom_path = path.join(self.content_dir, 'blog', 'tom', 'index.md')
+        css_path = path.join(self.static_dir, 'index.css')
+        tom_output = path.join(self.dest_dir, 'blog', 'tom', 'index.html')
+        self.write(tom_path, '# tom\n\nAn edited post')
+        self.write(css_path, 'body { color: red; }')
+        self.apply([('modified', css_path), ('modified', tom_path)], gzip_level=6)
+        for output in (tom_output, path.join(self.dest_dir, 'index.css')):
+            with open(output, 'rb') as rf, gzip.open(f'{output}.gz', 'rb') as gz:
+                self.assertEqual(gz.read(), rf.read())
+        self.write(self.template_path, '<h1>{{ Title }}</h1>{{ Content }}')
+        self.apply([('modified', self.template_path)], gzip_level=6)
+        with gzip.open(f'{tom_output}.gz', 'rt') as gz:
+            self.assertTrue(gz.read().startswith('<h1>tom</h1>'))
+        remove(tom_path)
+        self.apply([('deleted', tom_path)], gzip_level=6)
+        self.assertEqual(listdir(path.join(self.dest_dir, 'blog', 'tom')), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 from textnode import TextNode, TextType, Enum
+from collections.abc import Iterable, Iterator, Sequence
 import re
 class BlockType(Enum):
     """
@@ -23,6 +24,73 @@ def block_to_block_type(block: str) -> BlockType:
         BlockType: The type of block (CODE, QUOTE, UNORDERED_LIST, HEADING,
                    ORDERED_LIST, or PARAGRAPH).
     """
+    return classify_block_lines(block.split('\n'))
+
+def classify_block_lines(lines: Sequence[str]) -> BlockType:
+    """
+    Classifies a block given as its lines, in a single scan over them.
+    The first non-blank line leaves at most one candidate type (a heading or code block is decided
+    right there), every later line only checks its first token against that candidate, and the
+    scan stops at the first line that rules it out.
+
+    Args:
+        lines: The lines of the block, e.g. the lines the block splitter collected.
+
+    Returns:
+        BlockType: The same type block_to_block_type('\n'.join(lines)) returns.
+    """
+    candidate = None
+    previous_number = None
+    for line in lines:
+        tokens = line.split(None, 1)
+        if not tokens:
+            continue
+        token = tokens[0]
+        if candidate is None:
+            if token.startswith('```') and lines[-1].endswith('```'):
+                return BlockType.CODE
+            if token == '>':
+                candidate = BlockType.QUOTE
+            elif token == '-':
+                candidate = BlockType.UNORDERED_LIST
+            elif len(token) <= 6 and token.count('#') == len(token):
+                return BlockType.HEADING
+            else:
+                candidate = BlockType.ORDERED_LIST
+        if candidate is BlockType.QUOTE:
+            if token != '>':
+                return BlockType.PARAGRAPH
+        elif candidate is BlockType.UNORDERED_LIST:
+            if token != '-':
+                return BlockType.PARAGRAPH
+        else:
+            if not token.endswith('.') or token.count('.') != 1 or not token[:-1].isdigit():
+                return BlockType.PARAGRAPH
+            number = _list_item_number(token[:-1])
+            if number is None:
+                continue
+            if previous_number is None and number <= 0:
+                return BlockType.PARAGRAPH
+            if previous_number is not None and number != previous_number + 1:
+                return BlockType.PARAGRAPH
+            previous_number = number
+    if candidate is None or (candidate is BlockType.ORDERED_LIST and previous_number is None):
+        return BlockType.PARAGRAPH
+    return candidate
+
+def _list_item_number(digits: str) -> int | None:
+    # str.isdigit also accepts digits such as superscripts that int() and \d do not,
+    # the number is then taken from the decimal digits right before the dot like re.findall did
+    if digits.isdecimal():
+        return int(digits)
+    match = re.search(r'\d+$', digits)
+    return int(match.group(0)) if match else None
+
+def block_to_block_type_multipass(block: str) -> BlockType:
+    """
+    The original implementation of block_to_block_type, which walks the block up to six times.
+    Kept as the reference classify_block_lines is tested and benchmarked against.
+    """
     if not block.strip():
         return BlockType.PARAGRAPH
     
@@ -67,26 +135,84 @@ def markdown_to_blocks(markdown: str) -> list[str]:
     """
     if not isinstance(markdown, str):
         raise ValueError('markdown must be a string.')
-    # Split the text into blocks based on double newlines
-    # and remove leading/trailing whitespace from each block
-    # Remove empty blocks
-    # Remove leading/trailing whitespace from each line in the block
-    # and remove empty lines
-    # Join the lines back together
-    # and return the cleaned blocks
-    blocks = [block.strip() for block in markdown.split('\n\n') if block.strip()]
-    clean_blocks = ['\n'.join(line.strip() for line in block.split('\n') if line.strip()) for block in blocks]    
-    return clean_blocks
-
-def text_to_textnodes(text: str) -> list[TextNode]:
+    return list(iter_blocks(markdown.split('\n')))
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Generator version of markdown_to_blocks, yields every block as soon as its last line was read.
+    Only the lines of the current block are held in memory, so it can split a file of any size
+    when given the open file object.
+    ### Args:
+        lines: The lines of the markdown, with or without their trailing newline (e.g. an open file).
+    ### Yields:
+        The same blocks markdown_to_blocks returns: every line stripped, whitespace-only lines
+        dropped, and blocks separated by empty lines.
+    """
+    for block_lines in _iter_block_lines(lines):
+        yield '\n'.join(block_lines)
+
+def iter_classified_blocks(lines: Iterable[str]) -> Iterator[tuple[str, BlockType]]:
+    """
+    Like iter_blocks, but classifies every block from the lines the splitter already collected.
+    ### Args:
+        lines: The lines of the markdown, with or without their trailing newline (e.g. an open file).
+    ### Yields:
+        (block, block_type) tuples.
+    """
+    for block_lines in _iter_block_lines(lines):
+        yield '\n'.join(block_lines), classify_block_lines(block_lines)
+
+def _iter_block_lines(lines: Iterable[str]) -> Iterator[list[str]]:
+    block_lines = []
+    for line in lines:
+        if line.endswith('\n'):
+            line = line[:-1]
+        # Only a truly empty line (two newlines in a row) ends a block,
+        # a line of whitespace is dropped from the block like in markdown_to_blocks
+        if not line:
+            if block_lines:
+                yield block_lines
+                block_lines = []
+            continue
+        line = line.strip()
+        if line:
+            block_lines.append(line)
+    if block_lines:
+        yield block_lines
+
+# Selects the implementation behind text_to_textnodes:
+# 'scan' for the single-pass scanner, 'pipeline' for the original five-stage pipeline.
+INLINE_PARSER = 'scan'
+
+IMAGE_REGEX = re.compile(r'\!\[([^\]]*)\]\(([^\)]*)\)')
+# The negative lookbehind (?<!!) ensures that the link is not preceded by an exclamation mark
+LINK_REGEX = re.compile(r'(?<!!)\[([^\]]*)\]\(([^\)]*)\)')
+
+def text_to_textnodes(text: str, parser: str | None = None) -> list[TextNode]:
     """
     This function takes a string of text and converts it into a list of TextNode objects.
     ### Args:
         text: A string of text to be converted.
+        parser: 'scan' or 'pipeline', defaults to the module's INLINE_PARSER.
+            Both produce the same TextNodes and raise the same errors.
     ### Returns:
         A list of TextNode objects representing the text.
     ### Raises:
-        ValueError: If the text_type is not a valid TextType Enum.
+        ValueError: If a delimiter is unmatched.
+    """
+    if (parser or INLINE_PARSER) == 'pipeline':
+        return text_to_textnodes_pipeline(text)
+    return scan_textnodes(text)
+
+def text_to_textnodes_pipeline(text: str) -> list[TextNode]:
+    """
+    The original five-stage implementation of text_to_textnodes, every stage builds a new list of TextNodes.
+    ### Args:
+        text: A string of text to be converted.
+    ### Returns:
+        A list of TextNode objects representing the text.
+    ### Raises:
+        ValueError: If a delimiter is unmatched.
     """
     # Initialize the list of TextNodes with the original text
     # Split the text into nodes based on delimiters
@@ -99,21 +225,99 @@ def text_to_textnodes(text: str) -> list[TextNode]:
     nodes = split_nodes_link(nodes)
     return nodes 
 
+def scan_textnodes(text: str) -> list[TextNode]:
+    """
+    Single-pass version of text_to_textnodes.
+    Walks the text once, code spans first, then bold and italic spans inside the text between them,
+    then images and links inside what is left. Every level only looks at the slices the level above
+    left as plain text, so the work stays linear in the length of the text, and every TextNode is
+    created once instead of once per stage.
+    ### Args:
+        text: A string of text to be converted.
+    ### Returns:
+        The same list of TextNodes text_to_textnodes_pipeline returns.
+    ### Raises:
+        ValueError: The same error text_to_textnodes_pipeline raises for unmatched delimiters.
+    """
+    if not text:
+        return [TextNode(text, TextType.TEXT)]
+    nodes = []
+    append = nodes.append
+    code_parts = text.split('`')
+    if len(code_parts) % 2 == 0:
+        raise ValueError(f'Invalid Markdown: unmatched "`" in "{text}".')
+    # The pipeline only splits on "_" after every "**" was matched, so an unmatched "_"
+    # is reported once the whole text was scanned, and only if no "**" was unmatched.
+    italic_error = None
+    for i, code_part in enumerate(code_parts):
+        if i % 2:
+            append(TextNode(code_part, TextType.CODE))
+            continue
+        if not code_part:
+            continue
+        bold_parts = code_part.split('**')
+        if len(bold_parts) % 2 == 0:
+            raise ValueError(f'Invalid Markdown: unmatched "**" in "{code_part}".')
+        for j, bold_part in enumerate(bold_parts):
+            if j % 2:
+                append(TextNode(bold_part, TextType.BOLD))
+                continue
+            if not bold_part:
+                continue
+            italic_parts = bold_part.split('_')
+            if len(italic_parts) % 2 == 0:
+                if italic_error is None:
+                    italic_error = bold_part
+                continue
+            for k, italic_part in enumerate(italic_parts):
+                if k % 2:
+                    append(TextNode(italic_part, TextType.ITALIC))
+                elif italic_part:
+                    _append_images_and_links(italic_part, nodes)
+    if italic_error is not None:
+        raise ValueError(f'Invalid Markdown: unmatched "_" in "{italic_error}".')
+    return nodes
+
+def _append_text(text: str, new_nodes: list[TextNode]) -> None:
+    new_nodes.append(TextNode(text, TextType.TEXT))
+
+def _append_images_and_links(text: str, new_nodes: list[TextNode]) -> None:
+    if not _split_matches(text, IMAGE_REGEX, TextType.IMAGE, new_nodes, _append_links):
+        _append_links(text, new_nodes)
+
+def _append_links(text: str, new_nodes: list[TextNode]) -> None:
+    if not _split_matches(text, LINK_REGEX, TextType.LINK, new_nodes, _append_text):
+        new_nodes.append(TextNode(text, TextType.TEXT))
+
+def _split_matches(text: str, regex: re.Pattern, text_type: TextType, new_nodes: list[TextNode], on_text) -> bool:
+    """
+    Appends a node for every match of an image or link regex in the text, and hands the
+    non-empty text around the matches to on_text(text, new_nodes).
+    ### Returns:
+        False if the regex did not match at all, in which case nothing was appended.
+    """
+    position = 0
+    matched = False
+    for match in regex.finditer(text):
+        matched = True
+        start = match.start()
+        if start > position:
+            on_text(text[position:start], new_nodes)
+        new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+        position = match.end()
+    if matched and position < len(text):
+        on_text(text[position:], new_nodes)
+    return matched
+
 def extract_markdown_images(text : str) -> list[tuple]:
     """Extracts the Alt Text and URL of Images from markdown texts"""
-    image_regex = r'\!\[([^\]]*)\]\(([^\)]*)\)'
-    image_links = re.findall(image_regex, text)
-    return image_links
+    return IMAGE_REGEX.findall(text)
     
 def extract_markdown_links(text: str) -> list[tuple]:
     """Extracts the Alt Text and URL of Links from markdown texts"""
-    # Regex to match Markdown links
     # Matches [alt text](url) format
-    # The negative lookbehind (?<!!) ensures that the link is not preceded by an exclamation mark
     # The regex captures the alt text and URL separately
-    link_regex = r'(?<!!)\[([^\]]*)\]\(([^\)]*)\)'
-    links = re.findall(link_regex, text)
-    return links
+    return LINK_REGEX.findall(text)
 
 def split_nodes_delimiter(old_nodes: list[TextNode], delimiter:  str| None, text_type :  TextType) -> list[TextNode]:
     """
@@ -148,8 +352,7 @@ def split_nodes_delimiter(old_nodes: list[TextNode], delimiter:  str| None, text
 def split_nodes_link(old_nodes:list[TextNode]) -> list[TextNode]:
     '''
     Takes a List Of TextNodes parses only the TEXT TextType Nodes;
-    If an image is found in the TextNode's text the Image is Extracted;
-    The fuction parses the rest of the TextNode's text looking for new images
+    Every link found in the TextNode's text is extracted in a single scan of the text
     ### Args: 
         #### old_nodes: 
              A list of objects; Of type TextNodes; Of any TextType Enum.
@@ -160,28 +363,14 @@ def split_nodes_link(old_nodes:list[TextNode]) -> list[TextNode]:
     '''    
     new_nodes = []
     for node in old_nodes:
-        if node.text_type is not TextType.TEXT or not extract_markdown_links(node.text):
+        if node.text_type is not TextType.TEXT or not _split_matches(node.text, LINK_REGEX, TextType.LINK, new_nodes, _append_text):
             new_nodes.append(node)
-            continue
-        
-        alt_text, url = extract_markdown_links(node.text)[0]
-        textnode_text_lst = node.text.split(f'[{alt_text}]({url})', maxsplit= 1)
-        
-        if textnode_text_lst[0]:
-            new_nodes.append(TextNode(textnode_text_lst[0], TextType.TEXT))    
-        
-        new_nodes.append(TextNode(alt_text, TextType.LINK, url))
-        
-        if textnode_text_lst[1]:
-            new_nodes.extend(split_nodes_link([TextNode(textnode_text_lst[1], TextType.TEXT)]))
-
     return new_nodes
 
 def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
     '''
     Takes a List Of TextNodes parses only the TEXT TextType Nodes;
-    If an image is found in the TextNode's text the Image is Extracted;
-    The fuction parses the rest of the TextNode's text looking for new images
+    Every image found in the TextNode's text is extracted in a single scan of the text
     ### Args: 
         #### old_nodes: 
              A list of objects; Of type TextNodes; Of any TextType Enum.
@@ -191,22 +380,7 @@ def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
            A list of TextNodes split
     '''
     new_nodes = []
-    
     for node in old_nodes:
-        
-        if node.text_type is not TextType.TEXT or not extract_markdown_images(node.text):
+        if node.text_type is not TextType.TEXT or not _split_matches(node.text, IMAGE_REGEX, TextType.IMAGE, new_nodes, _append_text):
             new_nodes.append(node)
-            continue
-        
-        alt_text, url = extract_markdown_images(node.text)[0]
-        text_for_textnode_lst = node.text.split(f'![{alt_text}]({url})', maxsplit = 1)
-        
-        if text_for_textnode_lst[0]:
-            new_nodes.append(TextNode(text_for_textnode_lst[0], TextType.TEXT))    
-        
-        new_nodes.append(TextNode(alt_text, TextType.IMAGE, url))    
-        
-        if text_for_textnode_lst[1]:
-            new_nodes.extend(split_nodes_image([TextNode(text_for_textnode_lst[1], TextType.TEXT)]))
-    
-    return new_nodes
\ No newline at end of file
+    return new_nodes
@@ -26,6 +26,8 @@ class TextNode():
         text_type: The type of text (e.g. bold, italic, etc.)
         url: The URL to be used for links and images.
     '''
+    __slots__ = ('text', 'text_type', 'url')
+
     def __init__(self, text:str, text_type:TextType, url:str  = None) -> None:
         self.text = text
         self.text_type = text_type
@@ -0,0 +1,103 @@
+from os import getpid
+from time import perf_counter_ns
+from threading import get_ident
+import json
+
+class _NullSpan():
+    '''The span handed out while tracing is off, entering and leaving it does nothing.'''
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+_NULL_SPAN = _NullSpan()
+
+class _Span():
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, args: dict) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> None:
+        self.start = perf_counter_ns()
+
+    def __exit__(self, *exc_info) -> None:
+        end = perf_counter_ns()
+        self.tracer.events.append({
+            'name': self.name, 'cat': 'build', 'ph': 'X',
+            'ts': self.start / 1000, 'dur': (end - self.start) / 1000,
+            'pid': self.tracer.pid, 'tid': get_ident(), 'args': self.args,
+        })
+
+class Tracer():
+    '''Tracer Class
+    Records timed spans as Chrome trace events ("complete" events, ph X), which
+    chrome://tracing and ui.perfetto.dev show per process and thread.
+    Timestamps come from the monotonic perf_counter clock, which worker processes share
+    with the parent, so the spans of a parallel build line up on one timeline.
+    ### Attributes:
+        events: The recorded trace events.
+        pid: The process the events are recorded in.
+    '''
+    def __init__(self) -> None:
+        self.events = []
+        self.pid = getpid()
+
+    def span(self, name: str, **args) -> _Span:
+        return _Span(self, name, args)
+
+_tracer = None
+
+def enable() -> None:
+    '''Starts recording spans in this process.'''
+    global _tracer
+    if _tracer is None or _tracer.pid != getpid():
+        _tracer = Tracer()
+
+def enabled() -> bool:
+    return _tracer is not None
+
+def span(name: str, **args):
+    '''
+    Times a with-block as a trace event.
+    ### Args:
+        name: The name of the span, e.g. the build stage.
+        args: Extra details shown with the span, e.g. the page's path.
+    ### Returns:
+        A context manager, a shared no-op one while tracing is off.
+    '''
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, **args)
+
+def take_events() -> list[dict]:
+    '''Returns the events recorded so far in this process and forgets them.'''
+    if _tracer is None:
+        return []
+    events, _tracer.events = _tracer.events, []
+    return events
+
+def add_events(events: list[dict]) -> None:
+    '''Adds events recorded elsewhere, e.g. in a worker process, to this process's trace.'''
+    if _tracer is not None:
+        _tracer.events.extend(events)
+
+def write_trace(trace_path: str) -> None:
+    '''
+    Writes every recorded event to a JSON file in the trace-event format.
+    Every process gets a name, so workers show up as separate tracks.
+    ### Args:
+        trace_path: The file to write.
+    '''
+    events = take_events()
+    main_pid = getpid()
+    names = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+              'args': {'name': 'main' if pid == main_pid else f'worker {pid}'}}
+             for pid in sorted({event['pid'] for event in events} | {main_pid})]
+    with open(trace_path, 'w') as wf:
+        json.dump({'traceEvents': names + events, 'displayTimeUnit': 'ms'}, wf)
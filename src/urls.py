@@ -0,0 +1,68 @@
+from os import path
+import re
+
+# The root-relative URL of an href or src attribute, e.g. href="/index.css"
+ROOT_URL_ATTRIBUTE_REGEX = re.compile(r'\b(href|src)="(/[^"]*)"')
+
+# The fingerprinted URL of every fingerprinted asset, keyed by its original root-relative URL
+_asset_urls = {}
+# Bumped whenever the asset URLs change, so what was rewritten with the old ones can be told apart
+asset_urls_generation = 0
+
+def set_asset_urls(asset_urls: dict[str, str]) -> None:
+    '''
+    Sets the fingerprinted asset URLs root_url maps root-relative URLs to.
+    ### Args:
+        asset_urls: The fingerprinted URL of every asset keyed by its original URL, e.g. {'/index.css': '/index.1a2b3c4d5e.css'}.
+    '''
+    global _asset_urls, asset_urls_generation
+    _asset_urls = dict(asset_urls)
+    asset_urls_generation += 1
+
+def get_asset_urls() -> dict[str, str]:
+    return _asset_urls
+
+def root_url(url: str | None, basepath: str) -> str | None:
+    '''
+    Points a root-relative URL at the basepath the site is served from, and at the
+    fingerprinted name of the asset it references, if any (see set_asset_urls).
+    ### Args:
+        url: The URL of a link or an image.
+        basepath: The root path the site is served from, with leading and trailing slashes.
+    ### Returns:
+        The URL under the basepath if it is root-relative ("/about"), else the URL unchanged
+        (absolute, relative, protocol-relative "//host/..." and fragment URLs are left alone).
+    '''
+    if basepath == '/' and not _asset_urls or not url or url[0] != '/' or url.startswith('//'):
+        return url
+    if _asset_urls:
+        end = len(url)
+        for separator in '?#':
+            index = url.find(separator)
+            if index != -1 and index < end:
+                end = index
+        asset_url = _asset_urls.get(url[:end])
+        if asset_url is not None:
+            url = asset_url + url[end:]
+    if basepath == '/':
+        return url
+    return basepath + url[1:]
+
+def page_url(dst_path: str, dest_dir: str) -> str:
+    '''The root-relative URL a page is served at, e.g. docs/blog/tom/index.html -> /blog/tom/.'''
+    url = '/' + path.relpath(dst_path, dest_dir).replace(path.sep, '/')
+    return url[:-len('index.html')] if url.endswith('/index.html') else url
+
+def rewrite_root_urls(html: str, basepath: str) -> str:
+    '''
+    Points the root-relative href and src attributes of an HTML string at the basepath and at
+    fingerprinted assets, see root_url.
+    ### Args:
+        html: The HTML to rewrite.
+        basepath: The root path the site is served from, with leading and trailing slashes.
+    ### Returns:
+        The rewritten HTML.
+    '''
+    if basepath == '/' and not _asset_urls:
+        return html
+    return ROOT_URL_ATTRIBUTE_REGEX.sub(lambda match: f'{match.group(1)}="{root_url(match.group(2), basepath)}"', html)
@@ -0,0 +1,201 @@
+from os import path, stat, scandir, remove, makedirs
+from time import sleep, perf_counter
+from assets import copy_file
+from compress import compress_file, is_compressible, gzip_path
+from block_cache import block_cache
+from parse_cache import parse_cache
+from image_size import page_images
+import image_size
+from main import collect_pages, render_pages, is_page_source, page_destination
+from search_index import SearchIndex
+
+# Seconds between two polls, small enough that a saved page shows up in well under 100 ms.
+POLL_INTERVAL = 0.05
+
+class StatSnapshot():
+    '''StatSnapshot Class
+    Polls directory trees and single files for changes using only os.stat.
+    The listing of every directory is cached and only re-read when the directory's mtime changes,
+    so a poll costs one stat per directory and per file.
+    ### Attributes:
+        roots: The directories to watch, recursively.
+        files: Single files to watch.
+        snapshot: The (mtime_ns, size) of every watched file as of the last poll, keyed by path.
+    '''
+    def __init__(self, roots: list[str], files: list[str] | None = None) -> None:
+        self.roots = roots
+        self.files = files or []
+        self.snapshot = {}
+        self._listings = {}
+        self.poll()
+
+    def _stat_files(self, file_paths: list[str], seen: dict) -> None:
+        for file_path in file_paths:
+            try:
+                file_stat = stat(file_path)
+            except FileNotFoundError:
+                continue
+            seen[file_path] = (file_stat.st_mtime_ns, file_stat.st_size)
+
+    def _scan(self, dir_path: str, seen: dict, listings: dict) -> None:
+        try:
+            mtime = stat(dir_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        listing = self._listings.get(dir_path)
+        if listing is None or listing[0] != mtime:
+            file_paths, dir_paths = [], []
+            try:
+                with scandir(dir_path) as entries:
+                    for entry in entries:
+                        (dir_paths if entry.is_dir() else file_paths).append(path.join(dir_path, entry.name))
+            except FileNotFoundError:
+                return
+            listing = (mtime, file_paths, dir_paths)
+        listings[dir_path] = listing
+        self._stat_files(listing[1], seen)
+        for sub_dir_path in listing[2]:
+            self._scan(sub_dir_path, seen, listings)
+
+    def poll(self) -> list[tuple[str, str]]:
+        '''
+        Compares the watched files with the last poll.
+        ### Returns:
+            A sorted list of (change, path) tuples, change being 'created', 'modified' or 'deleted'.
+        '''
+        seen, listings = {}, {}
+        for root in self.roots:
+            self._scan(root, seen, listings)
+        self._stat_files(self.files, seen)
+        changes = []
+        for file_path, signature in seen.items():
+            previous = self.snapshot.get(file_path)
+            if previous is None:
+                changes.append(('created', file_path))
+            elif previous != signature:
+                changes.append(('modified', file_path))
+        changes.extend(('deleted', file_path) for file_path in self.snapshot if file_path not in seen)
+        self.snapshot = seen
+        self._listings = listings
+        return sorted(changes, key=lambda change: change[1])
+
+def apply_changes(changes: list[tuple[str, str]], source_dirs: list[str], template_path: str,
+                  dest_dir: str, basepath: str, jobs: int = 1, search_index: SearchIndex | None = None,
+                  gzip_level: int | None = None) -> None:
+    '''
+    Brings the output up to date with a list of changed files.
+    A changed page is re-rendered alone, a changed asset is re-copied alone (along with re-rendering
+    the pages showing it, if it is an image they are sized from), a deleted file has its outputs removed,
+    and a changed template re-renders every page. With gzip_level, the .gz of every updated output is
+    written again and the .gz of a removed one is removed with it.
+    ### Args:
+        changes: The (change, path) tuples returned by StatSnapshot.poll.
+        source_dirs: The watched source directories, each mirrored into dest_dir.
+        template_path: The HTML template every page is rendered into.
+        dest_dir: The output directory.
+        basepath: The root path the site is served from.
+        jobs: The number of worker processes used when every page is re-rendered.
+        search_index: The SearchIndex to update with the re-rendered and deleted pages, if any.
+        gzip_level: The level of the .gz written next to every compressible output, None writes none.
+    '''
+    indexes = (search_index,) if search_index is not None else ()
+    template_changed = any(file_path == template_path for _, file_path in changes)
+    changed_files = {path.normpath(file_path) for _, file_path in changes if not is_page_source(file_path)}
+    if changed_files:
+        # Rendered blocks carry the sizes of the images they show
+        block_cache.clear()
+    if template_changed:
+        pages = [page for source_dir in source_dirs for page in collect_pages(source_dir, dest_dir)]
+        render_pages(pages, template_path, basepath, jobs, gzip_level, indexes)
+    elif changed_files and image_size.STATIC_DIR is not None:
+        changed_pages = {path.normpath(file_path) for _, file_path in changes if is_page_source(file_path)}
+        pages = [(from_path, dst_path) for from_path, dst_path in pages_showing(changed_files, source_dirs, dest_dir)
+                 if path.normpath(from_path) not in changed_pages]
+        if pages:
+            render_pages(pages, template_path, basepath, jobs, gzip_level, indexes)
+    for change, src_path in changes:
+        if src_path == template_path:
+            continue
+        source_dir = next(source_dir for source_dir in source_dirs if path.commonpath([source_dir, src_path]) == path.normpath(source_dir))
+        dst_path = path.join(dest_dir, path.relpath(src_path, source_dir))
+        outputs = [dst_path, page_destination(dst_path)] if is_page_source(src_path) else [dst_path]
+        if change == 'deleted':
+            for output in outputs + [gzip_path(output) for output in outputs]:
+                if path.isfile(output):
+                    remove(output)
+            if search_index is not None and is_page_source(src_path):
+                search_index.remove(outputs[1])
+            print(f'Removed the outputs of {src_path}')
+            continue
+        makedirs(path.dirname(dst_path), exist_ok=True)
+        copy_file(src_path, dst_path)
+        if is_page_source(src_path) and not template_changed:
+            render_pages([(src_path, outputs[1])], template_path, basepath, gzip_level=gzip_level, indexes=indexes)
+        elif not is_page_source(src_path):
+            if gzip_level is not None and is_compressible(dst_path):
+                compress_file(dst_path, gzip_level)
+            print(f'Copied {src_path} to {dst_path}')
+    if search_index is not None and any(is_page_source(file_path) or file_path == template_path for _, file_path in changes):
+        search_outputs = search_index.write(basepath)
+        search_index.save()
+        if gzip_level is not None:
+            for output in search_outputs:
+                if is_compressible(output):
+                    compress_file(output, gzip_level)
+
+def pages_showing(image_paths: set[str], source_dirs: list[str], dest_dir: str) -> list[tuple[str, str]]:
+    '''
+    Finds the pages showing an image sized from one of the files, parsing the pages through the parse cache.
+    ### Args:
+        image_paths: The normalized paths of the files.
+        source_dirs: The source directories, each mirrored into dest_dir.
+        dest_dir: The output directory.
+    ### Returns:
+        The (markdown path, html path) tuples of the pages.
+    '''
+    pages = []
+    for source_dir in source_dirs:
+        for from_path, dst_path in collect_pages(source_dir, dest_dir, make_dirs=False):
+            try:
+                with open(from_path, 'r') as rf:
+                    page = parse_cache.parse(rf.read())
+            except ValueError:
+                # A page without a title does not render either, its error is reported once it changes
+                continue
+            if not image_paths.isdisjoint(page_images(from_path, page)):
+                pages.append((from_path, dst_path))
+    return pages
+
+def watch_site(source_dirs: list[str], template_path: str, dest_dir: str, basepath: str,
+               jobs: int = 1, interval: float = POLL_INTERVAL, search_index: SearchIndex | None = None,
+               gzip_level: int | None = None) -> None:
+    '''
+    Polls the sources and the template until interrupted, updating the output after every change.
+    A page that fails to render is reported and the watch goes on.
+    ### Args:
+        source_dirs: The source directories to watch, each mirrored into dest_dir.
+        template_path: The HTML template every page is rendered into.
+        dest_dir: The output directory.
+        basepath: The root path the site is served from.
+        jobs: The number of worker processes used when every page is re-rendered.
+        interval: The seconds between two polls.
+        search_index: The SearchIndex kept up to date with the changed pages, if any.
+        gzip_level: The level of the .gz kept up to date next to every compressible output, None writes none.
+    '''
+    snapshot = StatSnapshot(source_dirs, [template_path])
+    print(f'Watching {", ".join(source_dirs)} and {template_path} for changes (Ctrl+C to stop)')
+    try:
+        while True:
+            sleep(interval)
+            changes = snapshot.poll()
+            if not changes:
+                continue
+            start = perf_counter()
+            try:
+                apply_changes(changes, source_dirs, template_path, dest_dir, basepath, jobs, search_index, gzip_level)
+            except Exception as err:
+                print(f'Error: {err}')
+                continue
+            print(f'Updated {len(changes)} changed files in {(perf_counter() - start) * 1000:.0f} ms')
+    except KeyboardInterrupt:
+        print('Stopped watching')